@@ -0,0 +1,84 @@
+# ==============================================================================
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+
+# This benchmark compares serving single-sample requests from many client
+# threads by calling Function.eval per request against coalescing them with
+# cntk.eval.DynamicBatcher. It reports the p50/p99 request latency and the
+# throughput of both paths.
+
+from __future__ import print_function
+import argparse
+import threading
+import time
+import numpy as np
+import cntk as C
+
+
+def create_model(input_dim, hidden_dim, num_layers, output_dim):
+    x = C.input_variable(input_dim)
+    with C.layers.default_options(activation=C.relu):
+        z = C.layers.Sequential([C.layers.Dense(hidden_dim) for _ in range(num_layers)] +
+                                [C.layers.Dense(output_dim, activation=None)])(x)
+    return z
+
+
+def run_clients(request_fn, samples, num_clients, requests_per_client):
+    latencies = [[] for _ in range(num_clients)]
+
+    def client(i):
+        for j in range(requests_per_client):
+            sample = samples[(i * requests_per_client + j) % len(samples)]
+            start = time.time()
+            request_fn(sample)
+            latencies[i].append(time.time() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(num_clients)]
+    start = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+
+    latencies = np.concatenate([np.asarray(l) for l in latencies])
+    return latencies, elapsed
+
+
+def report(name, latencies, elapsed):
+    print('%-10s p50 %8.3f ms  p99 %8.3f ms  throughput %9.1f requests/s' %
+          (name, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000,
+           len(latencies) / elapsed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=32, help='number of concurrent client threads')
+    parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    parser.add_argument('--max_batch_size', type=int, default=32)
+    parser.add_argument('--max_latency', type=float, default=0.002, help='latency budget in seconds')
+    parser.add_argument('--input_dim', type=int, default=512)
+    parser.add_argument('--hidden_dim', type=int, default=1024)
+    parser.add_argument('--layers', type=int, default=3)
+    args = parser.parse_args()
+
+    model = create_model(args.input_dim, args.hidden_dim, args.layers, 10)
+    x = model.arguments[0]
+    samples = np.random.rand(1024, args.input_dim).astype(np.float32)
+
+    # unbatched: every request is one eval call; a Function must not be
+    # evaluated concurrently, so calls are serialized as in a simple server
+    lock = threading.Lock()
+    def unbatched(sample):
+        with lock:
+            return model.eval({x: sample[np.newaxis]})
+
+    unbatched(samples[0]) # warm up
+    report('unbatched', *run_clients(unbatched, samples, args.clients, args.requests))
+
+    with C.eval.DynamicBatcher(model, max_batch_size=args.max_batch_size,
+                               max_latency=args.max_latency) as batcher:
+        batcher.evaluate(samples[0]) # warm up
+        report('batched', *run_clients(batcher.evaluate, samples, args.clients, args.requests))
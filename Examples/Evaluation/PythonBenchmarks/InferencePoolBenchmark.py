@@ -0,0 +1,70 @@
+# ==============================================================================
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+
+# This benchmark measures how the throughput of cntk.eval.InferencePool
+# scales with the number of model instances (worker threads), compared to
+# evaluating the same batches sequentially with Function.eval.
+
+from __future__ import print_function
+import argparse
+import multiprocessing
+import time
+import numpy as np
+import cntk as C
+
+
+def create_model(input_dim, hidden_dim, num_layers, output_dim):
+    x = C.input_variable(input_dim)
+    with C.layers.default_options(activation=C.relu):
+        z = C.layers.Sequential([C.layers.Dense(hidden_dim) for _ in range(num_layers)] +
+                                [C.layers.Dense(output_dim, activation=None)])(x)
+    return z
+
+
+def report(name, num_samples, elapsed, baseline=None):
+    throughput = num_samples / elapsed
+    speedup = '' if baseline is None else '  speedup %5.2fx' % (throughput / baseline)
+    print('%-12s %9.1f samples/s%s' % (name, throughput, speedup))
+    return throughput
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max_threads', type=int, default=multiprocessing.cpu_count(),
+                        help='largest number of model instances to measure')
+    parser.add_argument('--threads_per_instance', type=int, default=1,
+                        help='CPU threads that every instance uses per operation')
+    parser.add_argument('--batches', type=int, default=512)
+    parser.add_argument('--batch_size', type=int, default=8)
+    parser.add_argument('--input_dim', type=int, default=256)
+    parser.add_argument('--hidden_dim', type=int, default=512)
+    parser.add_argument('--layers', type=int, default=3)
+    args = parser.parse_args()
+
+    C.cntk_py.set_max_num_cpu_threads(args.threads_per_instance)
+    device = C.cpu()
+    model = create_model(args.input_dim, args.hidden_dim, args.layers, 10)
+    x = model.arguments[0]
+    batches = [np.random.rand(args.batch_size, args.input_dim).astype(np.float32)
+               for _ in range(args.batches)]
+    num_samples = args.batches * args.batch_size
+
+    model.eval({x: batches[0]}, device=device) # warm up
+    start = time.time()
+    for batch in batches:
+        model.eval({x: batch}, device=device)
+    baseline = report('sequential', num_samples, time.time() - start)
+
+    num_threads = 1
+    while True:
+        with C.eval.InferencePool(model, num_instances=num_threads, device=device) as pool:
+            pool.map(batches[:num_threads]) # warm up
+            start = time.time()
+            pool.map(batches)
+            report('%d threads' % num_threads, num_samples, time.time() - start, baseline)
+        if num_threads >= args.max_threads:
+            break
+        num_threads = min(2 * num_threads, args.max_threads)
@@ -0,0 +1,68 @@
+# ==============================================================================
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+
+# This micro-benchmark measures the per-call cost of upcasting the result of
+# Function.forward from Swig types to cntk types, once with the generic
+# recursive walk of cntk.internal.typemap and once with the declared return
+# schema that forward uses.
+
+from __future__ import print_function
+import argparse
+import timeit
+import numpy as np
+import cntk as C
+from cntk import cntk_py
+from cntk.internal import typemap
+
+
+def forward_result(num_outputs, as_numpy, num_sequences):
+    '''
+    Returns a function that builds a result shaped like the one of
+    Function.forward: the backpropagation state and a dictionary mapping
+    the outputs to Values, NumPy arrays or lists of sequences.
+    '''
+    x = C.sequence.input_variable(16)
+    z = C.combine([C.plus(x, i) for i in range(num_outputs)])
+    data = [np.random.rand(5, 16).astype(np.float32) for _ in range(num_sequences)]
+    state, outputs = z.forward({x: data}, z.outputs, keep_for_backward=set(z.outputs),
+                               as_numpy=as_numpy)
+
+    variables = list(outputs.keys())
+    values = [v for v in outputs.values() if isinstance(v, cntk_py.Value)]
+
+    def result():
+        # reset the objects to their Swig types, as the native call would
+        for var in variables:
+            var.__class__ = cntk_py.Variable
+        for value in values:
+            value.__class__ = cntk_py.Value
+        return state, outputs
+
+    return result
+
+
+def measure(name, f, number):
+    seconds = min(timeit.repeat(f, number=number, repeat=5)) / number
+    print('%-40s %8.2f us/call' % (name, seconds * 1e6))
+    return seconds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--outputs', type=int, default=32, help='number of outputs of forward')
+    parser.add_argument('--sequences', type=int, default=64, help='number of sequences per output')
+    parser.add_argument('--number', type=int, default=2000, help='calls per measurement')
+    args = parser.parse_args()
+
+    schema = (None, {cntk_py.Variable: cntk_py.Value})
+    for as_numpy in [False, True]:
+        print('forward with %d outputs, as_numpy=%s:' % (args.outputs, as_numpy))
+        result = forward_result(args.outputs, as_numpy, args.sequences)
+        base = measure('  no upcast', result, args.number)
+        generic = measure('  typemap (recursive walk)', typemap(result), args.number)
+        declared = measure('  typemap(returns=schema)', typemap(result, returns=schema), args.number)
+        print('  savings per call: %.2f us (%.1fx less upcast overhead)' %
+              ((generic - declared) * 1e6, (generic - base) / max(declared - base, 1e-9)))
@@ -7,6 +7,7 @@
 # ==============================================================================
 
 import argparse
+import functools
 import os
 import shelve
 import sys
@@ -20,6 +21,8 @@ from gym.envs.atari.atari_env import AtariEnv
 sys.path.append(
     os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir)))
 from cntk.contrib.deeprl.agent import agent_factory
+from cntk.contrib.deeprl.agent.shared.parallel_environments import \
+    ParallelEnvironments
 from env import env_factory
 
 
@@ -42,6 +45,48 @@ def new_episode():
     return observation
 
 
+def make_named_env(env_name):
+    """Create an environment in a worker process of ParallelEnvironments.
+
+    Reads no globals, since worker processes that are spawned rather than
+    forked don't run the __main__ block.
+    """
+    if env_name not in envs.registry.env_specs.keys():
+        env_factory.register_env(env_name)
+    return envs.make(env_name)
+
+
+def train_with_parallel_environments(eval_count, start_time):
+    """Train with --num_envs environments stepped in worker processes.
+
+    Actions for all environments are chosen with one batched evaluation.
+    Episodes are limited by the environment's own time limit.
+    """
+    with ParallelEnvironments(functools.partial(make_named_env, args.env),
+                              args.num_envs,
+                              args.seed if args.seed >= 0 else None) \
+            as parallel_envs:
+        actions, _ = agent.start_batch(parallel_envs.reset())
+        episode_rewards = np.zeros(args.num_envs)
+        episode_steps = np.zeros(args.num_envs, np.int64)
+        while agent.step_count < args.max_steps:
+            # Evaluate agent every --eval_period steps.
+            eval_count, start_time = evaluate_agent_if_necessary(
+                eval_count, start_time)
+            observations, rewards, dones, _ = parallel_envs.step(actions)
+            episode_rewards += rewards
+            episode_steps += 1
+            for i in np.flatnonzero(dones):
+                print('Episode in environment {0}\t{1}/{2} steps\t{3} total '
+                      'reward'.format(i, episode_steps[i], agent.step_count,
+                                      episode_rewards[i]))
+                episode_rewards[i] = 0
+                episode_steps[i] = 0
+            sys.stdout.flush()
+            actions, _ = agent.step_batch(rewards, observations, dones)
+    return eval_count, start_time
+
+
 def evaluate_agent_if_necessary(eval_count, start_time):
     """Evaluate agent every --eval_period steps."""
     if agent.step_count >= eval_count * args.eval_period:
@@ -126,6 +171,10 @@ if __name__ == '__main__':
                         'environment if set to True.')
     parser.add_argument('--seed', type=int, default=1234567, help='Seed for '
                         'random number generator. Negative value is ignored.')
+    parser.add_argument('--num_envs', type=int, default=1, help='Number of '
+                        'environments stepped in parallel worker processes '
+                        'during training. No-op actions, rendering and '
+                        '--max_episode_steps only apply when it is 1.')
     args = parser.parse_args()
 
     if (args.seed >= 0):
@@ -169,6 +218,9 @@ if __name__ == '__main__':
     reward_history = []
     training_time = []
     start_time = time.time()
+    if args.num_envs > 1:
+        eval_count, start_time = train_with_parallel_environments(
+            eval_count, start_time)
     # Stop when maximum number of steps are reached.
     while agent.step_count < args.max_steps:
         # Evaluate agent every --eval_period steps.
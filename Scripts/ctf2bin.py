@@ -10,7 +10,9 @@
 # Where:
 #   <desired stream name> is the desired name for the input in CNTK.
 #   <stream alias> is the alias for the stream in the input file.
-#   <matrix type> is the matrix type, i.e., dense or sparse
+#   <matrix type> is the matrix type, i.e., dense, sparse, compressed_sparse
+#     (sparse with variable-length encoded indices) or one_hot (like compressed_sparse,
+#     but all values must be 1 and are not stored)
 #   <sample dimension> is the dimension of each sample for the input
 #
 
@@ -18,11 +20,16 @@ import sys
 import argparse
 import struct
 import os
-from collections import OrderedDict
+import multiprocessing
+from collections import OrderedDict, deque
+import numpy as np
 
 MAGIC_NUMBER = 0x636e746b5f62696e;
 CBF_VERSION = 1;
 
+# Number of sequences parsed by a worker process at once
+SEQUENCES_PER_JOB = 1000
+
 class ElementType:
     FLOAT = 0
     DOUBLE = 1
@@ -30,18 +37,17 @@ class ElementType:
 class MatrixEncodingType:
     DENSE = 0
     SPARSE = 1
-    # TODO: use varint encoding for sparse indices,
-    # use varint encoding for integer values,
-    # use a single byte for boolean values (e.g., one-hot values).
-    #COMPRESSED_DENSE = 2
-    #COMPRESSED_SPARSE = 3
+    # sparse, indices are delta-encoded within a sample and stored as varints
+    COMPRESSED_SPARSE = 2
+    # like COMPRESSED_SPARSE, but all values are 1 and not stored
+    ONE_HOT = 3
 
 # This will convert data in the CTF format into the binary format
 class Converter(object):
     def __init__(self, name, sample_dim, element_type):
         self.name = name
         self.sample_dim = sample_dim
-        # contains length (in samples) for each sequence in the chunk
+        # contains (parsed data, first sequence, end sequence) for the sequences in the chunk
         self.sequences = [] 
         self.element_type = element_type
 
@@ -56,139 +62,340 @@ class Converter(object):
         # Finally, the sample dimension.
         output.write(struct.pack('<I', self.sample_dim))
 
-    def write_signed_ints(self, output, ints):
-        output.write(b''.join([struct.pack('<i', x) for x in ints]))
-
-    def write_floats(self, output, floats):
-        format = 'f' if self.is_float() else 'd'
-        output.write(b''.join([struct.pack(format, x) for x in floats]))
-
     def is_float(self):
         return self.element_type == ElementType.FLOAT
 
+    def float_type(self):
+        return np.dtype('<f4') if self.is_float() else np.dtype('<f8')
+
     def get_matrix_type(self):
         raise NotImplementedError()
 
     def reset(self):
         self.sequences = []
 
-    def start_sequence(self):
-        self.sequences.append([])
+    def add_sequences(self, data, begin, end):
+        self.sequences.append((data, begin, end))
+
+    # Parses the samples (lists of value strings) of a list of sequences,
+    # returns the parsed data and the estimated size in bytes of each sequence
+    def parse(self, sequences):
+        raise NotImplementedError()
 
-    def add_sample(self, sample):
+    # Returns the binary representation of the sequences in the chunk
+    def get_data(self):
         raise NotImplementedError()
 
+# Returns the start offsets of the groups with the given sizes, followed by the total size
+def get_offsets(sizes):
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    return offsets
+
+# Encodes non-negative integers (< 2^32) as varints (7 bits per byte, least significant group first,
+# the high bit is set if more bytes follow), returns the bytes and the offset of each value in them
+def encode_varints(values):
+    values = np.asarray(values, dtype=np.uint64)
+    num_bytes = np.ones(len(values), dtype=np.int64)
+    for shift in (7, 14, 21, 28):
+        num_bytes += values >= (1 << shift)
+    offsets = get_offsets(num_bytes)
+    result = np.zeros(offsets[-1], dtype=np.uint8)
+    for k in range(5):
+        mask = num_bytes > k
+        group = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = np.where(num_bytes[mask] > k + 1, 0x80, 0).astype(np.uint64)
+        result[offsets[:-1][mask] + k] = group | more
+    return result, offsets
+
 # Specialization for dense inputs
 class DenseConverter(Converter):
 
     def get_matrix_type(self):
         return MatrixEncodingType.DENSE;
 
-    def add_sample(self, sample):
-        if(len(sample) != self.sample_dim):
-            raise ValueError(
-                "Invalid sample dimension for input {0}".format(self.name))
-
-        byte_size = len(sample) * (4 if self.is_float() else 8)
-
-        if(len(self.sequences) == 0):
-            self.sequences.append([])
-            byte_size += 4;
-
-        self.sequences[-1].append([float(x) for x in sample])
-
-        return byte_size
-
-    def write_data(self, output):
-        for sequence in self.sequences:
-            output.write(struct.pack('<I', len(sequence)))
+    def parse(self, sequences):
+        values = []
+        for sequence in sequences:
             for sample in sequence:
-                self.write_floats(output, sample)
+                if(len(sample) != self.sample_dim):
+                    raise ValueError(
+                        "Invalid sample dimension for input {0}".format(self.name))
+                values.extend(sample)
+
+        lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+        values = np.array(values, dtype=np.float64)
+        byte_sizes = lengths * self.sample_dim * self.float_type().itemsize
+        return (get_offsets(lengths), values), byte_sizes
+
+    def get_data(self):
+        parts = []
+        sample_bytes = self.sample_dim * self.float_type().itemsize
+        for ((offsets, values), begin, end) in self.sequences:
+            lengths = np.diff(offsets[begin:end + 1]).tolist()
+            start = offsets[begin] * self.sample_dim
+            data = memoryview(values[start:offsets[end] * self.sample_dim].astype(self.float_type()).tobytes())
+            position = 0
+            for length in lengths:
+                parts.append(struct.pack('<I', length))
+                parts.append(data[position:position + length * sample_bytes])
+                position += length * sample_bytes
+        return b''.join(parts)
 
 
 # Specialization for sparse inputs
 class SparseConverter(Converter):
 
-    def add_sample(self, sample):
-        pairs = list(map(lambda x: (int(x[0]),float(x[1])),
-            [pair.split(':', 1) for pair in sample]))
+    def parse(self, sequences):
+        pairs = []
+        for sequence in sequences:
+            for sample in sequence:
+                pairs.extend(sample)
+        pairs = [pair.split(':', 1) for pair in pairs]
+        indices = np.array([pair[0] for pair in pairs], dtype=np.int64)
+        values = np.array([pair[1] for pair in pairs], dtype=np.float64)
+
+        invalid = np.flatnonzero(indices >= self.sample_dim)
+        if len(invalid) > 0:
+            raise ValueError("Invalid sample dimension for input {0}. Max {1}, given {2}"
+                    .format(self.name, self.sample_dim, indices[invalid[0]]))
 
-        for pair in pairs:
-            index = pair[0]
-            if (index >= self.sample_dim):
-                raise ValueError("Invalid sample dimension for input {0}. Max {1}, given {2}"
-                        .format(self.name, self.sample_dim, index))
+        invalid = np.flatnonzero(indices < 0)
+        if len(invalid) > 0:
+            raise ValueError("Invalid sparse index for input {0}. Expected a non-negative index, given {1}"
+                    .format(self.name, indices[invalid[0]]))
 
-        byte_size = len(list(pairs)) * (8 if self.is_float() else 12) + 4
+        lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+        sizes = np.array([len(sample) for sequence in sequences for sample in sequence], dtype=np.int64)
+        sample_offsets = get_offsets(lengths)
+        nnz_offsets = get_offsets(sizes)[sample_offsets]
 
-        if(len(self.sequences) == 0):
-            self.sequences.append([])
-            byte_size += 8;
+        # sort the entries of each sample by index (lexsort is stable)
+        order = np.lexsort((indices, np.repeat(np.arange(len(sizes)), sizes)))
 
-        self.sequences[-1].append(pairs)
+        byte_sizes = np.diff(nnz_offsets) * (8 if self.is_float() else 12) + 4 * lengths
 
-        return byte_size
+        return (sample_offsets, nnz_offsets, sizes, indices[order], values[order]), byte_sizes
 
     def get_matrix_type(self):
         return MatrixEncodingType.SPARSE;
 
-    def write_data(self, output):
-        format = 'f' if self.is_float() else 'd'
-        for sequence in self.sequences:
-            # write out each sequence in sparse format
-            values = []
-            indices = []
-            sizes = []
-            for sample in sequence:
-                sizes.append(len(sample))
-                sample.sort(key=lambda x: x[0])
-                for (index, value) in sample:
-                    indices.append(index)
-                    values.append(value)
-
-            output.write(struct.pack('<I', len(sequence))) #number of samples in this sequence
-            # nnz and indices have to be written out as signed ints, since
-            # this is the index type of the CNTK sparse matrix
-            output.write(struct.pack('<i', len(values))) #total nnz count for this sequence
-            self.write_floats(output, values)
-            self.write_signed_ints(output, indices)
-            self.write_signed_ints(output, sizes)
-
-# Process the entire sequence
-def process_sequence(data, converters, chunk):
-    byte_size = 0;
-    for converter in converters.values():
-        converter.start_sequence()
-    for line in data:
-        for input_stream in line.split("|")[1:]:
-            split = input_stream.split(None, 1)
-            if (len(split) < 2):
-                continue
-            (alias, values) = split
-            # We need to ignore comments
-            if(len(alias) > 0 and alias[0] != '#'):
-                byte_size += converters[alias].add_sample(values.split())
-    sequence_length_samples = max([len(x.sequences[-1]) for x in converters.values()])
-    chunk.add_sequence(sequence_length_samples)
-    return byte_size
+    def get_data(self):
+        parts = []
+        value_bytes = self.float_type().itemsize
+        for ((sample_offsets, nnz_offsets, sizes, indices, values), begin, end) in self.sequences:
+            lengths = np.diff(sample_offsets[begin:end + 1]).tolist()
+            nnzs = np.diff(nnz_offsets[begin:end + 1]).tolist()
+            samples = slice(sample_offsets[begin], sample_offsets[end])
+            entries = slice(nnz_offsets[begin], nnz_offsets[end])
+            values_data = memoryview(values[entries].astype(self.float_type()).tobytes())
+            indices_data = memoryview(indices[entries].astype('<i4').tobytes())
+            sizes_data = memoryview(sizes[samples].astype('<i4').tobytes())
+            sample_position = 0
+            nnz_position = 0
+            for length, nnz in zip(lengths, nnzs):
+                parts.append(struct.pack('<I', length)) #number of samples in this sequence
+                # nnz and indices have to be written out as signed ints, since
+                # this is the index type of the CNTK sparse matrix
+                parts.append(struct.pack('<i', nnz)) #total nnz count for this sequence
+                parts.append(values_data[nnz_position * value_bytes:(nnz_position + nnz) * value_bytes])
+                parts.append(indices_data[nnz_position * 4:(nnz_position + nnz) * 4])
+                parts.append(sizes_data[sample_position * 4:(sample_position + length) * 4])
+                sample_position += length
+                nnz_position += nnz
+        return b''.join(parts)
+
+# Specialization for sparse inputs with variable-length encoded indices
+class CompressedSparseConverter(SparseConverter):
+    implicit_ones = False
+
+    def get_matrix_type(self):
+        return MatrixEncodingType.COMPRESSED_SPARSE;
+
+    def parse(self, sequences):
+        (data, _) = super(CompressedSparseConverter, self).parse(sequences)
+        (sample_offsets, nnz_offsets, _, _, _) = data
+        # estimate about two bytes per index and one byte per sample size
+        value_bytes = 0 if self.implicit_ones else self.float_type().itemsize
+        byte_sizes = np.diff(nnz_offsets) * (value_bytes + 2) + np.diff(sample_offsets)
+        return data, byte_sizes
+
+    def get_data(self):
+        parts = []
+        value_bytes = self.float_type().itemsize
+        for ((sample_offsets, nnz_offsets, sizes, indices, values), begin, end) in self.sequences:
+            lengths = np.diff(sample_offsets[begin:end + 1]).tolist()
+            nnzs = np.diff(nnz_offsets[begin:end + 1]).tolist()
+            sample_sizes = sizes[sample_offsets[begin]:sample_offsets[end]]
+            entries = slice(nnz_offsets[begin], nnz_offsets[end])
+
+            # the first index of a sample is stored as is, the others as the difference to the previous one
+            sample_indices = indices[entries]
+            deltas = sample_indices.copy()
+            deltas[1:] -= sample_indices[:-1]
+            starts = get_offsets(sample_sizes)[:-1][sample_sizes > 0]
+            deltas[starts] = sample_indices[starts]
+
+            (sizes_data, sizes_offsets) = encode_varints(sample_sizes)
+            (indices_data, indices_offsets) = encode_varints(deltas)
+            sizes_data = memoryview(sizes_data.tobytes())
+            indices_data = memoryview(indices_data.tobytes())
+            sizes_offsets = sizes_offsets.tolist()
+            indices_offsets = indices_offsets.tolist()
+            values_data = memoryview(values[entries].astype(self.float_type()).tobytes())
+
+            sample_position = 0
+            nnz_position = 0
+            for length, nnz in zip(lengths, nnzs):
+                parts.append(struct.pack('<I', length)) #number of samples in this sequence
+                parts.append(struct.pack('<i', nnz)) #total nnz count for this sequence
+                if not self.implicit_ones:
+                    parts.append(values_data[nnz_position * value_bytes:(nnz_position + nnz) * value_bytes])
+                parts.append(sizes_data[sizes_offsets[sample_position]:sizes_offsets[sample_position + length]])
+                parts.append(indices_data[indices_offsets[nnz_position]:indices_offsets[nnz_position + nnz]])
+                sample_position += length
+                nnz_position += nnz
+        return b''.join(parts)
+
+# Specialization for sparse inputs whose values are all 1 (e.g., one-hot or bag-of-words inputs)
+class OneHotConverter(CompressedSparseConverter):
+    implicit_ones = True
+
+    def get_matrix_type(self):
+        return MatrixEncodingType.ONE_HOT;
+
+    def parse(self, sequences):
+        (data, byte_sizes) = super(OneHotConverter, self).parse(sequences)
+        values = data[4]
+        invalid = np.flatnonzero(values != 1)
+        if len(invalid) > 0:
+            raise ValueError("Invalid value for one-hot input {0}. Expected 1, given {1}"
+                    .format(self.name, values[invalid[0]]))
+        return data, byte_sizes
+
+# Parse a list of sequences, returns the estimated size in bytes and the length in samples
+# of each sequence, and the parsed data for each converter
+def parse_sequences(sequences, converters):
+    samples = OrderedDict((alias, []) for alias in converters)
+    for data in sequences:
+        for sequence_samples in samples.values():
+            sequence_samples.append([])
+        for line in data:
+            for input_stream in line.split("|")[1:]:
+                split = input_stream.split(None, 1)
+                if (len(split) < 2):
+                    continue
+                (alias, values) = split
+                # We need to ignore comments
+                if(len(alias) > 0 and alias[0] != '#'):
+                    samples[alias][-1].append(values.split())
+
+    byte_sizes = np.zeros(len(sequences), dtype=np.int64)
+    parsed = []
+    for alias, converter in converters.items():
+        (data, sizes) = converter.parse(samples[alias])
+        byte_sizes += sizes
+        parsed.append(data)
+    sequence_lengths = np.max([[len(x) for x in s] for s in samples.values()], axis=0)
+    return byte_sizes.tolist(), sequence_lengths.tolist(), parsed
+
+# Add a range of parsed sequences to the chunk
+def add_sequences(parsed_sequences, begin, end, converters, chunk):
+    (_, sequence_lengths, parsed) = parsed_sequences
+    for converter, data in zip(converters.values(), parsed):
+        converter.add_sequences(data, begin, end)
+    for sequence_length_samples in sequence_lengths[begin:end]:
+        chunk.add_sequence(sequence_length_samples)
+
+# Add a batch of parsed sequences, writing out chunks once their estimated size is reached,
+# returns the current chunk and the updated estimated size
+def add_batch(parsed_sequences, is_last_batch, output, converters, header, chunk, estimated_chunk_size, chunk_size):
+    begin = 0
+    byte_sizes = parsed_sequences[0]
+    # the last sequence always goes into the last chunk
+    num_candidates = len(byte_sizes) - 1 if is_last_batch else len(byte_sizes)
+    for i in range(num_candidates):
+        estimated_chunk_size += byte_sizes[i]
+        if(estimated_chunk_size >= chunk_size):
+            add_sequences(parsed_sequences, begin, i + 1, converters, chunk)
+            write_chunk(output, converters, chunk)
+            header.add_chunk(chunk)
+            chunk = Chunk()
+            begin = i + 1
+    add_sequences(parsed_sequences, begin, len(byte_sizes), converters, chunk)
+    return chunk, estimated_chunk_size
 
 # Output a binary chunk
 def write_chunk(binfile, converters, chunk):
     binfile.flush()
     chunk.offset = binfile.tell()
     # write out the number of samples for each sequence in the chunk
-    binfile.write(b''.join([struct.pack('<I', x) for x in chunk.sequences]))
+    parts = [np.array(chunk.sequences, dtype='<u4').tobytes()]
 
     for converter in converters.values():
-        converter.write_data(binfile)
+        parts.append(converter.get_data())
         converter.reset()
+    binfile.write(b''.join(parts))
     # TODO: add a hash of the chunk
 
+# Group the lines of the input into sequences
+def read_sequences(input_file):
+    sequence = []
+    seq_id = None
+    for line in input_file:
+        (prefix, _) = line.rstrip().split('|',1)
+        prefix = prefix.strip()
+        # if the sequence id is empty or not equal to the previous sequence id,
+        # we are at a new sequence.
+        if((not seq_id and not prefix) or (len(prefix) > 0 and seq_id != prefix)):
+            if(len(sequence) > 0):
+                yield sequence
+                sequence = []
+            seq_id = prefix
+
+        sequence.append(line)
+    if(len(sequence) > 0):
+        yield sequence
+
+def batches(iterable, batch_size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# Like Pool.imap, but reads ahead only a bounded number of jobs from the input,
+# so that the input does not have to fit into memory
+def bounded_imap(pool, function, jobs, max_pending):
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.apply_async(function, (job,)))
+        if len(pending) >= max_pending:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+_worker_converters = None
+
+def _init_worker(converters):
+    global _worker_converters
+    _worker_converters = converters
+
+def _parse_sequences(sequences):
+    return parse_sequences(sequences, _worker_converters)
+
 def get_converter(input_type, name, sample_dim, element_type):
     if(input_type.lower() == 'dense'):
         return DenseConverter(name, sample_dim, element_type)
     if(input_type.lower() == 'sparse'):
         return SparseConverter(name, sample_dim, element_type)
+    if(input_type.lower() == 'compressed_sparse'):
+        return CompressedSparseConverter(name, sample_dim, element_type)
+    if(input_type.lower() == 'one_hot'):
+        return OneHotConverter(name, sample_dim, element_type)
 
     raise ValueError('Invalid input format {0}'.format(input_type))
 
@@ -247,7 +454,7 @@ class Header:
 
         output_file.write(struct.pack('<q', header_offset))
 
-def process(input_name, output_name, streams, element_type, chunk_size=32<<20):
+def process(input_name, output_name, streams, element_type, chunk_size=32<<20, workers=1):
     converters = build_converters(streams, element_type)
 
     output = open(output_name, "wb")
@@ -260,29 +467,29 @@ def process(input_name, output_name, streams, element_type, chunk_size=32<<20):
     header = Header(converters)
     chunk = Chunk()
 
+    pool = None
     with open(input_name, "r") as input_file:
-        sequence = []
-        seq_id = None
-        estimated_chunk_size = 0
-        for line in input_file:
-            (prefix, _) = line.rstrip().split('|',1)
-            prefix = prefix.strip()
-            # if the sequence id is empty or not equal to the previous sequence id,
-            # we are at a new sequence.
-            if((not seq_id and not prefix) or (len(prefix) > 0 and seq_id != prefix)):
-                if(len(sequence) > 0):
-                    estimated_chunk_size += process_sequence(sequence, converters, chunk)
-                    sequence = []
-                    if(estimated_chunk_size >= chunk_size):
-                        write_chunk(output, converters, chunk)
-                        header.add_chunk(chunk)
-                        chunk = Chunk()
-                seq_id = prefix
-
-            sequence.append(line)
-        # we must parse the last line
-        if(len(sequence) > 0):
-            process_sequence(sequence, converters, chunk)
+        sequence_batches = batches(read_sequences(input_file), SEQUENCES_PER_JOB)
+        if workers > 1:
+            pool = multiprocessing.Pool(workers, _init_worker, (converters,))
+            parsed_batches = bounded_imap(pool, _parse_sequences, sequence_batches, 2 * workers)
+        else:
+            parsed_batches = (parse_sequences(batch, converters) for batch in sequence_batches)
+
+        try:
+            previous = None
+            estimated_chunk_size = 0
+            for parsed in parsed_batches:
+                if previous is not None:
+                    (chunk, estimated_chunk_size) = add_batch(previous, False,
+                        output, converters, header, chunk, estimated_chunk_size, chunk_size)
+                previous = parsed
+            if previous is not None:
+                (chunk, estimated_chunk_size) = add_batch(previous, True,
+                    output, converters, header, chunk, estimated_chunk_size, chunk_size)
+        finally:
+            if pool is not None:
+                pool.terminate()
 
         write_chunk(output, converters, chunk)
         header.add_chunk(chunk)
@@ -299,6 +506,8 @@ if __name__ == '__main__':
     parser.add_argument('--output', help='Name of the output file, stdout if not given', required=True)
     parser.add_argument('--precision', help='Floating point precision (double or float). Default is float',
         choices=["float", "double"], default="float", required=False)
+    parser.add_argument('--workers', type=int, help='Number of processes parsing the input. Default is 1',
+        default=1, required=False)
     args = parser.parse_args()
 
     with open(args.header) as header:
@@ -306,4 +515,4 @@ if __name__ == '__main__':
     
     element_type = ElementType.FLOAT if args.precision == 'float' else ElementType.DOUBLE
     
-    process(args.input, args.output, streams, element_type, int(args.chunk_size))
\ No newline at end of file
+    process(args.input, args.output, streams, element_type, int(args.chunk_size), args.workers)
\ No newline at end of file
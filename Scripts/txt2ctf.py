@@ -27,34 +27,102 @@
 
 import sys
 import argparse
+import os
 import re
+import pickle
+import multiprocessing
 
-def convert(dictionaryStreams, inputs, output, unk, annotated):
-    # create in memory dictionaries
-    dictionaries = [{ line.rstrip('\r\n').strip():index for index, line in enumerate(dic) } for dic in dictionaryStreams]
+# Number of lines converted and written at once when reading sequentially
+_LINES_PER_BLOCK = 10000
+# Size of the byte ranges an input file is split into for parallel conversion
+_BYTES_PER_CHUNK = 16 * 1024 * 1024
+# Suffix of the binary sidecar files caching parsed dictionaries
+_DICTIONARY_CACHE_SUFFIX = ".cache"
+
+def convert(dictionaryStreams, inputs, output, unk, annotated, workers=1):
+    # create in memory dictionaries (dictionaries that are already parsed are taken as is)
+    dictionaries = [dic if isinstance(dic, dict) else _parseDictionary(dic) for dic in dictionaryStreams]
 
     # convert inputs
     for input in inputs:
-        sequenceId = 0
-        for index, line in enumerate(input):
-            line = line.rstrip('\r\n')
-            columns = line.split("\t")
-            if len(columns) != len(dictionaries):
-                raise Exception("Number of dictionaries {0} does not correspond to the number of streams in line {1}:'{2}'"
-                    .format(len(dictionaries), index, line))
-            _convertSequence(dictionaries, columns, sequenceId, output, unk, annotated)
-            sequenceId += 1
-
-def _convertSequence(dictionaries, streams, sequenceId, output, unk, annotated):
+        if workers > 1 and _isRegularFile(input):
+            _convertFileInParallel(dictionaries, input.name, output, unk, annotated, workers)
+        else:
+            _convertStream(dictionaries, input, output, unk, annotated)
+
+def loadDictionaries(paths, useCache=True):
+    """Parses the dictionary files, reusing the binary sidecar cache of a file if it is up to date."""
+    return [_loadDictionary(path, useCache) for path in paths]
+
+def _parseDictionary(dic):
+    return { line.rstrip('\r\n').strip():index for index, line in enumerate(dic) }
+
+def _loadDictionary(path, useCache):
+    cachePath = path + _DICTIONARY_CACHE_SUFFIX
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime)
+    if useCache and os.path.isfile(cachePath):
+        try:
+            with open(cachePath, "rb") as cache:
+                cachedKey, dictionary = pickle.load(cache)
+            if cachedKey == key:
+                return dictionary
+        except Exception:
+            pass # unreadable or outdated format, parse again
+
+    with open(path, encoding="utf-8") as dic:
+        dictionary = _parseDictionary(dic)
+
+    if useCache:
+        try:
+            with open(cachePath, "wb") as cache:
+                pickle.dump((key, dictionary), cache, pickle.HIGHEST_PROTOCOL)
+        except (IOError, OSError):
+            pass # e.g. read-only directory, the cache is only an optimization
+    return dictionary
+
+def _isRegularFile(input):
+    try:
+        return os.path.isfile(input.name)
+    except (AttributeError, TypeError):
+        return False
+
+def _convertStream(dictionaries, input, output, unk, annotated):
+    sequenceId = 0
+    lines = []
+    for line in input:
+        lines.append(line)
+        if len(lines) == _LINES_PER_BLOCK:
+            output.write(_convertLines(dictionaries, lines, sequenceId, unk, annotated))
+            sequenceId += len(lines)
+            lines = []
+    if lines:
+        output.write(_convertLines(dictionaries, lines, sequenceId, unk, annotated))
+
+def _convertLines(dictionaries, lines, firstSequenceId, unk, annotated):
+    # converts a block of lines, each of which is one sequence, and returns the text to write
+    result = []
+    for index, line in enumerate(lines):
+        sequenceId = firstSequenceId + index
+        line = line.rstrip('\r\n')
+        columns = line.split("\t")
+        if len(columns) != len(dictionaries):
+            raise Exception("Number of dictionaries {0} does not correspond to the number of streams in line {1}:'{2}'"
+                .format(len(dictionaries), sequenceId, line))
+        _convertSequence(dictionaries, columns, sequenceId, result, unk, annotated)
+    return "".join(result)
+
+def _convertSequence(dictionaries, streams, sequenceId, result, unk, annotated):
     tokensPerStream = [[t for t in s.strip(' ').split(' ') if t != ""] for s in streams]
     maxLen = max(len(tokens) for tokens in tokensPerStream)
 
-    # writing to the output file
+    # appending the lines of the sequence to the result
+    prefix = str(sequenceId)
     for sampleIndex in range(maxLen):
-        output.write(str(sequenceId))
+        line = [prefix]
         for streamIndex in range(len(tokensPerStream)):
             if len(tokensPerStream[streamIndex]) <= sampleIndex:
-                output.write("\t")
+                line.append("\t")
                 continue
             token = tokensPerStream[streamIndex][sampleIndex]
             if unk is not None and token not in dictionaries[streamIndex]: # try unk symbol if specified
@@ -62,10 +130,58 @@ def _convertSequence(dictionaries, streams, sequenceId, output, unk, annotated):
             if token not in dictionaries[streamIndex]:
                 raise Exception("Token '{0}' cannot be found in the dictionary for stream {1}".format(token, streamIndex))
             value = dictionaries[streamIndex][token]
-            output.write("\t|S" + str(streamIndex) + " "+ str(value) + ":1")
+            line.append("\t|S%d %d:1" % (streamIndex, value))
             if annotated:
-                output.write(" |# " + re.sub(r'(\|(?!#))|(\|$)', r'|#', token))
-        output.write("\n")
+                line.append(" |# " + re.sub(r'(\|(?!#))|(\|$)', r'|#', token))
+        line.append("\n")
+        result.append("".join(line))
+
+def _splitIntoChunks(fileName, bytesPerChunk):
+    # splits the file into byte ranges ending at line boundaries,
+    # and counts the lines in each range to number the sequences consistently
+    chunks = []
+    with open(fileName, "rb") as f:
+        begin = 0
+        firstSequenceId = 0
+        while True:
+            data = f.read(bytesPerChunk)
+            if not data:
+                break
+            if not data.endswith(b"\n"):
+                data += f.readline() # complete the last line
+            end = begin + len(data)
+            chunks.append((begin, end, firstSequenceId))
+            firstSequenceId += data.count(b"\n")
+            begin = end
+    return chunks
+
+_workerArgs = None
+
+def _initWorker(dictionaries, unk, annotated):
+    global _workerArgs
+    _workerArgs = (dictionaries, unk, annotated)
+
+def _convertChunk(job):
+    fileName, begin, end, firstSequenceId = job
+    dictionaries, unk, annotated = _workerArgs
+    with open(fileName, "rb") as f:
+        f.seek(begin)
+        data = f.read(end - begin)
+    lines = data.decode("utf-8").split("\n")
+    if lines[-1] == "":
+        lines.pop() # the chunk ends with a line break
+    return _convertLines(dictionaries, lines, firstSequenceId, unk, annotated)
+
+def _convertFileInParallel(dictionaries, fileName, output, unk, annotated, workers, bytesPerChunk=_BYTES_PER_CHUNK):
+    jobs = [(fileName, begin, end, firstSequenceId)
+            for begin, end, firstSequenceId in _splitIntoChunks(fileName, bytesPerChunk)]
+    pool = multiprocessing.Pool(workers, _initWorker, (dictionaries, unk, annotated))
+    try:
+        # imap keeps the order of the chunks
+        for text in pool.imap(_convertChunk, jobs):
+            output.write(text)
+    finally:
+        pool.terminate()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Transforms text file given dictionaries into CNTK text format.")
@@ -76,6 +192,10 @@ if __name__ == "__main__":
     parser.add_argument('--output', help='Name of the output file, stdout if not given', default="", required=False)
     parser.add_argument('--input', help='Name of the inputs files, stdin if not given', default="", nargs="*", required=False)
     parser.add_argument('--unk', help='Name fallback symbol for tokens not in dictionary (same for all columns)', default=None, required=False)
+    parser.add_argument('--workers', help='Number of processes converting input files in parallel. Default is 1',
+        type=int, default=1, required=False)
+    parser.add_argument('--cache', help='Whether to cache parsed dictionaries in binary files next to them. Default is true',
+        choices=["True", "False"], default="True", required=False)
     args = parser.parse_args()
 
     # creating inputs
@@ -88,7 +208,7 @@ if __name__ == "__main__":
     if args.output != "":
         output = open(args.output, "w")
 
-    convert([open(d, encoding="utf-8") for d in args.map], inputs, output, args.unk, args.annotated == "True")
+    convert(loadDictionaries(args.map, args.cache == "True"), inputs, output, args.unk, args.annotated == "True", args.workers)
     output.flush()
     if (output != sys.stdout):
         output.close()
@@ -149,3 +269,40 @@ def test_nonExistingWord():
     with pytest.raises(Exception) as info:
         convert([dictionary1], [input], output, None, False)
     assert str(info.value) == "Token 'nonexistent' cannot be found in the dictionary for stream 0"
+
+def test_parallelConversionMatchesSequential(tmpdir):
+    dictionary = "\n".join("w%d" % i for i in range(50)) + "\n"
+    lines = ["\t".join(" ".join("w%d" % ((i * 7 + j) % 50) for j in range(i % 5)) for _ in range(2)) for i in range(200)]
+    inputFile = str(tmpdir.join("input.txt"))
+    with open(inputFile, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    expectedOutput = stringio()
+    convert([stringio(dictionary), stringio(dictionary)], [stringio("\n".join(lines) + "\n")], expectedOutput, None, False)
+
+    chunks = _splitIntoChunks(inputFile, 100)
+    assert len(chunks) > 1
+    output = stringio()
+    _initWorker([_parseDictionary(stringio(dictionary))] * 2, None, False)
+    for begin, end, firstSequenceId in chunks:
+        output.write(_convertChunk((inputFile, begin, end, firstSequenceId)))
+    assert expectedOutput.getvalue() == output.getvalue()
+
+    output = stringio()
+    with open(inputFile) as input:
+        convert([stringio(dictionary), stringio(dictionary)], [input], output, None, False, workers=2)
+    assert expectedOutput.getvalue() == output.getvalue()
+
+def test_dictionaryCache(tmpdir):
+    dictionaryFile = str(tmpdir.join("dict.txt"))
+    with open(dictionaryFile, "w") as f:
+        f.write("hello\nworld\n")
+
+    assert loadDictionaries([dictionaryFile]) == [{"hello": 0, "world": 1}]
+    assert os.path.isfile(dictionaryFile + _DICTIONARY_CACHE_SUFFIX)
+    # a stale cache is not used
+    with open(dictionaryFile, "w") as f:
+        f.write("hello\nmy\nworld\n")
+    os.utime(dictionaryFile, (0, 0))
+    assert loadDictionaries([dictionaryFile]) == [{"hello": 0, "my": 1, "world": 2}]
+    assert loadDictionaries([dictionaryFile]) == [{"hello": 0, "my": 1, "world": 2}]
@@ -1,8 +1,17 @@
 import argparse
+import itertools
+import sys
+import multiprocessing
+from collections import deque
+
+# Number of input lines converted and written at once
+LINES_PER_BLOCK = 10000
 
 def convert(file_in, file_out, features_start, features_dim, 
-  labels_start, labels_dim, num_labels, label_type='Category', mapping_file=None):
+  labels_start, labels_dim, num_labels, label_type='Category', mapping_file=None,
+  sparse_labels=False, workers=1):
   label_map = {}
+  label_strings = None
   if label_type == "Category":
       if mapping_file is not None:
           with open(mapping_file, 'r') as f:
@@ -13,10 +22,35 @@ def convert(file_in, file_out, features_start, features_dim,
       else:
           label_map = {str(x) : x for x in range(num_labels)}
 
-  input_file = open(file_in, 'r')
-  output_file = open(file_out, 'w')
+      # the text of each label is computed once, either as a dense or a sparse one-hot vector
+      label_strings = {}
+      for label, index in label_map.items():
+          if sparse_labels:
+              label_strings[label] = "{}:1".format(index)
+          else:
+              one_hot = ['0'] * num_labels
+              one_hot[index] = '1'
+              label_strings[label] = " ".join(one_hot)
+
+  params = (features_start, features_dim, labels_start, labels_dim, label_type, label_strings)
+
+  with open(file_in, 'r') as input_file, open(file_out, 'w') as output_file:
+      blocks = iter(lambda: list(itertools.islice(input_file, LINES_PER_BLOCK)), [])
+      if workers > 1:
+          pool = multiprocessing.Pool(workers, _init_worker, (params,))
+          try:
+              for text in _bounded_imap(pool, _convert_block_in_worker, blocks, 2 * workers):
+                  output_file.write(text)
+          finally:
+              pool.terminate()
+      else:
+          for block in blocks:
+              output_file.write(_convert_block(block, params))
 
-  for line in input_file.readlines():
+def _convert_block(lines, params):
+  (features_start, features_dim, labels_start, labels_dim, label_type, label_strings) = params
+  result = []
+  for line in lines:
       values = line.split()
 
       if label_type != 'None':
@@ -29,31 +63,45 @@ def convert(file_in, file_out, features_start, features_dim,
                   ("Too few input columns ({} out of expected {}) ")
                   .format(len(values), max_length))
 
-          labels = values[labels_start:labels_start+labels_dim]
-
           if label_type == 'Category':
-              one_hot = ['0'] * num_labels
               # there's only one label
-              label = labels[0]
-              if label not in label_map:
+              label = values[labels_start]
+              if label not in label_strings:
                   raise RuntimeError(("Illegal label value: '{}'").format(label))
-              one_hot[label_map[label]] = '1'
-              labels = one_hot
+              labels = label_strings[label]
+          else:
+              labels = " ".join(values[labels_start:labels_start+labels_dim])
 
-          output_file.write("|labels " + " ".join(labels))
-          output_file.write("\t")
+          result.append("|labels " + labels + "\t")
 
       elif len(values) < features_start+features_dim:
           raise RuntimeError(
               ("Too few input columns ({} out of expected {}) ")
               .format(len(values), features_start+features_dim))
 
-      output_file.write(
-          "|features " + " ".join(values[features_start:features_start+features_dim]))
-      output_file.write("\n")
+      result.append(
+          "|features " + " ".join(values[features_start:features_start+features_dim]) + "\n")
+  return "".join(result)
+
+# Like Pool.imap, but reads ahead only a bounded number of blocks from the input,
+# so that memory use does not grow with the size of the input
+def _bounded_imap(pool, function, jobs, max_pending):
+  pending = deque()
+  for job in jobs:
+      pending.append(pool.apply_async(function, (job,)))
+      if len(pending) >= max_pending:
+          yield pending.popleft().get()
+  while pending:
+      yield pending.popleft().get()
+
+_worker_params = None
+
+def _init_worker(params):
+  global _worker_params
+  _worker_params = params
 
-  input_file.close()
-  output_file.close()
+def _convert_block_in_worker(lines):
+  return _convert_block(lines, _worker_params)
 
 if __name__ == "__main__":
   parser = argparse.ArgumentParser(
@@ -103,6 +151,11 @@ if __name__ == "__main__":
                             "label value is interpreted as a numerical "
                             "identifier)"))
   parser.add_argument("-out", "--output_file", help="output file path")
+  parser.add_argument("--sparse_labels", action="store_true",
+                      help=("write categorical labels as sparse one-hot vectors "
+                            "('index:1'), the labels stream must then be read as sparse"))
+  parser.add_argument("--workers", type=int, default=1,
+                      help="number of processes converting the input (default is 1)")
 
   args = parser.parse_args()
 
@@ -143,4 +196,42 @@ if __name__ == "__main__":
          " to CNTK text format\n\t '{}'".format(file_in, file_out))
 
   convert(file_in, file_out, args.features_start, args.features_dim, 
-    args.labels_start, args.labels_dim, args.num_labels, args.label_type, args.mapping_file)
\ No newline at end of file
+    args.labels_start, args.labels_dim, args.num_labels, args.label_type, args.mapping_file,
+    args.sparse_labels, args.workers)
+
+#####################################################################################################
+# Tests
+#####################################################################################################
+
+def test_categorical_labels(tmpdir):
+  file_in = str(tmpdir.join("input.txt"))
+  file_out = str(tmpdir.join("output.txt"))
+  with open(file_in, "w") as f:
+      f.write("1 0.5 0.25\n0 1 2\n2 3 4\n")
+
+  convert(file_in, file_out, 1, 2, 0, 1, 3)
+  with open(file_out) as f:
+      assert f.read() == ("|labels 0 1 0\t|features 0.5 0.25\n"
+                          "|labels 1 0 0\t|features 1 2\n"
+                          "|labels 0 0 1\t|features 3 4\n")
+
+  convert(file_in, file_out, 1, 2, 0, 1, 3, sparse_labels=True)
+  with open(file_out) as f:
+      assert f.read() == ("|labels 1:1\t|features 0.5 0.25\n"
+                          "|labels 0:1\t|features 1 2\n"
+                          "|labels 2:1\t|features 3 4\n")
+
+def test_parallel_conversion_keeps_order(tmpdir, monkeypatch):
+  file_in = str(tmpdir.join("input.txt"))
+  with open(file_in, "w") as f:
+      for i in range(1000):
+          f.write("{} {} {}\n".format(i % 10, i, -i))
+
+  expected = str(tmpdir.join("expected.txt"))
+  convert(file_in, expected, 1, 2, 0, 1, 10)
+
+  monkeypatch.setattr(sys.modules[__name__], "LINES_PER_BLOCK", 7)
+  actual = str(tmpdir.join("actual.txt"))
+  convert(file_in, actual, 1, 2, 0, 1, 10, workers=3)
+  with open(expected) as e, open(actual) as a:
+      assert e.read() == a.read()
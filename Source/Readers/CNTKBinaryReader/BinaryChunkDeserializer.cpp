@@ -20,7 +20,8 @@ enum class MatrixEncodingType : unsigned char
 {
     dense = 0,
     sparse_csc = 1,
-    // TODO: compressed_sparse_csc = 2, // indices are encoded as var-ints
+    compressed_sparse_csc = 2, // indices are encoded as var-ints
+    one_hot_csc = 3, // indices are encoded as var-ints, all values are one and not stored
 };
 
 
@@ -102,6 +103,10 @@ void BinaryChunkDeserializer::Initialize(const std::map<std::wstring, std::wstri
             m_deserializers[i] = make_shared<DenseBinaryDataDeserializer>(m_file, precision);
         else if (type == MatrixEncodingType::sparse_csc)
             m_deserializers[i] = make_shared<SparseBinaryDataDeserializer>(m_file, precision);
+        else if (type == MatrixEncodingType::compressed_sparse_csc)
+            m_deserializers[i] = make_shared<CompressedSparseBinaryDataDeserializer>(m_file, precision, false);
+        else if (type == MatrixEncodingType::one_hot_csc)
+            m_deserializers[i] = make_shared<CompressedSparseBinaryDataDeserializer>(m_file, precision, true);
         else
             RuntimeError("Unknown encoding type %u requested.", (unsigned int)type);
 
@@ -193,7 +198,8 @@ ChunkPtr BinaryChunkDeserializer::GetChunk(ChunkIdType chunkId)
     // Read the chunk into memory
     unique_ptr<byte[]> buffer = ReadChunk(chunkId);
 
-    return make_shared<BinaryDataChunk>(chunkId, m_chunkTable->GetNumSequences(chunkId), std::move(buffer), m_deserializers);
+    return make_shared<BinaryDataChunk>(chunkId, m_chunkTable->GetNumSequences(chunkId), std::move(buffer),
+        m_chunkTable->GetChunkSize(chunkId), m_deserializers);
 }
 
 void BinaryChunkDeserializer::SetTraceLevel(unsigned int traceLevel)
@@ -18,10 +18,12 @@ public:
     explicit BinaryDataChunk(ChunkIdType chunkId,
         size_t numSequences, 
         unique_ptr<byte[]> buffer, 
+        size_t bufferSize,
         std::vector<BinaryDataDeserializerPtr> deserializer)
         : m_chunkId(chunkId),
         m_numSequences(numSequences), 
         m_buffer(std::move(buffer)), 
+        m_bufferSize(bufferSize),
         m_deserializers(deserializer)
     { }
 
@@ -80,7 +82,7 @@ protected:
         size_t bytesProcessed = 0;
         // Now call all of the deserializers on the chunk, in order
         for (size_t i = 0; i < m_deserializers.size(); i++)
-            bytesProcessed += m_deserializers[i]->GetSequenceDataForChunk(m_numSequences, m_buffer.get() + bytesProcessed, m_data[i]);
+            bytesProcessed += m_deserializers[i]->GetSequenceDataForChunk(m_numSequences, m_buffer.get() + bytesProcessed, m_bufferSize - bytesProcessed, m_data[i]);
     }
 
     // chunk id (copied from the descriptor)
@@ -93,6 +95,9 @@ protected:
     // This is the actual chunk read from disk. We will call back to the deserializer for it to be deserialized
     unique_ptr<byte[]> m_buffer;
 
+    // Size of the chunk in bytes
+    size_t m_bufferSize;
+
     // This is the deserializer who knows how to interpret the m_data chunk that we read in
     std::vector<BinaryDataDeserializerPtr> m_deserializers;
     
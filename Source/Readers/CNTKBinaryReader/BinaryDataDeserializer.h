@@ -35,7 +35,9 @@ public:
         m_precision = precision;
     }
 
-    virtual size_t GetSequenceDataForChunk(size_t numSequences, void* data, std::vector<SequenceDataPtr>& result) = 0;
+    // Parses the data of this stream for numSequences sequences, from a buffer of the given size in bytes.
+    // Returns the number of bytes consumed.
+    virtual size_t GetSequenceDataForChunk(size_t numSequences, void* data, size_t size, std::vector<SequenceDataPtr>& result) = 0;
 
     virtual StorageFormat GetStorageFormat() = 0;
 
@@ -152,7 +154,7 @@ public:
 
     virtual  StorageFormat GetStorageFormat() override { return StorageFormat::Dense; }
 
-    size_t GetSequenceDataForChunk(size_t numSequences, void* data, std::vector<SequenceDataPtr>& result)
+    size_t GetSequenceDataForChunk(size_t numSequences, void* data, size_t /*size*/, std::vector<SequenceDataPtr>& result)
     {
         size_t valueSize = SizeOfDataType();
         result.resize(numSequences);
@@ -194,7 +196,7 @@ public:
     //   ElemType[nnz]: the values for the sparse sequences
     //   int32_t[nnz]: the row offsets for the sparse sequences
     //   int32_t[numSamples]: sizes (nnz counts) for each sample in the sequence
-    size_t GetSequenceDataForChunk(size_t numSequences, void* data, std::vector<SequenceDataPtr>& result)
+    size_t GetSequenceDataForChunk(size_t numSequences, void* data, size_t /*size*/, std::vector<SequenceDataPtr>& result) override
     {
         size_t offset = 0;
         result.resize(numSequences);
@@ -250,5 +252,145 @@ public:
     }
 };
 
+// Sparse data with variable-length encoded indices, optionally with implicit values of one.
+// The format of data is:
+// sequence[numSequences], where each sequence consists of:
+//   uint32_t: numSamples
+//   uint32_t: nnz for the sequence
+//   ElemType[nnz]: the values for the sparse sequences (only if the values are not implicitly one)
+//   varint[numSamples]: sizes (nnz counts) for each sample in the sequence
+//   varint[nnz]: the row offsets for the sparse sequences, the first one of each sample as is,
+//                the following ones as the difference to the previous row offset in the sample.
+// A varint stores 7 bits per byte, least significant group first, the high bit of a byte
+// is set if more bytes follow.
+class CompressedSparseBinaryDataDeserializer : public SparseBinaryDataDeserializer
+{
+public:
+    CompressedSparseBinaryDataDeserializer(FileWrapper& file, DataType precision, bool implicitOnes)
+        : SparseBinaryDataDeserializer(file, precision), m_implicitOnes(implicitOnes)
+    {
+    }
+
+    size_t GetSequenceDataForChunk(size_t numSequences, void* data, size_t size, std::vector<SequenceDataPtr>& result) override
+    {
+        size_t offset = 0;
+        result.resize(numSequences);
+        for (size_t i = 0; i < numSequences; i++)
+        {
+            shared_ptr<DecodedSparseInputStreamBuffer> sequenceDataPtr = make_shared<DecodedSparseInputStreamBuffer>();
+            offset += GetSequenceData((char*)data + offset, size - offset, sequenceDataPtr);
+            sequenceDataPtr->m_sampleShape = GetSampleShape();
+            sequenceDataPtr->m_elementType = m_precision;
+            result[i] = sequenceDataPtr;
+        }
+
+        return offset;
+    }
+
+private:
+    // Sparse sequence owning its decoded values and indices, since they are not stored as is in the chunk.
+    struct DecodedSparseInputStreamBuffer : SparseInputStreamBuffer
+    {
+        std::vector<char> m_values;
+        std::vector<SparseIndexType> m_decodedIndices;
+    };
+
+    static void CheckAvailable(size_t offset, size_t count, size_t size)
+    {
+        if (offset > size || count > size - offset)
+            RuntimeError("Unexpected end of chunk data.");
+    }
+
+    static uint32_t ReadVarint(const unsigned char* data, size_t& offset, size_t size)
+    {
+        uint32_t value = 0;
+        for (int shift = 0; shift < 35; shift += 7)
+        {
+            CheckAvailable(offset, 1, size);
+            unsigned char byte = data[offset++];
+            // The fifth byte holds the top 4 bits of a 32-bit value only.
+            if (shift == 28 && (byte & 0x70) != 0)
+                RuntimeError("Variable-length encoded integer exceeds 32 bits.");
+            value |= (uint32_t)(byte & 0x7F) << shift;
+            if ((byte & 0x80) == 0)
+                return value;
+        }
+
+        RuntimeError("Invalid variable-length encoded integer.");
+    }
+
+    size_t GetSequenceData(void* data, size_t size, shared_ptr<DecodedSparseInputStreamBuffer>& sequence)
+    {
+        const unsigned char* buffer = (const unsigned char*)data;
+        size_t valueSize = SizeOfDataType();
+        size_t offset = 0;
+
+        CheckAvailable(offset, 2 * sizeof(uint32_t), size);
+
+        // The very first value in the buffer is the number of samples in this sequence.
+        memcpy(&sequence->m_numberOfSamples, buffer + offset, sizeof(uint32_t));
+        offset += sizeof(uint32_t);
+
+        // Next is the total number of elements in all of the samples.
+        uint32_t nnz;
+        memcpy(&nnz, buffer + offset, sizeof(uint32_t));
+        if (IndexType(nnz) < 0)
+        {
+            RuntimeError("NNZ count is too large for an IndexType value.");
+        }
+        sequence->m_totalNnzCount = nnz;
+        offset += sizeof(uint32_t);
+
+        // The values, which are not aligned in the chunk, so they are copied.
+        sequence->m_values.resize(valueSize * nnz);
+        if (m_implicitOnes)
+        {
+            if (m_precision == DataType::Float)
+                std::fill_n((float*)sequence->m_values.data(), nnz, 1.0f);
+            else
+                std::fill_n((double*)sequence->m_values.data(), nnz, 1.0);
+        }
+        else
+        {
+            CheckAvailable(offset, valueSize * nnz, size);
+            memcpy(sequence->m_values.data(), buffer + offset, valueSize * nnz);
+            offset += valueSize * nnz;
+        }
+        sequence->m_data = sequence->m_values.data();
+
+        sequence->m_nnzCounts.resize(sequence->m_numberOfSamples);
+        size_t totalNnzCount = 0;
+        for (uint32_t i = 0; i < sequence->m_numberOfSamples; i++)
+        {
+            sequence->m_nnzCounts[i] = ReadVarint(buffer, offset, size);
+            totalNnzCount += sequence->m_nnzCounts[i];
+        }
+
+        if (totalNnzCount != nnz)
+            RuntimeError("The sum of the sample sizes %u does not match the NNZ count %u.",
+                (unsigned int)totalNnzCount, (unsigned int)nnz);
+
+        // The row offsets are delta-encoded within each sample.
+        sequence->m_decodedIndices.resize(nnz);
+        size_t position = 0;
+        for (uint32_t i = 0; i < sequence->m_numberOfSamples; i++)
+        {
+            uint32_t index = 0;
+            for (SparseIndexType j = 0; j < sequence->m_nnzCounts[i]; j++)
+            {
+                index = (j == 0) ? ReadVarint(buffer, offset, size) : index + ReadVarint(buffer, offset, size);
+                if (index >= m_sampleDimension)
+                    RuntimeError("Row offset %u exceeds the sample dimension %u.", (unsigned int)index, (unsigned int)m_sampleDimension);
+                sequence->m_decodedIndices[position++] = (SparseIndexType)index;
+            }
+        }
+        sequence->m_indices = sequence->m_decodedIndices.data();
+
+        return offset;
+    }
+
+    bool m_implicitOnes;
+};
+
     
 }
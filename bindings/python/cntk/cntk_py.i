@@ -17,6 +17,8 @@
 
 %threadallow CNTK::Evaluator::TestMinibatch;
 
+%threadallow CNTK::Function::Forward;
+
 %threadallow CNTK::TrainingSession::Train;
 
 %include "stl.i"
@@ -1796,6 +1798,57 @@ extern "C" CNTKPYTHON_API bool CreateDeserializer(DataDeserializerPtr& deseriali
 
 %include "CNTKValueExtend.i"
 
+%extend CNTK::Value {
+    //
+    // Creates a Value from data that is already padded to the shape
+    // (sampleShape..., maxSequenceLength, numSequences). Only the mask is
+    // computed here, so that packed sequences can be turned into a Value
+    // without creating one NDArrayView per sequence.
+    //
+    static CNTK::ValuePtr CreateFromPadded(const CNTK::NDArrayViewPtr& data, const std::vector<size_t>& sequenceLengths,
+        const std::vector<bool>& sequenceStartFlags)
+    {
+        size_t numSequences = sequenceLengths.size();
+        if (numSequences == 0)
+            InvalidArgument("Value::CreateFromPadded: The number of sequences must be > 0");
+
+        if (!sequenceStartFlags.empty() && (sequenceStartFlags.size() != numSequences))
+            InvalidArgument("Value::CreateFromPadded: The number (%zu) of sequence start flags does not match the number (%zu) of sequences.",
+                sequenceStartFlags.size(), numSequences);
+
+        const NDShape& dataShape = data->Shape();
+        if (dataShape.Rank() < 2 || dataShape[dataShape.Rank() - 1] != numSequences)
+            InvalidArgument("Value::CreateFromPadded: The trailing axis of the data does not match the number (%zu) of sequences.", numSequences);
+
+        size_t maxSequenceLength = dataShape[dataShape.Rank() - 2];
+
+        bool needsMask = false;
+        for (size_t i = 0; i < numSequences; ++i)
+        {
+            if (sequenceLengths[i] < 1 || sequenceLengths[i] > maxSequenceLength)
+                InvalidArgument("Value::CreateFromPadded: Sequence %zu has length %zu, which is not in the range [1, %zu].",
+                    i, sequenceLengths[i], maxSequenceLength);
+
+            needsMask = needsMask || (sequenceLengths[i] != maxSequenceLength) || (!sequenceStartFlags.empty() && !sequenceStartFlags[i]);
+        }
+
+        NDMaskPtr mask;
+        if (needsMask)
+        {
+            mask = MakeSharedObject<NDMask>(NDShape({ maxSequenceLength, numSequences }), DeviceDescriptor::CPUDevice());
+            for (size_t i = 0; i < numSequences; ++i)
+            {
+                if (sequenceStartFlags.empty() || sequenceStartFlags[i])
+                    mask->MarkSequenceBegin({ 0, i });
+                if (sequenceLengths[i] < maxSequenceLength)
+                    mask->InvalidateSection({ sequenceLengths[i], i }, { NDShape::InferredDimension, 1 });
+            }
+        }
+
+        return MakeSharedObject<Value>(data, mask);
+    }
+}
+
 //
 // NDArrayView
 //
@@ -2055,6 +2108,154 @@ extern "C" CNTKPYTHON_API bool CreateDeserializer(DataDeserializerPtr& deseriali
         PyObject *NDArrayViewToNumPy(const CNTK::NDArrayView*);
         return NDArrayViewToNumPy(self);
     }
+
+    PyObject* to_ndarray_view(PyObject* owner) {
+        //
+        // Returns a read-only NumPy array that aliases the storage of this
+        // dense CPU NDArrayView instead of copying it. 'owner' is kept alive
+        // as the array's base object so that the storage is not released
+        // while the array is in use.
+        //
+        if ((*self).GetStorageFormat() != StorageFormat::Dense)
+            throw std::invalid_argument("only dense NDArrayViews can be viewed as NumPy arrays");
+
+        if ((*self).Device() != DeviceDescriptor::CPUDevice())
+            throw std::invalid_argument("only NDArrayViews on the CPU can be viewed as NumPy arrays");
+
+        // CNTK uses column major, thus we reverse the shape
+        std::vector<size_t> dimensions_cntk = (*self).Shape().Dimensions();
+        std::vector<npy_intp> dimensions(dimensions_cntk.rbegin(), dimensions_cntk.rend());
+
+        CNTK::DataType cntk_type = (*self).GetDataType();
+
+        NPY_TYPES numpy_type;
+        void* buffer;
+
+        if (cntk_type == CNTK::DataType::Float)
+        {
+            numpy_type = NPY_FLOAT;
+            buffer = (void*)(*self).DataBuffer<float>();
+        }
+        else if (cntk_type == CNTK::DataType::Double)
+        {
+            numpy_type = NPY_DOUBLE;
+            buffer = (void*)(*self).DataBuffer<double>();
+        }
+        else if (cntk_type == CNTK::DataType::Float16)
+        {
+            numpy_type = NPY_HALF;
+            buffer = (void*)(*self).DataBuffer<float16>();
+        }
+        else if (cntk_type == CNTK::DataType::Int8)
+        {
+            numpy_type = NPY_INT8;
+            buffer = (void*)(*self).DataBuffer<int8_t>();
+        }
+        else if (cntk_type == CNTK::DataType::Int16)
+        {
+            numpy_type = NPY_INT16;
+            buffer = (void*)(*self).DataBuffer<int16_t>();
+        }
+        else
+        {
+            throw std::invalid_argument("unknown CNTK data type");
+        }
+
+        // No NPY_ARRAY_WRITEABLE: the view is read-only
+        PyObject* ndarray = PyArray_New(&PyArray_Type, static_cast<int>(dimensions.size()),
+            dimensions.empty() ? nullptr : &dimensions[0], numpy_type, nullptr, buffer, 0,
+            NPY_ARRAY_C_CONTIGUOUS | NPY_ARRAY_ALIGNED, nullptr);
+        if (ndarray == nullptr)
+            return nullptr;
+
+        Py_INCREF(owner);
+        if (PyArray_SetBaseObject((PyArrayObject*)ndarray, owner) < 0)
+        {
+            Py_DECREF(ndarray);
+            return nullptr;
+        }
+
+        return ndarray;
+    }
+
+    PyObject* to_csr_buffers() {
+        //
+        // Returns the tuple (data, indices, indptr) that can be fed directly
+        // into scipy.sparse.csr_matrix. CNTK stores sparse data column major
+        // in CSC format, which is the same memory layout as CSR on the
+        // reversed (row major) shape.
+        //
+        if (!(*self).IsSparse())
+            throw std::invalid_argument("to_csr_buffers() requires a sparse NDArrayView");
+
+        CNTK::DataType cntk_type = (*self).GetDataType();
+
+        // Always work on a compact CPU copy in CSC format so that the column
+        // starts begin at zero and the buffers are host memory.
+        NDArrayView cpuView(cntk_type, StorageFormat::SparseCSC, (*self).Shape(), DeviceDescriptor::CPUDevice());
+        cpuView.CopyFrom((*self));
+
+        NPY_TYPES numpy_type;
+        const void* values;
+        const CNTK::SparseIndexType* colStarts;
+        const CNTK::SparseIndexType* rowIndices;
+        size_t numNonZeroValues;
+
+        if (cntk_type == CNTK::DataType::Float)
+        {
+            numpy_type = NPY_FLOAT;
+            std::tie(values, colStarts, rowIndices, numNonZeroValues) = cpuView.SparseCSCDataBuffers<float>();
+        }
+        else if (cntk_type == CNTK::DataType::Double)
+        {
+            numpy_type = NPY_DOUBLE;
+            std::tie(values, colStarts, rowIndices, numNonZeroValues) = cpuView.SparseCSCDataBuffers<double>();
+        }
+        else if (cntk_type == CNTK::DataType::Float16)
+        {
+            numpy_type = NPY_HALF;
+            std::tie(values, colStarts, rowIndices, numNonZeroValues) = cpuView.SparseCSCDataBuffers<float16>();
+        }
+        else if (cntk_type == CNTK::DataType::Int8)
+        {
+            numpy_type = NPY_INT8;
+            std::tie(values, colStarts, rowIndices, numNonZeroValues) = cpuView.SparseCSCDataBuffers<int8_t>();
+        }
+        else if (cntk_type == CNTK::DataType::Int16)
+        {
+            numpy_type = NPY_INT16;
+            std::tie(values, colStarts, rowIndices, numNonZeroValues) = cpuView.SparseCSCDataBuffers<int16_t>();
+        }
+        else
+        {
+            throw std::invalid_argument("unknown CNTK data type");
+        }
+
+        std::vector<size_t> dimensions = (*self).Shape().Dimensions();
+        size_t num_cols = 1;
+        for (size_t i = 1; i < dimensions.size(); i++)
+            num_cols *= dimensions[i];
+
+        static_assert(sizeof(CNTK::SparseIndexType) == sizeof(npy_int32), "sparse index type must be 32 bit");
+
+        npy_intp data_shape[1] = { static_cast<npy_intp>(numNonZeroValues) };
+        npy_intp indptr_shape[1] = { static_cast<npy_intp>(num_cols + 1) };
+
+        PyObject* data = PyArray_SimpleNew(1, data_shape, numpy_type);
+        PyObject* indices = PyArray_SimpleNew(1, data_shape, NPY_INT32);
+        PyObject* indptr = PyArray_SimpleNew(1, indptr_shape, NPY_INT32);
+
+        memcpy(PyArray_DATA((PyArrayObject*)data), values, PyArray_ITEMSIZE((PyArrayObject*)data) * numNonZeroValues);
+        memcpy(PyArray_DATA((PyArrayObject*)indices), rowIndices, sizeof(CNTK::SparseIndexType) * numNonZeroValues);
+        memcpy(PyArray_DATA((PyArrayObject*)indptr), colStarts, sizeof(CNTK::SparseIndexType) * (num_cols + 1));
+
+        PyObject* result = PyTuple_New(3);
+        PyTuple_SET_ITEM(result, 0, data);
+        PyTuple_SET_ITEM(result, 1, indices);
+        PyTuple_SET_ITEM(result, 2, indptr);
+
+        return result;
+    }
 }
 
 // end of NDArrayView
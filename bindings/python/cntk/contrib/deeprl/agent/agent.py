@@ -5,6 +5,7 @@
 # ==============================================================================
 """Base class for defining an agent."""
 
+import copy
 from abc import ABCMeta, abstractmethod
 
 import numpy as np
@@ -79,6 +80,8 @@ class AgentBaseClass(object):
 
         self._preprocessor = None
         self._best_model = None
+        # Copies of _preprocessor, one per environment of start_batch().
+        self._env_preprocessors = None
 
     @abstractmethod
     def start(self, state):
@@ -120,6 +123,48 @@ class AgentBaseClass(object):
         """
         pass
 
+    def start_batch(self, states):
+        """
+        Start new episodes in a batch of environments.
+
+        Used together with step_batch() to collect experience from several
+        environments at once, e.g. from ParallelEnvironments. Actions for all
+        environments are chosen with one batched evaluation.
+
+        Args:
+            states (list or numpy.ndarray): one observation per environment.
+
+        Returns:
+            actions (numpy.ndarray): action choosen for every environment.
+            debug_info (dict): auxiliary diagnostic information.
+        """
+        raise NotImplementedError(
+            '{0} does not support batches of environments.'.format(
+                self.__class__.__name__))
+
+    def step_batch(self, rewards, next_states, dones):
+        """
+        Observe one transition in every environment and choose actions.
+
+        An environment whose episode ended is expected to be reset right away,
+        with next_state being the first observation of its new episode.
+
+        Args:
+            rewards (list or numpy.ndarray): amount of reward returned after
+                previous action, per environment.
+            next_states (list or numpy.ndarray): observation provided by every
+                environment.
+            dones (list or numpy.ndarray): whether the previous action ended
+                the episode, per environment.
+
+        Returns:
+            actions (numpy.ndarray): action choosen for every environment.
+            debug_info (dict): auxiliary diagnostic information.
+        """
+        raise NotImplementedError(
+            '{0} does not support batches of environments.'.format(
+                self.__class__.__name__))
+
     @abstractmethod
     def save(self, filename):
         """Save model to file."""
@@ -207,11 +252,36 @@ class AgentBaseClass(object):
         CNTK only supports float32 and float64. Performs appropriate
         type conversion as well.
         """
+        return self._encode_state(state, self._preprocessor)
+
+    def _preprocess_states(self, states, new_episodes):
+        """Preprocess one state per environment of start_batch().
+
+        Every environment has its own copy of the preprocessor, which is reset
+        where new_episodes is True.
+
+        Returns:
+            numpy.ndarray of the preprocessed states, stacked along the first
+            axis.
+        """
+        if self._env_preprocessors is None or \
+                len(self._env_preprocessors) != len(states):
+            self._env_preprocessors = [
+                copy.deepcopy(self._preprocessor) for _ in states]
+        encoded_states = []
+        for state, preprocessor, new_episode in zip(
+                states, self._env_preprocessors, new_episodes):
+            if preprocessor is not None and new_episode:
+                preprocessor.reset()
+            encoded_states.append(self._encode_state(state, preprocessor))
+        return np.stack(encoded_states)
+
+    def _encode_state(self, state, preprocessor):
         o = self._discretize_state_if_necessary(state)
         if self._discrete_observation_space:
             o = self._index_to_vector(o, self._num_states)
-        if self._preprocessor is not None:
-            o = self._preprocessor.preprocess(o)
+        if preprocessor is not None:
+            o = preprocessor.preprocess(o)
         # TODO: allow float64 dtype.
         if o.dtype.name != 'float32':
             o = o.astype(np.float32)
@@ -7,6 +7,7 @@
 
 import cntk as C
 import numpy as np
+from scipy.signal import lfilter
 
 import ast
 
@@ -49,6 +50,9 @@ class ActorCritic(AgentBaseClass):
         self._trajectory_states = []
         self._trajectory_actions = []
         self._trajectory_rewards = []
+        # Trajectories of the environments of start_batch(), as lists of
+        # states, actions and rewards.
+        self._env_trajectories = []
 
         # Training data for the policy and value networks. Note they share the
         # same input.
@@ -131,6 +135,76 @@ class ActorCritic(AgentBaseClass):
             self._process_accumulated_trajectory(False)
             self._update_networks()
 
+    def start_batch(self, states):
+        """
+        Start new episodes in a batch of environments.
+
+        Args:
+            states (list or numpy.ndarray): one observation per environment.
+
+        Returns:
+            actions (numpy.ndarray): action choosen for every environment.
+            debug_info (dict): auxiliary diagnostic information.
+        """
+        # Process unused trajectory data from previous episodes.
+        for trajectory in self._env_trajectories:
+            self._process_trajectory(*trajectory, keep_last=False)
+
+        encoded_states = self._preprocess_states(
+            states, np.ones(len(states), np.bool_))
+        actions, _ = self._choose_actions(encoded_states)
+        self._env_trajectories = [([o], [a], [])
+                                  for o, a in zip(encoded_states, actions)]
+
+        self.episode_count += len(states)
+
+        return actions, {}
+
+    def step_batch(self, rewards, next_states, dones):
+        """
+        Observe one transition in every environment and choose actions.
+
+        Args:
+            rewards (list or numpy.ndarray): amount of reward returned after
+                previous action, per environment.
+            next_states (list or numpy.ndarray): observation provided by every
+                environment, which is the first one of a new episode where
+                dones is True.
+            dones (list or numpy.ndarray): whether the previous action ended
+                the episode, per environment.
+
+        Returns:
+            actions (numpy.ndarray): action choosen for every environment.
+            debug_info (dict): auxiliary diagnostic information.
+        """
+        dones = np.asarray(dones, np.bool_)
+        encoded_states = self._preprocess_states(next_states, dones)
+
+        update = False
+        for trajectory, reward, o, done in zip(
+                self._env_trajectories, rewards, encoded_states, dones):
+            states, _, trajectory_rewards = trajectory
+            trajectory_rewards.append(reward)
+            if done:
+                self._process_trajectory(*trajectory, keep_last=False)
+                self.episode_count += 1
+            states.append(o)
+            self.step_count += 1
+            update = update or \
+                self.step_count % self._parameters.update_frequency == 0
+
+        # Update every self._parameters.update_frequency
+        if update:
+            for trajectory in self._env_trajectories:
+                if trajectory[2]:
+                    self._process_trajectory(*trajectory, keep_last=True)
+            self._update_networks()
+
+        actions, _ = self._choose_actions(encoded_states)
+        for trajectory, action in zip(self._env_trajectories, actions):
+            trajectory[1].append(action)
+        return actions, {}
+
     def set_as_best_model(self):
         """Copy current model to best model."""
         self._best_model = self._policy_network.clone('clone')
@@ -273,6 +347,31 @@ class ActorCritic(AgentBaseClass):
             C.ops.softmax(self._evaluate_model(self._policy_network, state)).eval()
         return np.random.choice(self._num_actions, p=action_probs), action_probs
 
+    def _choose_actions(self, states):
+        """
+        Choose actions for a batch of states with one policy evaluation.
+
+        Args:
+            states (numpy.ndarray): observations seen by agent, stacked along
+                the first axis.
+
+        Returns:
+            actions (numpy.ndarray): action choosen for every state.
+            debug_info (numpy.ndarray): probability vectors the actions are
+                sampled from.
+        """
+        logits = np.reshape(
+            self._policy_network.eval(
+                {self._policy_network.arguments[0]: states}),
+            (len(states), self._num_actions))
+        action_probs = np.exp(logits - np.max(logits, axis=1, keepdims=True))
+        action_probs /= np.sum(action_probs, axis=1, keepdims=True)
+        u = np.random.uniform(size=(len(states), 1))
+        actions = np.minimum(
+            np.sum(np.cumsum(action_probs, axis=1) < u, axis=1),
+            self._num_actions - 1)
+        return actions, action_probs
+
     def save(self, filename):
         """Save model to file."""
         self._best_model.save(filename)
@@ -285,6 +384,13 @@ class ActorCritic(AgentBaseClass):
         r"""Evaluate log of pi(\cdot|state) or v(state)."""
         return np.squeeze(model.eval({model.arguments[0]: [state]}))
 
+    def _evaluate_values(self, states):
+        """Evaluate v(state) for a list of states with one evaluation."""
+        return np.reshape(
+            self._value_network.eval(
+                {self._value_network.arguments[0]: np.array(states)}),
+            len(states)).astype(np.float64)
+
     def _process_accumulated_trajectory(self, keep_last):
         """Process accumulated trajectory to generate training data.
 
@@ -292,50 +398,69 @@ class ActorCritic(AgentBaseClass):
             keep_last (bool): last state without action and reward will be kept
                 if True.
         """
-        if not self._trajectory_states:
+        self._process_trajectory(
+            self._trajectory_states,
+            self._trajectory_actions,
+            self._trajectory_rewards,
+            keep_last)
+
+    def _process_trajectory(self, states, actions, rewards, keep_last):
+        """Generate training data from a trajectory, and clear it.
+
+        Args:
+            states, actions, rewards (list): the trajectory, modified in
+                place.
+            keep_last (bool): last state without action and reward will be kept
+                if True.
+        """
+        if not states:
             return
 
-        # If trajectory hasn't terminated, we have _trajectory_states
-        # and sometimes _trajectory_actions having one more item than
-        # _trajectory_rewards. Same length is expected if called from
-        # start() or end(), where the trajectory has terminiated.
-        if len(self._trajectory_states) == len(self._trajectory_rewards):
+        # Evaluate the value network once on the whole trajectory, including
+        # the last state to bootstrap from.
+        values = self._evaluate_values(states)
+
+        # If trajectory hasn't terminated, we have states and sometimes
+        # actions having one more item than rewards. Same length is expected
+        # if called from start() or end(), where the trajectory has
+        # terminiated.
+        if len(states) == len(rewards):
             bootstrap_r = 0
         else:
             # Bootstrap from last state
-            bootstrap_r = np.asscalar(self._evaluate_model(
-                self._value_network, self._trajectory_states[-1]))
-            last_state = self._trajectory_states.pop()
-            if len(self._trajectory_actions) != len(self._trajectory_rewards):
+            bootstrap_r = values[-1]
+            values = values[:-1]
+            last_state = states.pop()
+            if len(actions) != len(rewards):
                 # This will only happen when agent calls start() to begin
                 # a new episode without calling end() before to terminate the
                 # prevous episode. The last action thus can be discarded.
-                self._trajectory_actions.pop()
+                actions.pop()
 
-        if len(self._trajectory_states) != len(self._trajectory_rewards) or \
-           len(self._trajectory_actions) != len(self._trajectory_rewards):
+        if len(states) != len(rewards) or \
+           len(actions) != len(rewards):
             raise RuntimeError("Can't pair (state, action, reward). "
                                "state/action can only be one more step ahead "
                                "of rewrad in trajectory.")
 
-        for transition in zip(
-                self._trajectory_states,
-                self._trajectory_actions,
-                self._discount_rewards(bootstrap_r)):
-            self._input_buffer.append(transition[0])
-            self._value_network_output_buffer.append([transition[2]])
-            # TODO: consider using cntk.ops.one_hot instead of _index_to_vector
-            self._policy_network_output_buffer.append(
-                self._index_to_vector(transition[1], self._num_actions))
-            self._policy_network_weight_buffer.append([transition[2]
-                - self._evaluate_model(self._value_network, transition[0])])
+        discounted_rewards = self._discount_rewards(rewards, bootstrap_r)
+        one_hot_actions = np.zeros(
+            (len(actions), self._num_actions), np.float32)
+        one_hot_actions[
+            np.arange(len(actions)), np.asarray(actions, np.int64)] = 1
+        self._input_buffer.extend(states)
+        self._value_network_output_buffer.extend(
+            discounted_rewards[:, np.newaxis])
+        self._policy_network_output_buffer.extend(one_hot_actions)
+        self._policy_network_weight_buffer.extend(
+            (discounted_rewards - values)[:, np.newaxis])
 
         # Clear the trajectory history.
-        self._trajectory_states = []
-        self._trajectory_actions = []
-        self._trajectory_rewards = []
+        del states[:]
+        del actions[:]
+        del rewards[:]
         if keep_last:
-            self._trajectory_states.append(last_state)
+            states.append(last_state)
 
     def _update_networks(self):
         self._adjust_learning_rate()
@@ -362,10 +487,16 @@ class ActorCritic(AgentBaseClass):
         self._policy_network_output_buffer = []
         self._policy_network_weight_buffer = []
 
-    def _discount_rewards(self, bootstrap_r):
-        discounted_rewards = [0] * len(self._trajectory_rewards)
-        r = bootstrap_r
-        for t in reversed(range(len(self._trajectory_rewards))):
-            r = r * self._parameters.gamma + self._trajectory_rewards[t]
-            discounted_rewards[t] = r
-        return discounted_rewards
+    def _discount_rewards(self, rewards, bootstrap_r):
+        """Return r_t + gamma * r_{t+1} + ... + gamma^(T-t) * bootstrap_r.
+
+        Computed as a first-order linear filter over the reversed rewards,
+        starting from bootstrap_r.
+        """
+        if not rewards:
+            return np.zeros(0)
+        gamma = self._parameters.gamma
+        discounted_rewards, _ = lfilter(
+            [1], [1, -gamma], np.asarray(rewards, np.float64)[::-1],
+            zi=[gamma * bootstrap_r])
+        return discounted_rewards[::-1]
@@ -5,8 +5,6 @@
 # ==============================================================================
 """Deep Q-learning and its variants."""
 
-import math
-
 import cntk as C
 import numpy as np
 
@@ -16,7 +14,8 @@ from .agent import AgentBaseClass
 from .shared.cntk_utils import huber_loss
 from .shared.models import Models
 from .shared.qlearning_parameters import QLearningParameters
-from .shared.replay_memory import ReplayMemory
+from .shared.replay_memory import ArrayReplayMemory, FrameReplayMemory, \
+    ReplayMemory, _Transition
 
 
 class QLearning(AgentBaseClass):
@@ -120,9 +119,26 @@ class QLearning(AgentBaseClass):
         self._target_q = self._q.clone('clone')
 
         # Initialize replay memory.
-        self._replay_memory = ReplayMemory(
-            self._parameters.replay_memory_capacity,
-            self._parameters.use_prioritized_replay)
+        frame_history = self._preprocessor.frame_history() \
+            if self._preprocessor is not None else None
+        self._use_frame_replay = \
+            self._parameters.replay_frame_deduplication and \
+            frame_history is not None
+        if self._use_frame_replay:
+            self._replay_memory = self._create_frame_replay_memory(1)
+        elif self._parameters.replay_array_memory:
+            self._replay_memory = ArrayReplayMemory(
+                self._parameters.replay_memory_capacity,
+                shape_of_inputs,
+                np.float32,
+                self._parameters.use_prioritized_replay)
+        else:
+            self._replay_memory = ReplayMemory(
+                self._parameters.replay_memory_capacity,
+                self._parameters.use_prioritized_replay)
+        # Whether the replay memory samples minibatches of stacked arrays.
+        self._use_array_replay = self._use_frame_replay or \
+            self._parameters.replay_array_memory
 
         print('Parameterized Q-learning agent using neural networks '
               '"{0}" with {1} actions.\n'
@@ -210,6 +226,108 @@ class QLearning(AgentBaseClass):
         # Update Q every self._parameters.q_update_frequency
         self._update_q_periodically()
 
+    def _create_frame_replay_memory(self, num_streams):
+        """Create FrameReplayMemory with one stream per environment."""
+        history_len, frame_shape, frame_dtype = \
+            self._preprocessor.frame_history()
+        return FrameReplayMemory(
+            self._parameters.replay_memory_capacity,
+            history_len,
+            frame_shape,
+            frame_dtype,
+            self._parameters.use_prioritized_replay,
+            num_streams)
+
+    def start_batch(self, states):
+        """
+        Start new episodes in a batch of environments.
+
+        Args:
+            states (list or numpy.ndarray): one observation per environment.
+
+        Returns:
+            actions (numpy.ndarray): action choosen for every environment.
+            debug_info (dict): auxiliary diagnostic information.
+        """
+        if self._use_frame_replay and \
+                self._replay_memory.num_streams != len(states):
+            # Every environment needs its own stream to share frames.
+            if self._replay_memory.size() > 0:
+                raise ValueError(
+                    'Replay memory with frame deduplication holds transitions '
+                    'of {0} environments, but get {1}\n'.format(
+                        self._replay_memory.num_streams, len(states)))
+            self._replay_memory = \
+                self._create_frame_replay_memory(len(states))
+
+        self._adjust_exploration_rate()
+        self._last_states = self._preprocess_states(
+            states, np.ones(len(states), np.bool_))
+        self._last_actions, action_behaviors = \
+            self._choose_actions(self._last_states)
+        self.episode_count += len(states)
+        return self._last_actions, {
+            'action_behavior': action_behaviors,
+            'epsilon': self._epsilon}
+
+    def step_batch(self, rewards, next_states, dones):
+        """
+        Observe one transition in every environment and choose actions.
+
+        Priorities of all transitions are computed with one evaluation of Q
+        and target Q, and the transitions are then stored in replay memory.
+        Q is updated as often as if the transitions were observed one by one.
+
+        Args:
+            rewards (list or numpy.ndarray): amount of reward returned after
+                previous action, per environment.
+            next_states (list or numpy.ndarray): observation provided by every
+                environment, which is the first one of a new episode where
+                dones is True.
+            dones (list or numpy.ndarray): whether the previous action ended
+                the episode, per environment.
+
+        Returns:
+            actions (numpy.ndarray): action choosen for every environment.
+            debug_info (dict): auxiliary diagnostic information.
+        """
+        rewards = np.asarray(rewards, np.float64)
+        dones = np.asarray(dones, np.bool_)
+        next_encoded_states = self._preprocess_states(next_states, dones)
+
+        priorities = [None] * len(rewards)
+        if self._parameters.use_prioritized_replay:
+            _, td_errs = self._compute_td_errs(
+                self._last_states,
+                self._last_actions,
+                rewards,
+                next_encoded_states[~dones] if not np.all(dones) else None,
+                dones)
+            priorities = self._priorities_from_td_errs(td_errs).tolist()
+        for i in range(len(rewards)):
+            transition = (self._last_states[i],
+                          self._last_actions[i],
+                          rewards[i],
+                          None if dones[i] else next_encoded_states[i],
+                          priorities[i])
+            if self._use_frame_replay:
+                self._replay_memory.store(*transition, stream=i)
+            else:
+                self._replay_memory.store(*transition)
+        for _ in range(len(rewards)):
+            self.step_count += 1
+            # Update Q every self._parameters.q_update_frequency
+            self._update_q_periodically()
+        self.episode_count += int(np.count_nonzero(dones))
+
+        self._adjust_exploration_rate()
+        self._last_states = next_encoded_states
+        self._last_actions, action_behaviors = \
+            self._choose_actions(self._last_states)
+        return self._last_actions, {
+            'action_behavior': action_behaviors,
+            'epsilon': self._epsilon}
+
     def set_as_best_model(self):
         """Copy current model to best model."""
         self._best_model = self._q.clone('clone')
@@ -254,6 +372,31 @@ class QLearning(AgentBaseClass):
         else:
             return np.argmax(self._evaluate_q(self._q, state)), 'GREEDY'
 
+    def _choose_actions(self, states):
+        """
+        Epsilon greedy policy for a batch of states.
+
+        Q is evaluated once for all states that act greedily.
+
+        Args:
+            states (numpy.ndarray): observations seen by agent, stacked along
+                the first axis.
+
+        Returns:
+            actions (numpy.ndarray): action choosen for every state.
+            debug_info (list): auxiliary diagnostic information per state.
+        """
+        num_states = len(states)
+        actions = np.random.randint(self._num_actions, size=num_states)
+        if self.step_count < self._parameters.replay_start_size:
+            return actions, ['RANDOM'] * num_states
+
+        greedy = np.random.uniform(0, 1, num_states) >= self._epsilon
+        if np.any(greedy):
+            actions[greedy] = np.argmax(
+                self._evaluate_q_batch(self._q, states[greedy]), axis=1)
+        return actions, ['GREEDY' if g else 'RANDOM' for g in greedy]
+
     def save(self, filename):
         """Save model to file."""
         self._best_model.save(filename)
@@ -279,6 +422,20 @@ class QLearning(AgentBaseClass):
         else:
             return q[action]
 
+    def _evaluate_q_batch(self, model, states):
+        """
+        Evaluate Q[state, :] for a batch of states with one evaluation.
+
+        Args:
+            states (numpy.ndarray): observations seen by agent, stacked along
+                the first axis.
+
+        Returns:
+            numpy.ndarray of shape (number of states, number of actions).
+        """
+        q = model.eval({model.arguments[0]: states})
+        return np.reshape(q, (len(states), -1))
+
     def _update_q_periodically(self):
         if self.step_count < self._parameters.replay_start_size or \
                 self.step_count % self._parameters.q_update_frequency != 0:
@@ -295,89 +452,146 @@ class QLearning(AgentBaseClass):
 
     def _replay_and_update(self):
         """Perform one minibatch update of Q."""
-        input_values = []
-        output_values = []
+        positions, states, actions, rewards, next_states, terminal, \
+            priorities = self._sample_replay_memory()
+
+        # output_values are the same as Q for all actions except the chosen
+        # ones, which are moved by their TD errors.
+        q_values, td_errs = self._compute_td_errs(
+            states, actions, rewards, next_states, terminal)
+        output_values = q_values.copy()
+        output_values[np.arange(len(actions)), actions] += td_errs
+
+        arguments = {
+            self._input_variables: states,
+            self._output_variables: output_values.astype(np.float32)
+        }
         if self._parameters.use_prioritized_replay:
             # importance sampling weights.
-            weight_values = []
+            weight_values = np.power(
+                priorities, -self._parameters.priority_beta)
+            weight_values /= np.sum(weight_values)
+            arguments[self._weight_variables] = \
+                weight_values.reshape(-1, 1).astype(np.float32)
+
+        self._trainer.train_minibatch(arguments)
+
+        if self._parameters.use_prioritized_replay:
+            # Update replay priority.
+            _, td_errs = self._compute_td_errs(
+                states, actions, rewards, next_states, terminal)
+            new_priorities = self._priorities_from_td_errs(td_errs)
+            if self._use_array_replay:
+                self._replay_memory.update_priority(positions, new_priorities)
+            else:
+                self._replay_memory.update_priority(
+                    dict(zip(positions, new_priorities.tolist())))
+
+    def _sample_replay_memory(self):
+        """
+        Sample a minibatch from replay memory as stacked arrays.
+
+        Returns:
+            positions: positions of the transitions in replay memory.
+            states, actions, rewards, next_states, terminal: see
+                _stack_transitions().
+            priorities (numpy.ndarray): priorities of the transitions, or
+                None for uniform replay.
+        """
+        if self._use_array_replay:
+            minibatch = self._replay_memory.sample_minibatch(
+                self._parameters.minibatch_size)
+            next_states = minibatch.next_states[~minibatch.done]
+            return (minibatch.indices,
+                    minibatch.states.astype(np.float32),
+                    minibatch.actions.astype(np.int64),
+                    minibatch.rewards.astype(np.float64),
+                    next_states.astype(np.float32)
+                        if len(next_states) > 0 else None,
+                    minibatch.done,
+                    minibatch.priorities)
 
         minibatch = self._replay_memory.sample_minibatch(
             self._parameters.minibatch_size)
-        for index_transition_pair in minibatch:
-            input_value = index_transition_pair[1].state
-
-            # output_value is the same for all actions except last_action.
-            output_value = self._evaluate_q(
-                self._q, index_transition_pair[1].state)
-            td_err = self._compute_td_err(
-                index_transition_pair[1].state,
-                index_transition_pair[1].action,
-                index_transition_pair[1].reward,
-                index_transition_pair[1].next_state)
-            output_value[index_transition_pair[1].action] += td_err
-
-            input_values.append(input_value)
-            output_values.append(output_value)
-
-            if self._parameters.use_prioritized_replay:
-                weight_values.append(math.pow(
-                    index_transition_pair[1].priority,
-                    -self._parameters.priority_beta))
+        positions = [index_transition_pair[0]
+                     for index_transition_pair in minibatch]
+        transitions = [index_transition_pair[1]
+                       for index_transition_pair in minibatch]
+        priorities = np.array([t.priority for t in transitions], np.float64) \
+            if self._parameters.use_prioritized_replay else None
+        return (positions,) + self._stack_transitions(transitions) + \
+            (priorities,)
+
+    def _stack_transitions(self, transitions):
+        """
+        Stack a list of transitions into arrays.
 
-        if self._parameters.use_prioritized_replay:
-            w_sum = sum(weight_values)
-            weight_values = [[w / w_sum] for w in weight_values]
-            self._trainer.train_minibatch(
-                {
-                    self._input_variables: np.array(input_values).astype(
-                        np.float32),
-                    self._output_variables: np.array(output_values).astype(
-                        np.float32),
-                    self._weight_variables: np.array(weight_values).astype(
-                        np.float32)
-                })
+        Returns:
+            states (numpy.ndarray): states stacked along the first axis.
+            actions (numpy.ndarray): actions as integer indices.
+            rewards (numpy.ndarray): rewards.
+            next_states (numpy.ndarray): next states of the non-terminal
+                transitions, or None if all transitions are terminal.
+            terminal (numpy.ndarray): boolean mask of the transitions whose
+                next state is None.
+        """
+        states = np.array([t.state for t in transitions], np.float32)
+        actions = np.array([t.action for t in transitions], np.int64)
+        rewards = np.array([t.reward for t in transitions], np.float64)
+        terminal = np.array([t.next_state is None for t in transitions])
+        next_states = [t.next_state for t in transitions
+                       if t.next_state is not None]
+        next_states = np.array(next_states, np.float32) \
+            if next_states else None
+        return states, actions, rewards, next_states, terminal
+
+    def _compute_td_errs(self, states, actions, rewards, next_states,
+                         terminal):
+        """
+        Compute TD errors of a batch of transitions.
 
-            # Update replay priority.
-            position_priority_map = {}
-            for index_transition_pair in minibatch:
-                position_priority_map[index_transition_pair[0]] = \
-                    self._compute_priority(
-                        index_transition_pair[1].state,
-                        index_transition_pair[1].action,
-                        index_transition_pair[1].reward,
-                        index_transition_pair[1].next_state)
-
-            self._replay_memory.update_priority(position_priority_map)
+        Q and target Q are evaluated once each for the whole batch. For double
+        Q-learning, the next states are evaluated with Q in the same call as
+        the states.
+
+        Returns:
+            q_values (numpy.ndarray): Q[state, :] for every transition.
+            td_errs (numpy.ndarray): TD error of every transition.
+        """
+        num_transitions = len(actions)
+        if next_states is not None and self._parameters.double_q_learning:
+            q_values = self._evaluate_q_batch(
+                self._q, np.concatenate([states, next_states]))
+            q_values, next_q_values = \
+                q_values[:num_transitions], q_values[num_transitions:]
         else:
-            self._trainer.train_minibatch(
-                {
-                    self._input_variables: np.array(input_values).astype(
-                        np.float32),
-                    self._output_variables: np.array(output_values).astype(
-                        np.float32)
-                })
-
-    def _compute_td_err(self, state, action, reward, next_state):
-        td_err = reward
-        if next_state is not None:
+            q_values = self._evaluate_q_batch(self._q, states)
+
+        td_errs = rewards.copy()
+        if next_states is not None:
+            target_q_values = self._evaluate_q_batch(
+                self._target_q, next_states)
             if self._parameters.double_q_learning:
-                td_err += self._parameters.gamma * \
-                    self._evaluate_q(
-                        self._target_q,
-                        next_state,
-                        np.argmax(self._evaluate_q(self._q, next_state)))
+                next_values = target_q_values[
+                    np.arange(len(next_states)),
+                    np.argmax(next_q_values, axis=1)]
             else:
-                td_err += self._parameters.gamma * np.max(
-                    self._evaluate_q(self._target_q, next_state))
-        td_err -= self._evaluate_q(self._q, state, action)
-        return td_err
+                next_values = np.max(target_q_values, axis=1)
+            td_errs[~terminal] += self._parameters.gamma * \
+                next_values.astype(np.float64)
+        td_errs -= q_values[np.arange(num_transitions), actions]
+        return q_values, td_errs
+
+    def _priorities_from_td_errs(self, td_errs):
+        return np.power(
+            np.abs(td_errs) + self._parameters.priority_epsilon,
+            self._parameters.priority_alpha)
 
     def _compute_priority(self, state, action, reward, next_state):
         priority = None
         if self._parameters.use_prioritized_replay:
-            priority = math.pow(
-                math.fabs(self._compute_td_err(
-                    state, action, reward, next_state))
-                + self._parameters.priority_epsilon,
-                self._parameters.priority_alpha)
+            _, td_errs = self._compute_td_errs(
+                *self._stack_transitions(
+                    [_Transition(state, action, reward, next_state, None)]))
+            priority = float(self._priorities_from_td_errs(td_errs)[0])
         return priority
@@ -40,6 +40,17 @@ class RandomAgent(AgentBaseClass):
         """Last observed reward/state of the episode (which then terminates)."""
         self.step_count += 1
 
+    def start_batch(self, states):
+        """Start new episodes in a batch of environments."""
+        self.episode_count += len(states)
+        return np.random.randint(self._num_actions, size=len(states)), {}
+
+    def step_batch(self, rewards, next_states, dones):
+        """Observe one transition in every environment and choose actions."""
+        self.step_count += len(rewards)
+        self.episode_count += int(np.count_nonzero(dones))
+        return np.random.randint(self._num_actions, size=len(rewards)), {}
+
     def set_as_best_model(self):
         """Copy current model to best model."""
         pass
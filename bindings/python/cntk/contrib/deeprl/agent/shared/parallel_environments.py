@@ -0,0 +1,154 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+"""Environments stepped in parallel worker processes."""
+
+import multiprocessing
+
+import numpy as np
+
+
+def _make_env(make_env):
+    if isinstance(make_env, str):
+        import gym
+        return gym.make(make_env)
+    return make_env()
+
+
+def _worker(connection, make_env, seed):
+    """Run one environment, serving commands received over connection."""
+    env = _make_env(make_env)
+    if seed is not None:
+        env.seed(seed)
+    try:
+        while True:
+            command, data = connection.recv()
+            if command == 'step':
+                observation, reward, done, info = env.step(data)
+                if done:
+                    # Start the next episode right away, so that the agent
+                    # can choose its first action in the same batch.
+                    info = dict(info, terminal_observation=observation)
+                    observation = env.reset()
+                connection.send((observation, reward, done, info))
+            elif command == 'reset':
+                connection.send(env.reset())
+            elif command == 'spaces':
+                connection.send((env.observation_space, env.action_space))
+            elif command == 'close':
+                break
+            else:
+                raise ValueError('Unknown command: "{0}"'.format(command))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.close()
+        connection.close()
+
+
+class ParallelEnvironments(object):
+    """Step a number of environments in parallel worker processes.
+
+    Every environment runs in its own process, so that stepping all of them
+    takes about as long as stepping one, given enough cores. Together with
+    AgentBaseClass.start_batch() and step_batch(), the agent chooses the
+    actions of all environments with one batched evaluation:
+
+        with ParallelEnvironments('CartPole-v0', 8) as envs:
+            actions, _ = agent.start_batch(envs.reset())
+            for _ in range(num_steps):
+                observations, rewards, dones, _ = envs.step(actions)
+                actions, _ = agent.step_batch(rewards, observations, dones)
+
+    An environment whose episode ends is reset immediately. Its observation
+    returned by step() is then the first one of the new episode, and the last
+    observation of the ended episode is kept in info['terminal_observation'].
+    """
+
+    def __init__(self, make_env, num_envs, seed=None):
+        """Start worker processes.
+
+        Args:
+            make_env: id of a registered gym environment, or a function
+                without arguments creating an environment. The function needs
+                to be picklable when processes are not forked.
+            num_envs: number of environments.
+            seed: environment i is seeded with seed + i unless seed is None.
+        """
+        if num_envs < 1:
+            raise ValueError(
+                'Expecting at least one environment but get {0}\n'.format(
+                    num_envs))
+        self.num_envs = num_envs
+        self._connections = []
+        self._processes = []
+        for i in range(num_envs):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker,
+                args=(child_connection,
+                      make_env,
+                      None if seed is None else seed + i))
+            process.daemon = True
+            process.start()
+            child_connection.close()
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+        self._closed = False
+
+        self._connections[0].send(('spaces', None))
+        self.observation_space, self.action_space = \
+            self._connections[0].recv()
+
+    def reset(self):
+        """Reset all environments.
+
+        Returns:
+            numpy.ndarray of the observations, stacked along the first axis.
+        """
+        for connection in self._connections:
+            connection.send(('reset', None))
+        return np.array([connection.recv() for connection in self._connections])
+
+    def step(self, actions):
+        """Apply one action to every environment.
+
+        Returns:
+            observations (numpy.ndarray): observation of every environment.
+            rewards (numpy.ndarray): reward of every environment.
+            dones (numpy.ndarray): whether the episode of an environment ended.
+            infos (list): auxiliary diagnostic information per environment.
+        """
+        if len(actions) != self.num_envs:
+            raise ValueError(
+                'Expecting {0} actions but get {1}\n'.format(
+                    self.num_envs, len(actions)))
+        for connection, action in zip(self._connections, actions):
+            connection.send(('step', action))
+        results = [connection.recv() for connection in self._connections]
+        observations, rewards, dones, infos = zip(*results)
+        return (np.array(observations),
+                np.array(rewards, np.float64),
+                np.array(dones, np.bool_),
+                list(infos))
+
+    def close(self):
+        """Close all environments and stop the worker processes."""
+        if self._closed:
+            return
+        self._closed = True
+        for connection in self._connections:
+            try:
+                connection.send(('close', None))
+            except (IOError, EOFError):
+                pass
+        for process in self._processes:
+            process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -39,6 +39,15 @@ class Preprocessing(object):
         """Return preprocessed observation."""
         pass
 
+    def frame_history(self):
+        """Return how preprocessed observations stack a history of frames.
+
+        Preprocessing whose output is the last history_len frames returns
+        (history_len, frame_shape, frame_dtype), which allows replay memory to
+        store every frame once. Returns None otherwise.
+        """
+        return None
+
 
 class AtariPreprocessing(Preprocessing):
     """Preprocess screen images from Atari 2600 games.
@@ -58,12 +67,17 @@ class AtariPreprocessing(Preprocessing):
         """Return shape of preprocessed Atari images."""
         return (self.__history_len, 84, 84)
 
+    def frame_history(self):
+        """Return history length, shape and dtype of processed images."""
+        return (self.__history_len, (84, 84), np.uint8)
+
     def reset(self):
         """Reset preprocessing pipeline for new episode."""
         self.__previous_raw_image = np.zeros(self._input_shape, dtype=np.uint8)
         self.__processed_image_seq.clear()
         for i in range(self.__history_len):
-            self.__processed_image_seq.append(np.zeros((84, 84)))
+            self.__processed_image_seq.append(
+                np.zeros((84, 84), dtype=np.uint8))
 
     def preprocess(self, image):
         """Return preprocessed screen images from Atari 2600 games."""
@@ -103,6 +117,10 @@ class SlidingWindow(Preprocessing):
         """Return shape of preprocessed input."""
         return (self.__history_len,) + self._input_shape
 
+    def frame_history(self):
+        """Return history length, shape and dtype of windowed inputs."""
+        return (self.__history_len, self._input_shape, self.__dtype)
+
     def reset(self):
         """Reset preprocessing pipeline for new episode."""
         self.__history.clear()
@@ -122,6 +122,18 @@ class QLearningParameters:
         self.use_prioritized_replay = self.config.getboolean(
             'ExperienceReplay', 'Prioritized', fallback=False)
 
+        # Store every frame of stacked-history states once in replay memory,
+        # when the preprocessing supports it (see
+        # Preprocessing.frame_history()). Capacity then counts frames, and is
+        # split evenly among the environments passed to start_batch().
+        self.replay_frame_deduplication = self.config.getboolean(
+            'ExperienceReplay', 'FrameDeduplication', fallback=False)
+
+        # Store transitions in preallocated arrays, keeping every state once
+        # (see ArrayReplayMemory). Used when frame deduplication is not.
+        self.replay_array_memory = self.config.getboolean(
+            'ExperienceReplay', 'ArrayMemory', fallback=False)
+
         # Used by prioritized replay, to determine how much prioritization is
         # used, with 0 corresponding to uniform.
         self.priority_alpha = self.config.getfloat(
@@ -11,6 +11,8 @@ import math
 import random
 from collections import namedtuple
 
+import numpy as np
+
 # Transition for experience replay.
 #
 # Args:
@@ -161,3 +163,435 @@ class ReplayMemory:
                     raise RuntimeError('Right child is expected to exist.')
                 p -= left_p
                 parent = left + 1
+
+
+class _SumTree(object):
+    """Priorities of a fixed number of slots in a flat float64 sum-tree.
+
+    Complete binary tree in a flat array: node i has children 2i and 2i + 1,
+    node 1 is the root and the leaves start at self._leaf_offset. Node 0 is
+    unused. Updates and sampling are vectorized over many slots at once.
+    """
+
+    def __init__(self, capacity):
+        self._leaf_offset = 1
+        while self._leaf_offset < capacity:
+            self._leaf_offset *= 2
+        self._tree = np.zeros(2 * self._leaf_offset, np.float64)
+        self.max_priority = 1.0
+
+    def total(self):
+        """Return the sum of all priorities."""
+        return self._tree[1]
+
+    def get(self, indices):
+        """Return the priorities of the slots at indices."""
+        return self._tree[np.asarray(indices, np.int64) + self._leaf_offset]
+
+    def update(self, indices, priorities):
+        """Set the priorities of the slots at indices."""
+        nodes = np.asarray(indices, np.int64) + self._leaf_offset
+        priorities = np.asarray(priorities, np.float64)
+        self._tree[nodes] = priorities
+        self.max_priority = max(self.max_priority, float(np.max(priorities)))
+        nodes = np.unique(nodes // 2)
+        while nodes[0] > 0:
+            self._tree[nodes] = self._tree[2 * nodes] + \
+                self._tree[2 * nodes + 1]
+            nodes = np.unique(nodes // 2)
+
+    def stratified_sample(self, batch_size):
+        """Sample one slot from each of batch_size equally large segments of
+        the total priority, descending the tree for all of them at once."""
+        delta_p = self._tree[1] / batch_size
+        p = (np.arange(batch_size) + np.random.uniform(
+            size=batch_size)) * delta_p
+        nodes = np.ones(batch_size, np.int64)
+        while nodes[0] < self._leaf_offset:
+            left = 2 * nodes
+            left_p = self._tree[left]
+            go_right = p > left_p
+            p -= np.where(go_right, left_p, 0)
+            nodes = left + go_right
+        return nodes - self._leaf_offset
+
+
+# Minibatch sampled from ArrayReplayMemory or FrameReplayMemory.
+#
+# Args:
+#   indices: positions of the sampled transitions, to be passed to
+#     update_priority().
+#   states: states stacked along the first axis.
+#   actions: actions as integer indices.
+#   rewards: rewards.
+#   next_states: next states stacked along the first axis. Rows of terminal
+#     transitions are zero.
+#   done: whether the transition ended the episode (next_state was None).
+#   priorities: associated priorities, None for non-prioritized replay.
+_Minibatch = namedtuple('Minibatch',
+                        ['indices', 'states', 'actions', 'rewards',
+                         'next_states', 'done', 'priorities'])
+
+
+def _sample_valid(valid, count, replace=False):
+    """Sample count indices of True entries of valid by rejection."""
+    indices = np.empty(0, np.int64)
+    while len(indices) < count:
+        candidates = np.random.randint(len(valid), size=2 * count)
+        indices = np.concatenate([indices, candidates[valid[candidates]]])
+        if not replace:
+            _, first = np.unique(indices, return_index=True)
+            indices = indices[np.sort(first)]
+    return indices[:count]
+
+
+class ArrayReplayMemory(object):
+    """Replay memory backed by preallocated NumPy arrays.
+
+    States are written into a typed array of a fixed capacity, which is used
+    as a ring buffer. A transition is identified by the slot of its state,
+    and its next state is the state in the following slot. When a stored
+    state continues the previous transition's next state, as it does within
+    an episode, it is not written again, so that every state is stored about
+    once. Overwriting a state invalidates the transition that starts at it.
+
+    For prioritized replay, the priorities are kept in a flat float64
+    sum-tree whose leaves are the slots, so that sampling and priority
+    updates are vectorized over the whole minibatch. Storing states in a
+    compact dtype such as np.uint8 makes buffers of millions of Atari frames
+    feasible.
+    """
+
+    def __init__(self, capacity, state_shape, state_dtype=np.float32,
+                 prioritized=False):
+        """Create replay memory.
+
+        Args:
+            capacity: number of states in the buffer, which is roughly the
+                maximum number of transitions.
+            state_shape: shape of a single state.
+            state_dtype: dtype in which states are stored.
+            prioritized: whether to sample transitions by priority.
+        """
+        if capacity < 2:
+            raise ValueError(
+                'Capacity must be at least 2 but get {0}\n'.format(capacity))
+        self._capacity = capacity
+        self._use_prioritized_replay = prioritized
+        self._states = np.zeros((capacity,) + tuple(state_shape), state_dtype)
+        self._actions = np.zeros(capacity, np.int32)
+        self._rewards = np.zeros(capacity, np.float32)
+        self._done = np.zeros(capacity, np.bool_)
+        # Whether a slot is the state of a transition.
+        self._valid = np.zeros(capacity, np.bool_)
+        # Position where the next state will be written to.
+        self._position = 0
+        self._size = 0
+        # Slot of the previous transition's next state, or None if that
+        # transition ended the episode.
+        self._chain_end = None
+        if prioritized:
+            self._tree = _SumTree(capacity)
+
+    def store(self, state, action, reward, next_state, priority=None):
+        """Store a transition in replay memory.
+
+        If the memory is full, the oldest states get overwritten. A
+        next_state of None marks the end of an episode. For prioritized
+        replay, a priority of None stores the transition with the largest
+        priority seen so far.
+        """
+        if self._chain_end is not None and \
+                np.array_equal(state, self._states[self._chain_end]):
+            index = self._chain_end
+        else:
+            index = self._write_state(state)
+
+        self._actions[index] = action
+        self._rewards[index] = reward
+        self._done[index] = next_state is None
+        self._chain_end = None if next_state is None \
+            else self._write_state(next_state)
+        self._valid[index] = True
+        self._size += 1
+        if self._use_prioritized_replay:
+            if priority is None:
+                priority = self._tree.max_priority
+            self._tree.update([index], [priority])
+
+    def update_priority(self, indices, priorities):
+        """Update priority of transitions.
+
+        Args:
+            indices: positions of transitions, as returned in the indices of
+                sample_minibatch().
+            priorities: new priority of every transition.
+        """
+        if not self._use_prioritized_replay or len(indices) == 0:
+            return
+        # Transitions overwritten since they were sampled stay at zero.
+        indices = np.asarray(indices, np.int64)
+        valid = self._valid[indices]
+        if np.any(valid):
+            self._tree.update(indices[valid],
+                              np.asarray(priorities, np.float64)[valid])
+
+    def size(self):
+        """Return the current number of transitions."""
+        return self._size
+
+    def total_priority(self):
+        """Return the sum of priorities of all transitions."""
+        return self._tree.total() if self._use_prioritized_replay else None
+
+    def sample_minibatch(self, batch_size):
+        """Sample minibatch of size batch_size.
+
+        Returns:
+            a Minibatch of stacked arrays, or None if the memory is empty.
+        """
+        if self._size == 0:
+            return None
+
+        if not self._use_prioritized_replay:
+            if self._size <= batch_size:
+                indices = np.flatnonzero(self._valid)
+            else:
+                indices = _sample_valid(self._valid, batch_size)
+            priorities = None
+        else:
+            indices = np.minimum(
+                self._tree.stratified_sample(batch_size), self._capacity - 1)
+            # Guard against rounding errors that end in an empty leaf.
+            invalid = ~self._valid[indices]
+            if np.any(invalid):
+                indices[invalid] = _sample_valid(
+                    self._valid, np.count_nonzero(invalid), replace=True)
+            priorities = self._tree.get(indices)
+
+        done = self._done[indices]
+        next_states = self._states[(indices + 1) % self._capacity]
+        next_states[done] = 0
+        return _Minibatch(
+            indices,
+            self._states[indices],
+            self._actions[indices],
+            self._rewards[indices],
+            next_states,
+            done,
+            priorities)
+
+    def _write_state(self, state):
+        """Write state into the buffer, and return its slot."""
+        position = self._position
+        if self._valid[position]:
+            self._valid[position] = False
+            self._size -= 1
+            if self._use_prioritized_replay:
+                self._tree.update([position], [0])
+        self._states[position] = state
+        self._position = (position + 1) % self._capacity
+        return position
+
+
+class FrameReplayMemory(object):
+    """Replay memory for states that stack a history of frames.
+
+    With preprocessing such as AtariPreprocessing, a state is the last
+    history_len frames, and consecutive states of an episode share all but
+    one frame. Instead of storing every state and next state in full, this
+    memory writes each frame once into a circular frame buffer and rebuilds
+    the stacked states by index at sample time.
+
+    A transition is identified by the buffer slot of the last frame of its
+    state; its next state ends at the following slot. When a stored state
+    continues the previous transition's next state, only the newest frame of
+    next_state is written. Otherwise, e.g. at the start of an episode, all
+    frames of the state are written, so that no stacked state spans an
+    episode boundary. Overwriting a frame invalidates the transitions whose
+    states contain it.
+
+    Transitions of several environments that are stored interleaved, as by
+    QLearning.step_batch(), can only share frames if every environment writes
+    into its own part of the buffer. For this, the buffer is split into
+    num_streams equally large circular buffers, and store() takes the stream
+    of the transition.
+
+    The interface is the same as the one of ArrayReplayMemory. Indices of
+    sampled transitions are buffer slots.
+    """
+
+    def __init__(self, capacity, history_len, frame_shape,
+                 frame_dtype=np.uint8, prioritized=False, num_streams=1):
+        """Create replay memory.
+
+        Args:
+            capacity: number of frames in the buffer, which is roughly the
+                maximum number of transitions.
+            history_len: number of frames stacked in a state.
+            frame_shape: shape of a single frame.
+            frame_dtype: dtype in which frames are stored.
+            prioritized: whether to sample transitions by priority.
+            num_streams: number of environments whose transitions are
+                stored interleaved.
+        """
+        stream_capacity = capacity // num_streams
+        if stream_capacity <= history_len:
+            raise ValueError(
+                'Capacity {0} per stream must be larger than history length '
+                '{1}\n'.format(stream_capacity, history_len))
+        capacity = stream_capacity * num_streams
+        self._capacity = capacity
+        self._num_streams = num_streams
+        self._stream_capacity = stream_capacity
+        self._history_len = history_len
+        self._use_prioritized_replay = prioritized
+        self._frames = np.zeros((capacity,) + tuple(frame_shape), frame_dtype)
+        self._actions = np.zeros(capacity, np.int32)
+        self._rewards = np.zeros(capacity, np.float32)
+        self._done = np.zeros(capacity, np.bool_)
+        # Whether a slot is the last frame of the state of a transition.
+        self._valid = np.zeros(capacity, np.bool_)
+        # Offsets of the frames of a state relative to its last frame.
+        self._history_offsets = np.arange(1 - history_len, 1)
+        # Slot where the next frame of every stream will be written to.
+        self._positions = np.arange(num_streams) * stream_capacity
+        self._size = 0
+        # Per stream, slot of the last frame of the previous transition's next
+        # state, or None if that transition ended the episode.
+        self._chain_ends = [None] * num_streams
+        if prioritized:
+            self._tree = _SumTree(capacity)
+
+    @property
+    def num_streams(self):
+        """Number of environments whose transitions are stored interleaved."""
+        return self._num_streams
+
+    def store(self, state, action, reward, next_state, priority=None,
+              stream=0):
+        """Store a transition in replay memory.
+
+        Oldest frames of the stream get overwritten when its buffer is full. A
+        next_state of None marks the end of an episode. For prioritized
+        replay, a priority of None stores the transition with the largest
+        priority seen so far.
+        """
+        state = np.asarray(state)
+        if next_state is not None:
+            next_state = np.asarray(next_state)
+            if not np.array_equal(next_state[:-1], state[1:]):
+                raise ValueError(
+                    'next_state is expected to continue the frame history '
+                    'of state\n')
+
+        chain_end = self._chain_ends[stream]
+        if chain_end is not None and \
+                np.array_equal(state, self._stack(chain_end)):
+            index = chain_end
+        else:
+            for frame in state:
+                index = self._write_frame(frame, stream)
+
+        self._actions[index] = action
+        self._rewards[index] = reward
+        self._done[index] = next_state is None
+        if next_state is None:
+            self._chain_ends[stream] = None
+        else:
+            self._chain_ends[stream] = self._write_frame(
+                next_state[-1], stream)
+        self._valid[index] = True
+        self._size += 1
+        if self._use_prioritized_replay:
+            if priority is None:
+                priority = self._tree.max_priority
+            self._tree.update([index], [priority])
+
+    def update_priority(self, indices, priorities):
+        """Update priority of transitions.
+
+        Args:
+            indices: positions of transitions, as returned in the indices of
+                sample_minibatch().
+            priorities: new priority of every transition.
+        """
+        if not self._use_prioritized_replay or len(indices) == 0:
+            return
+        # Transitions overwritten since they were sampled stay at zero.
+        indices = np.asarray(indices, np.int64)
+        valid = self._valid[indices]
+        if np.any(valid):
+            self._tree.update(indices[valid],
+                              np.asarray(priorities, np.float64)[valid])
+
+    def size(self):
+        """Return the current number of transitions."""
+        return self._size
+
+    def total_priority(self):
+        """Return the sum of priorities of all transitions."""
+        return self._tree.total() if self._use_prioritized_replay else None
+
+    def sample_minibatch(self, batch_size):
+        """Sample minibatch of size batch_size.
+
+        Returns:
+            a Minibatch of stacked arrays, or None if the memory is empty.
+        """
+        if self._size == 0:
+            return None
+
+        if not self._use_prioritized_replay:
+            if self._size <= batch_size:
+                indices = np.flatnonzero(self._valid)
+            else:
+                indices = _sample_valid(self._valid, batch_size)
+            priorities = None
+        else:
+            indices = np.minimum(
+                self._tree.stratified_sample(batch_size), self._capacity - 1)
+            # Guard against rounding errors that end in an empty leaf.
+            invalid = ~self._valid[indices]
+            if np.any(invalid):
+                indices[invalid] = _sample_valid(
+                    self._valid, np.count_nonzero(invalid), replace=True)
+            priorities = self._tree.get(indices)
+
+        done = self._done[indices]
+        next_states = self._stack(self._shift(indices, 1))
+        next_states[done] = 0
+        return _Minibatch(
+            indices,
+            self._stack(indices),
+            self._actions[indices],
+            self._rewards[indices],
+            next_states,
+            done,
+            priorities)
+
+    def _shift(self, slots, offsets):
+        """Move slots by offsets within the buffers of their streams."""
+        slots = np.asarray(slots)
+        local = slots % self._stream_capacity
+        return slots - local + (local + offsets) % self._stream_capacity
+
+    def _stack(self, indices):
+        """Rebuild the states whose last frames are at indices."""
+        return self._frames[self._shift(
+            np.asarray(indices)[..., np.newaxis], self._history_offsets)]
+
+    def _write_frame(self, frame, stream):
+        """Write frame into the buffer of stream, and return its slot."""
+        position = self._positions[stream]
+        # Invalidate the transitions whose states contain this slot.
+        slots = self._shift(position, np.arange(self._history_len))
+        overwritten = slots[self._valid[slots]]
+        if len(overwritten) > 0:
+            self._valid[overwritten] = False
+            self._size -= len(overwritten)
+            if self._use_prioritized_replay:
+                self._tree.update(overwritten, np.zeros(len(overwritten)))
+        self._frames[position] = frame
+        self._positions[stream] = self._shift(position, 1)
+        return position
@@ -0,0 +1,61 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+
+import unittest
+
+import numpy as np
+from cntk.contrib.deeprl.agent.shared.parallel_environments import \
+    ParallelEnvironments
+
+
+class CountingEnv:
+    """Environment whose state counts the actions, ending at 3."""
+
+    def __init__(self):
+        self.observation_space = None
+        self.action_space = None
+        self.seed_value = None
+
+    def seed(self, seed):
+        self.seed_value = seed
+
+    def reset(self):
+        self.state = 0
+        return np.array([self.state], np.float32)
+
+    def step(self, action):
+        self.state += action
+        return np.array([self.state], np.float32), float(action), \
+            self.state >= 3, {'seed': self.seed_value}
+
+    def close(self):
+        pass
+
+
+class ParallelEnvironmentsTest(unittest.TestCase):
+    """Unit tests for ParallelEnvironments."""
+
+    def test_step(self):
+        with ParallelEnvironments(CountingEnv, 2, seed=5) as sut:
+            self.assertEqual(sut.num_envs, 2)
+            np.testing.assert_array_equal(sut.reset(), [[0], [0]])
+
+            observations, rewards, dones, infos = sut.step([1, 2])
+            np.testing.assert_array_equal(observations, [[1], [2]])
+            np.testing.assert_array_equal(rewards, [1, 2])
+            np.testing.assert_array_equal(dones, [False, False])
+            self.assertEqual([info['seed'] for info in infos], [5, 6])
+
+            # The second environment ends its episode and is reset.
+            observations, rewards, dones, infos = sut.step([1, 2])
+            np.testing.assert_array_equal(observations, [[2], [0]])
+            np.testing.assert_array_equal(dones, [False, True])
+            self.assertNotIn('terminal_observation', infos[0])
+            np.testing.assert_array_equal(
+                infos[1]['terminal_observation'], [4])
+
+            self.assertRaises(ValueError, sut.step, [1])
+        sut.close()
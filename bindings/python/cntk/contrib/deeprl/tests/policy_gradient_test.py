@@ -290,6 +290,66 @@ class PolicyGradientTest(unittest.TestCase):
         self.assertEqual(sut._trajectory_states, [0.6])
         self.assertEqual(sut._update_networks.call_count, 2)
 
+    @patch('cntk.contrib.deeprl.agent.policy_gradient.PolicyGradientParameters')
+    def test_rollout_batch(self, mock_parameters):
+        self._setup_parameters(mock_parameters.return_value)
+
+        action_space = spaces.Discrete(2)
+        observation_space = spaces.Box(0, 1, (1,))
+        sut = ActorCritic('', observation_space, action_space)
+        sut._update_networks = MagicMock()
+
+        sut._choose_actions = Mock(side_effect=[
+            (np.array([0, 1]), None),
+            (np.array([1, 0]), None),
+            (np.array([1, 1]), None)])
+
+        sut.start_batch(np.array([[0.1], [0.5]], np.float32))
+        self.assertEqual(sut.episode_count, 2)
+
+        # The second environment ends its episode and starts a new one, so
+        # its trajectory is processed right away.
+        sut.step_batch(
+            [0.1, 0.5], np.array([[0.2], [0.6]], np.float32), [False, True])
+        self.assertEqual(sut.episode_count, 3)
+        self.assertEqual(sut._env_trajectories[0][0], [0.1, 0.2])
+        self.assertEqual(sut._env_trajectories[0][1], [0, 1])
+        self.assertEqual(sut._env_trajectories[0][2], [0.1])
+        self.assertEqual(sut._env_trajectories[1][0], [0.6])
+        self.assertEqual(sut._env_trajectories[1][1], [0])
+        self.assertEqual(sut._env_trajectories[1][2], [])
+        np.testing.assert_array_equal(sut._input_buffer, [[0.5]])
+        np.testing.assert_array_almost_equal(
+            sut._value_network_output_buffer, [[0.5]])
+        self.assertEqual(sut._update_networks.call_count, 0)
+
+        # 4 steps in total trigger an update with both trajectories.
+        sut.step_batch(
+            [0.2, 0.6], np.array([[0.3], [0.7]], np.float32), [False, False])
+        self.assertEqual(sut.step_count, 4)
+        self.assertEqual(sut._update_networks.call_count, 1)
+        np.testing.assert_array_equal(
+            sut._input_buffer, [[0.5], [0.1], [0.2], [0.6]])
+        self.assertEqual(sut._env_trajectories[0][0], [0.3])
+        self.assertEqual(sut._env_trajectories[0][1], [1])
+        self.assertEqual(sut._env_trajectories[0][2], [])
+        self.assertEqual(sut._env_trajectories[1][0], [0.7])
+        self.assertEqual(sut._env_trajectories[1][1], [1])
+        self.assertEqual(sut._env_trajectories[1][2], [])
+
+    def test_choose_actions(self):
+        action_space = spaces.Discrete(2)
+        observation_space = spaces.Box(0, 1, (1,))
+        sut = ActorCritic('', observation_space, action_space)
+        sut._policy_network.eval = MagicMock(
+            return_value=np.array([[[0, 100]], [[100, 0]]], np.float32))
+
+        actions, action_probs = sut._choose_actions(
+            np.array([[0.1], [0.2]], np.float32))
+        np.testing.assert_array_equal(actions, [1, 0])
+        np.testing.assert_array_almost_equal(action_probs, [[0, 1], [1, 0]])
+        self.assertEqual(sut._policy_network.eval.call_count, 1)
+
     def test_process_accumulated_trajectory(self):
         action_space = spaces.Discrete(2)
         observation_space = spaces.Box(0, 1, (1,))
@@ -302,6 +362,7 @@ class PolicyGradientTest(unittest.TestCase):
         sut._process_accumulated_trajectory(False)
 
         # Verify results.
+        self.assertEqual(sut._value_network.eval.call_count, 1)
         self.assertEqual(len(sut._trajectory_rewards), 0)
         self.assertEqual(len(sut._trajectory_actions), 0)
         self.assertEqual(len(sut._trajectory_states), 0)
@@ -407,10 +468,9 @@ class PolicyGradientTest(unittest.TestCase):
             np.array([0.1], np.float32),
             np.array([0.2], np.float32),
             np.array([0.3], np.float32)]
-        sut._value_network.eval = MagicMock(side_effect=[
-            np.array([[[3]]], np.float32),
-            np.array([[[2]]], np.float32),
-            np.array([[[1]]], np.float32)])
+        # The value network is evaluated once on all states.
+        sut._value_network.eval = MagicMock(
+            return_value=np.array([[[2]], [[1]], [[3]]], np.float32))
 
     def _setup_test_model(self, *args, **kwargs):
         inputs = placeholder(shape=(1,))
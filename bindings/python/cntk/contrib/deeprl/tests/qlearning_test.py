@@ -15,7 +15,8 @@ import cntk.contrib.deeprl.tests.spaces as spaces
 import numpy as np
 from cntk.contrib.deeprl.agent.qlearning import QLearning
 from cntk.contrib.deeprl.agent.shared.cntk_utils import huber_loss
-from cntk.contrib.deeprl.agent.shared.replay_memory import _Transition
+from cntk.contrib.deeprl.agent.shared.replay_memory import \
+    ArrayReplayMemory, FrameReplayMemory, _Transition
 from cntk.layers import Dense
 from cntk.losses import squared_error
 from cntk.ops import input_variable
@@ -230,10 +231,8 @@ class QLearningTest(unittest.TestCase):
         observation_space = spaces.Box(0, 1, (1,))
         sut = QLearning('', observation_space, action_space)
 
-        sut._q.eval = \
-            MagicMock(return_value=np.array([[[0.2, 0.1]]], np.float32))
-        sut._target_q.eval = \
-            MagicMock(return_value=np.array([[[0.3, 0.4]]], np.float32))
+        sut._q.eval = self._constant_q([[0.2, 0.1]])
+        sut._target_q.eval = self._constant_q([[0.3, 0.4]])
         sut._trainer = MagicMock()
 
         sut._update_q_periodically()
@@ -259,16 +258,17 @@ class QLearningTest(unittest.TestCase):
         observation_space = spaces.Box(0, 1, (1,))
         sut = QLearning('', observation_space, action_space)
 
-        def new_q_value(self):
-            return np.array([[[0.2, 0.1]]], np.float32)
-        sut._q.eval = MagicMock(side_effect=new_q_value)
-        sut._target_q.eval = MagicMock(
-            return_value=np.array([[[0.3, 0.4]]], np.float32))
+        sut._q.eval = self._constant_q([[0.2, 0.1]])
+        sut._target_q.eval = self._constant_q([[0.3, 0.4]])
         sut._trainer = MagicMock()
 
         sut._update_q_periodically()
 
         self.assertEqual(sut._trainer.train_minibatch.call_count, 1)
+        # Q and target Q are evaluated on the whole minibatch, once for the
+        # update and once for the new priorities.
+        self.assertEqual(sut._q.eval.call_count, 2)
+        self.assertEqual(sut._target_q.eval.call_count, 2)
         np.testing.assert_array_equal(
             sut._trainer.train_minibatch.call_args[0][0][sut._input_variables],
             [
@@ -313,10 +313,8 @@ class QLearningTest(unittest.TestCase):
         observation_space = spaces.Box(0, 1, (1,))
         sut = QLearning('', observation_space, action_space)
 
-        sut._q.eval = \
-            MagicMock(return_value=np.array([[[0.2, 0.1]]], np.float32))
-        sut._target_q.eval = \
-            MagicMock(return_value=np.array([[[0.3, 0.4]]], np.float32))
+        sut._q.eval = self._constant_q([[0.2, 0.1]])
+        sut._target_q.eval = self._constant_q([[0.3, 0.4]])
         sut._trainer = MagicMock()
 
         sut._update_q_periodically()
@@ -326,6 +324,43 @@ class QLearningTest(unittest.TestCase):
             sut._trainer.train_minibatch.call_args[0][0][sut._output_variables],
             [np.array([10.27, 0.1], np.float32)])
 
+    @patch('cntk.contrib.deeprl.agent.qlearning.ReplayMemory')
+    @patch('cntk.contrib.deeprl.agent.qlearning.QLearningParameters')
+    def test_update_q_terminal_transitions(self,
+                                           mock_parameters,
+                                           mock_replay_memory):
+        self._setup_parameters(mock_parameters.return_value)
+        mock_replay_memory.return_value.sample_minibatch.return_value = \
+            [(0, _Transition(
+                np.array([0.1], np.float32), 0, 10, None, 0.01)),
+             (1, _Transition(
+                np.array([0.3], np.float32), 1, 11,
+                np.array([0.4], np.float32), 0.01))]
+
+        action_space = spaces.Discrete(2)
+        observation_space = spaces.Box(0, 1, (1,))
+        sut = QLearning('', observation_space, action_space)
+
+        sut._q.eval = self._constant_q([[0.2, 0.1]])
+        sut._target_q.eval = self._constant_q([[0.3, 0.4]])
+        sut._trainer = MagicMock()
+
+        sut._update_q_periodically()
+
+        # Only the next state of the non-terminal transition is evaluated.
+        target_q_arguments = sut._target_q.eval.call_args[0][0]
+        np.testing.assert_array_equal(
+            list(target_q_arguments.values())[0],
+            [np.array([0.4], np.float32)])
+        np.testing.assert_array_almost_equal(
+            sut._trainer.train_minibatch.call_args[0][0][sut._output_variables],
+            [
+                # 10 (reward) for the terminal transition
+                np.array([10, 0.1], np.float32),
+                # 11 (reward) + 0.9 (gamma) x 0.4 (max q_target)
+                np.array([0.2, 11.36], np.float32)
+            ])
+
     @patch('cntk.contrib.deeprl.agent.qlearning.QLearningParameters')
     def test_populate_replay_memory(self, mock_parameters):
         self._setup_parameters(mock_parameters.return_value)
@@ -370,6 +405,168 @@ class QLearningTest(unittest.TestCase):
         self.assertIsNone(call_args[0][3])
         self.assertEqual(call_args[0][4], 3)
 
+    @patch('cntk.contrib.deeprl.agent.qlearning.QLearningParameters')
+    def test_frame_replay_memory(self, mock_parameters):
+        self._setup_parameters(mock_parameters.return_value)
+        mock_parameters.return_value.preprocessing = \
+            'cntk.contrib.deeprl.agent.shared.preprocessing.SlidingWindow'
+        mock_parameters.return_value.preprocessing_args = '(2, )'
+        mock_parameters.return_value.replay_frame_deduplication = True
+        mock_parameters.return_value.use_prioritized_replay = True
+        mock_parameters.return_value.minibatch_size = 2
+
+        action_space = spaces.Discrete(2)
+        observation_space = spaces.Box(0, 1, (1,))
+        sut = QLearning('', observation_space, action_space)
+        self.assertIsInstance(sut._replay_memory, FrameReplayMemory)
+        sut._trainer = MagicMock()
+
+        sut.start(np.array([0.1], np.float32))
+        sut.step(0.1, np.array([0.2], np.float32))
+        sut.step(0.2, np.array([0.3], np.float32))
+        sut.end(0.3, np.array([0.4], np.float32))
+
+        # 2 frames of the first state, and one per transition after that.
+        self.assertEqual(sut._replay_memory.size(), 3)
+        self.assertEqual(sut._replay_memory._positions[0], 4)
+        self.assertEqual(sut._trainer.train_minibatch.call_count, 1)
+
+        samples = sut._replay_memory.sample_minibatch(3)
+        order = np.argsort(samples.indices)
+        np.testing.assert_allclose(
+            samples.states[order],
+            np.array([[[0], [0.1]], [[0.1], [0.2]], [[0.2], [0.3]]],
+                     np.float32))
+        np.testing.assert_array_equal(
+            samples.done[order], [False, False, True])
+
+    @patch('cntk.contrib.deeprl.agent.qlearning.QLearningParameters')
+    def test_array_replay_memory(self, mock_parameters):
+        self._setup_parameters(mock_parameters.return_value)
+        mock_parameters.return_value.replay_array_memory = True
+        mock_parameters.return_value.use_prioritized_replay = True
+        mock_parameters.return_value.minibatch_size = 2
+
+        action_space = spaces.Discrete(2)
+        observation_space = spaces.Box(0, 1, (1,))
+        sut = QLearning('', observation_space, action_space)
+        self.assertIsInstance(sut._replay_memory, ArrayReplayMemory)
+        sut._trainer = MagicMock()
+
+        sut.start(np.array([0.1], np.float32))
+        sut.step(0.1, np.array([0.2], np.float32))
+        sut.step(0.2, np.array([0.3], np.float32))
+        sut.end(0.3, np.array([0.4], np.float32))
+
+        # Every state is stored once.
+        self.assertEqual(sut._replay_memory.size(), 3)
+        self.assertEqual(sut._replay_memory._position, 3)
+        self.assertEqual(sut._trainer.train_minibatch.call_count, 1)
+
+        samples = sut._replay_memory.sample_minibatch(3)
+        order = np.argsort(samples.indices)
+        np.testing.assert_allclose(
+            samples.states[order], np.array([[0.1], [0.2], [0.3]], np.float32))
+        np.testing.assert_allclose(
+            samples.next_states[order],
+            np.array([[0.2], [0.3], [0]], np.float32))
+        np.testing.assert_array_equal(
+            samples.done[order], [False, False, True])
+
+    @patch('cntk.contrib.deeprl.agent.qlearning.QLearningParameters')
+    def test_frame_replay_memory_batch(self, mock_parameters):
+        self._setup_parameters(mock_parameters.return_value)
+        mock_parameters.return_value.preprocessing = \
+            'cntk.contrib.deeprl.agent.shared.preprocessing.SlidingWindow'
+        mock_parameters.return_value.preprocessing_args = '(2, )'
+        mock_parameters.return_value.replay_frame_deduplication = True
+        mock_parameters.return_value.replay_start_size = 100
+
+        action_space = spaces.Discrete(2)
+        observation_space = spaces.Box(0, 1, (1,))
+        sut = QLearning('', observation_space, action_space)
+
+        sut.start_batch(np.array([[0.1], [0.5]], np.float32))
+        sut.step_batch(
+            [0.1, 0.5], np.array([[0.2], [0.6]], np.float32), [False, False])
+        sut.step_batch(
+            [0.2, 0.6], np.array([[0.3], [0.7]], np.float32), [False, False])
+
+        # Every environment has its own stream, so that its transitions
+        # share frames: 2 frames of the first state, and one per transition.
+        self.assertEqual(sut._replay_memory.num_streams, 2)
+        self.assertEqual(sut._replay_memory.size(), 4)
+        np.testing.assert_array_equal(
+            sut._replay_memory._positions, [4, 54])
+
+        # The memory cannot be split anew once it holds transitions.
+        self.assertRaises(
+            ValueError, sut.start_batch,
+            np.array([[0.1], [0.2], [0.3]], np.float32))
+
+    @patch('cntk.contrib.deeprl.agent.qlearning.QLearningParameters')
+    def test_step_batch(self, mock_parameters):
+        self._setup_parameters(mock_parameters.return_value)
+        mock_parameters.return_value.preprocessing = \
+            'cntk.contrib.deeprl.agent.shared.preprocessing.SlidingWindow'
+        mock_parameters.return_value.preprocessing_args = '(2, )'
+        mock_parameters.return_value.replay_start_size = 100
+
+        action_space = spaces.Discrete(2)
+        observation_space = spaces.Box(0, 1, (1,))
+        sut = QLearning('', observation_space, action_space)
+        sut._replay_memory = MagicMock()
+
+        actions, debug = sut.start_batch(
+            np.array([[0.1], [0.5]], np.float32))
+        self.assertEqual(actions.shape, (2,))
+        self.assertEqual(debug['action_behavior'], ['RANDOM', 'RANDOM'])
+        self.assertEqual(sut.episode_count, 2)
+
+        # The second environment ends its episode and starts a new one.
+        sut.step_batch(
+            [0.1, 0.5], np.array([[0.2], [0.6]], np.float32), [False, True])
+        self.assertEqual(sut.step_count, 2)
+        self.assertEqual(sut.episode_count, 3)
+        self.assertEqual(sut._replay_memory.store.call_count, 2)
+
+        call_args = sut._replay_memory.store.call_args_list[0]
+        np.testing.assert_array_equal(
+            call_args[0][0], np.array([[0], [0.1]], np.float32))
+        self.assertEqual(call_args[0][1], actions[0])
+        self.assertEqual(call_args[0][2], 0.1)
+        np.testing.assert_array_equal(
+            call_args[0][3], np.array([[0.1], [0.2]], np.float32))
+        self.assertIsNone(call_args[0][4])
+
+        call_args = sut._replay_memory.store.call_args_list[1]
+        np.testing.assert_array_equal(
+            call_args[0][0], np.array([[0], [0.5]], np.float32))
+        self.assertEqual(call_args[0][2], 0.5)
+        self.assertIsNone(call_args[0][3])
+
+        np.testing.assert_array_equal(
+            sut._last_states,
+            np.array([[[0.1], [0.2]], [[0], [0.6]]], np.float32))
+
+    @patch('cntk.contrib.deeprl.agent.qlearning.QLearningParameters')
+    def test_choose_actions(self, mock_parameters):
+        self._setup_parameters(mock_parameters.return_value)
+        mock_parameters.return_value.initial_epsilon = 0
+        mock_parameters.return_value.epsilon_minimum = 0
+
+        action_space = spaces.Discrete(2)
+        observation_space = spaces.Box(0, 1, (1,))
+        sut = QLearning('', observation_space, action_space)
+        sut._q.eval = self._constant_q([[0.2, 0.4]])
+
+        actions, debug = sut.start_batch(
+            np.array([[0.1], [0.2], [0.3]], np.float32))
+        np.testing.assert_array_equal(actions, [1, 1, 1])
+        self.assertEqual(debug['action_behavior'], ['GREEDY'] * 3)
+        # Q is evaluated once for all environments.
+        self.assertEqual(sut._q.eval.call_count, 1)
+
     @patch('cntk.contrib.deeprl.agent.qlearning.QLearningParameters')
     def test_replay_start_size(self, mock_parameters):
         self._setup_parameters(mock_parameters.return_value)
@@ -419,6 +616,13 @@ class QLearningTest(unittest.TestCase):
         self.assertEqual(sut._trainer.train_minibatch.call_count, 1)
         self.assertEqual(debug['action_behavior'], 'GREEDY')
 
+    def _constant_q(self, q_value):
+        """Mock of eval() returning q_value for every state of the batch."""
+        def evaluate(arguments):
+            num_states = len(list(arguments.values())[0])
+            return np.tile(np.array(q_value, np.float32), (num_states, 1, 1))
+        return MagicMock(side_effect=evaluate)
+
     def _setup_parameters(self, parameters):
         parameters.q_representation = 'dqn'
         parameters.hidden_layers = '[2]'
@@ -436,6 +640,8 @@ class QLearningTest(unittest.TestCase):
         parameters.replay_start_size = 0
         parameters.replay_memory_capacity = 100
         parameters.use_prioritized_replay = False
+        parameters.replay_frame_deduplication = False
+        parameters.replay_array_memory = False
         parameters.priority_alpha = 2
         parameters.priority_beta = 2
         parameters.priority_epsilon = 0.1
@@ -6,7 +6,9 @@
 
 import unittest
 
-from cntk.contrib.deeprl.agent.shared.replay_memory import ReplayMemory
+import numpy as np
+from cntk.contrib.deeprl.agent.shared.replay_memory import \
+    ArrayReplayMemory, FrameReplayMemory, ReplayMemory
 
 
 class ReplayMemoryTest(unittest.TestCase):
@@ -69,3 +71,212 @@ class ReplayMemoryTest(unittest.TestCase):
 
         sut.update_priority({3: 4, 4: 0.5})
         self.assertEqual(sut._memory[:2], [9.5, 4.5])
+
+
+class ArrayReplayMemoryTest(unittest.TestCase):
+    """Unit tests for ArrayReplayMemory."""
+
+    def test_uniform_sampling(self):
+        sut = ArrayReplayMemory(4, (2,), np.uint8)
+        self.assertIsNone(sut.sample_minibatch(1))
+
+        sut.store([1, 1], 0, 0.5, [2, 2])
+        self.assertEqual(sut.size(), 1)
+        samples = sut.sample_minibatch(2)
+        np.testing.assert_array_equal(samples.indices, [0])
+        np.testing.assert_array_equal(samples.states, [[1, 1]])
+        self.assertEqual(samples.states.dtype, np.uint8)
+        np.testing.assert_array_equal(samples.next_states, [[2, 2]])
+        np.testing.assert_array_equal(samples.done, [False])
+        self.assertIsNone(samples.priorities)
+
+        sut.store([2, 2], 1, 1.5, None)
+        sut.store([3, 3], 0, 2.5, [4, 4])
+        sut.store([4, 4], 1, 3.5, [5, 5])
+        # States continuing the previous next state are not written again,
+        # and [5, 5] overwrites the first transition.
+        self.assertEqual(sut._position, 1)
+        self.assertEqual(sut.size(), 3)
+        samples = sut.sample_minibatch(3)
+        self.assertEqual(sorted(samples.indices), [1, 2, 3])
+        for i, state, action, reward, next_state, done in zip(
+                samples.indices, samples.states, samples.actions,
+                samples.rewards, samples.next_states, samples.done):
+            self.assertIn(state[0], [2, 3, 4])
+            self.assertEqual(reward, state[0] - 0.5)
+            self.assertEqual(action, (state[0] + 1) % 2)
+            self.assertEqual(done, state[0] == 2)
+            self.assertEqual(next_state[0], 0 if done else state[0] + 1)
+
+        samples = sut.sample_minibatch(2)
+        self.assertEqual(len(set(samples.indices)), 2)
+
+    def test_prioritized_sampling(self):
+        sut = ArrayReplayMemory(3, (1,), prioritized=True)
+        self.assertIsNone(sut.sample_minibatch(1))
+
+        sut.store([1], 0, 0, None, 1)
+        np.testing.assert_array_equal(sut.sample_minibatch(2).indices, [0, 0])
+
+        sut.store([2], 0, 0, None, 3)
+        sut.store([3], 0, 0, None, 2)
+        self.assertEqual(sut.total_priority(), 6)
+
+        np.random.seed(0)
+        counts = np.bincount(np.concatenate(
+            [sut.sample_minibatch(3).indices for _ in range(1000)]),
+            minlength=3)
+        np.testing.assert_allclose(counts / 3000.0, [1 / 6., 1 / 2., 1 / 3.],
+                                   atol=0.05)
+
+        # Overwrites the oldest transition.
+        sut.store([4], 0, 0, None, 5)
+        self.assertEqual(sut.total_priority(), 10)
+        samples = sut.sample_minibatch(2)
+        np.testing.assert_array_equal(
+            samples.priorities, [[5, 3, 2][i] for i in samples.indices])
+
+        sut.update_priority([1, 2], [4, 0.5])
+        self.assertEqual(sut.total_priority(), 9.5)
+
+        # Without a priority, the largest one seen so far is used.
+        sut.store([5], 0, 0, None)
+        self.assertEqual(sut.total_priority(), 10.5)
+
+    def test_sum_tree(self):
+        sut = ArrayReplayMemory(100, (1,), prioritized=True)
+        priorities = np.random.uniform(size=100)
+        for i, priority in enumerate(priorities):
+            sut.store([i], 0, 0, None, priority)
+        self.assertAlmostEqual(sut.total_priority(), np.sum(priorities))
+
+        indices = np.random.randint(100, size=20)
+        new_priorities = np.random.uniform(size=20)
+        sut.update_priority(indices, new_priorities)
+        priorities[indices] = new_priorities
+        self.assertAlmostEqual(sut.total_priority(), np.sum(priorities))
+
+
+class FrameReplayMemoryTest(unittest.TestCase):
+    """Unit tests for FrameReplayMemory."""
+
+    def _episode(self, first_frame, length, history_len=2):
+        """Stacked states of an episode whose frames count up."""
+        frames = [0] * (history_len - 1) + \
+            list(range(first_frame, first_frame + length + 1))
+        return [np.array(frames[i:i + history_len]).reshape(-1, 1)
+                for i in range(length + 1)]
+
+    def test_frame_sharing(self):
+        sut = FrameReplayMemory(10, 2, (1,))
+        self.assertIsNone(sut.sample_minibatch(1))
+
+        states = self._episode(1, 3)
+        sut.store(states[0], 0, 1, states[1])
+        sut.store(states[1], 1, 2, states[2])
+        sut.store(states[2], 0, 3, None)
+        # 2 frames of the first state and one frame per next state.
+        self.assertEqual(sut._positions[0], 4)
+        self.assertEqual(sut.size(), 3)
+
+        samples = sut.sample_minibatch(5)
+        np.testing.assert_array_equal(samples.indices, [1, 2, 3])
+        np.testing.assert_array_equal(samples.states, states[:3])
+        self.assertEqual(samples.states.dtype, np.uint8)
+        np.testing.assert_array_equal(samples.actions, [0, 1, 0])
+        np.testing.assert_array_equal(samples.rewards, [1, 2, 3])
+        np.testing.assert_array_equal(samples.done, [False, False, True])
+        np.testing.assert_array_equal(
+            samples.next_states, [states[1], states[2], [[0], [0]]])
+        self.assertIsNone(samples.priorities)
+
+        # A new episode starts a new chain of frames.
+        states = self._episode(5, 1)
+        sut.store(states[0], 1, 4, states[1])
+        self.assertEqual(sut._positions[0], 7)
+        samples = sut.sample_minibatch(5)
+        np.testing.assert_array_equal(samples.indices, [1, 2, 3, 5])
+        np.testing.assert_array_equal(samples.states[3], states[0])
+        np.testing.assert_array_equal(samples.next_states[3], states[1])
+
+        self.assertRaises(
+            ValueError, sut.store, states[0], 0, 0, states[0])
+
+    def test_overwrite(self):
+        sut = FrameReplayMemory(6, 2, (1,), np.float32)
+        states = self._episode(1, 3)
+        for i in range(3):
+            sut.store(states[i], 0, i, states[i + 1])
+        self.assertEqual(sut.size(), 3)
+
+        # Wraps around and overwrites the first two frames, which
+        # invalidates the transitions whose states contain them.
+        states = self._episode(10, 1)
+        sut.store(states[0], 0, 3, states[1])
+        self.assertEqual(sut._positions[0], 2)
+        self.assertEqual(sut.size(), 2)
+
+        samples = sut.sample_minibatch(5)
+        np.testing.assert_array_equal(samples.indices, [0, 3])
+        np.testing.assert_array_equal(samples.states[0], states[0])
+        np.testing.assert_array_equal(samples.next_states[0], states[1])
+        np.testing.assert_array_equal(samples.states[1], [[2], [3]])
+        np.testing.assert_array_equal(samples.next_states[1], [[3], [4]])
+
+        samples = sut.sample_minibatch(1)
+        self.assertEqual(len(samples.indices), 1)
+
+    def test_streams(self):
+        sut = FrameReplayMemory(10, 2, (1,), num_streams=2)
+        self.assertEqual(sut.num_streams, 2)
+        # Two environments whose transitions are stored interleaved.
+        states = [self._episode(1, 2), self._episode(11, 2)]
+        for i in range(2):
+            for stream in range(2):
+                sut.store(states[stream][i], stream, i,
+                          states[stream][i + 1], stream=stream)
+        # Every stream shares frames between its own transitions.
+        np.testing.assert_array_equal(sut._positions, [4, 9])
+        self.assertEqual(sut.size(), 4)
+
+        samples = sut.sample_minibatch(5)
+        np.testing.assert_array_equal(samples.indices, [1, 2, 6, 7])
+        np.testing.assert_array_equal(
+            samples.states, states[0][:2] + states[1][:2])
+        np.testing.assert_array_equal(
+            samples.next_states, states[0][1:] + states[1][1:])
+        np.testing.assert_array_equal(samples.actions, [0, 0, 1, 1])
+
+        # Stream 1 wraps around within its own buffer.
+        sut.store(states[1][2], 1, 2, [[13], [14]], stream=1)
+        np.testing.assert_array_equal(sut._positions, [4, 5])
+        samples = sut.sample_minibatch(5)
+        np.testing.assert_array_equal(samples.indices, [1, 2, 6, 7, 8])
+        np.testing.assert_array_equal(samples.next_states[4], [[13], [14]])
+
+        # Streams that cannot hold a state are rejected.
+        self.assertRaises(ValueError, FrameReplayMemory, 10, 2, (1,),
+                          num_streams=4)
+
+    def test_prioritized_sampling(self):
+        sut = FrameReplayMemory(20, 2, (1,), prioritized=True)
+        states = self._episode(1, 3)
+        sut.store(states[0], 0, 0, states[1], 1)
+        sut.store(states[1], 0, 0, states[2], 3)
+        sut.store(states[2], 0, 0, None)
+        # Without a priority, the largest one seen so far is used.
+        self.assertEqual(sut.total_priority(), 7)
+
+        np.random.seed(0)
+        counts = np.bincount(np.concatenate(
+            [sut.sample_minibatch(7).indices for _ in range(1000)]),
+            minlength=4)
+        np.testing.assert_allclose(counts / 7000.0,
+                                   [0, 1 / 7., 3 / 7., 3 / 7.], atol=0.05)
+
+        sut.update_priority([1, 3, 0], [2, 0.5, 4])
+        # Slots that are not transitions keep a zero priority.
+        self.assertEqual(sut.total_priority(), 5.5)
+        samples = sut.sample_minibatch(3)
+        np.testing.assert_array_equal(
+            samples.priorities, [[0, 2, 3, 0.5][i] for i in samples.indices])
@@ -7,9 +7,11 @@ Core numerical constructs.
 
 * :class:`NDArrayView`
 * :class:`Value`
+* :class:`StagingBufferPool`
 """
 
 
+import collections
 import warnings
 import numbers
 import numpy as np
@@ -30,6 +32,22 @@ def _is_c_contiguous(data):
     return data.flags.c_contiguous
 
 
+def _sparse_to_csr(ndav, shape):
+    '''
+    Converts the sparse NDArrayView `ndav` of the given (row major) `shape`
+    into a SciPy CSR matrix of shape ``(prod(shape[:-1]), shape[-1])``.
+
+    CNTK keeps sparse data column major in CSC format, which has the same
+    memory layout as CSR on the reversed shape. The buffers are therefore
+    copied over directly, without going through a dense intermediate.
+    '''
+    data, indices, indptr = ndav.to_csr_buffers()
+    num_rows = int(np.prod(shape[:-1])) if len(shape) > 1 else 1
+    num_cols = shape[-1] if shape else 1
+    return sparse.csr_matrix((data, indices, indptr),
+                             shape=(num_rows, num_cols))
+
+
 class NDArrayView(cntk_py.NDArrayView):
     '''
     Creates an empty dense internal data representation of a
@@ -55,7 +73,7 @@ class NDArrayView(cntk_py.NDArrayView):
                                           device)
 
     @staticmethod
-    @typemap
+    @typemap(returns=cntk_py.NDArrayView)
     def from_dense(np_array, device=None, read_only=False, borrow=False):
         '''
         Create an :class:`NDArrayView` instance from a NumPy array.
@@ -90,7 +108,7 @@ class NDArrayView(cntk_py.NDArrayView):
         return cntk_py.NDArrayView(np_array, device, read_only, borrow)
 
     @staticmethod
-    @typemap
+    @typemap(returns=cntk_py.NDArrayView)
     def from_csr(csr_array, device=None, read_only=False, borrow=False, shape=None):
         '''
         Create an :class:`NDArrayView` instance from a SciPy sparse array in CSR
@@ -141,7 +159,7 @@ class NDArrayView(cntk_py.NDArrayView):
                                    read_only, borrow)
 
     @staticmethod
-    @typemap
+    @typemap(returns=cntk_py.NDArrayView)
     def from_data(data, device=None, read_only=False, borrow=False):
         '''
         Create an :class:`NDArrayView` instance from a NumPy or SciPy sparse
@@ -183,7 +201,7 @@ class NDArrayView(cntk_py.NDArrayView):
         '''
         return super(NDArrayView, self).shape().dimensions()
 
-    @typemap
+    @typemap(returns=cntk_py.NDArrayView)
     def slice_view(self, start_offset, extent, read_only=True):
         '''
         Returns a sliced view of the instance.
@@ -212,7 +230,7 @@ class NDArrayView(cntk_py.NDArrayView):
                 read_only)
 
     @property
-    @typemap
+    @typemap(returns=cntk_py.DeviceDescriptor)
     def device(self):
         '''
         Retrieves the :class:`~cntk.device.DeviceDescriptor` instance.
@@ -291,13 +309,33 @@ class Value(cntk_py.Value):
             if variable is None:
                 raise ValueError('cannot convert sparse value to sequences '
                                  'without the corresponding variable')
-            network = _sparse_to_dense_network_cache(variable.shape, True, self.device)
 
-            warnings.warn('converting Value object to CSR format might be slow')
+            if len(variable.shape) != 1:
+                network = _sparse_to_dense_network_cache(variable.shape, True, self.device)
+
+                warnings.warn('converting Value object to CSR format might be slow')
+
+                dense_data = network.eval(self, device=self.device)
+                return [sparse.csr_matrix(seq) for seq in dense_data]
 
-            # TODO: Add direct conversion, since creating an intermediate array might be slow
-            dense_data = network.eval(self, device=self.device)
-            return [sparse.csr_matrix(seq) for seq in dense_data]
+            shape = self.shape
+            num_sequences = shape[0]
+            max_length = shape[1] if len(shape) > 2 else 1
+
+            csr = _sparse_to_csr(self.data, shape)
+
+            has_mask = super(Value, self).mask() is not None
+            if has_mask:
+                valid = self.mask.reshape(-1) != cntk_py.MaskKind_Invalid
+                lengths = valid.reshape(num_sequences, max_length).sum(axis=1)
+                if not valid.all():
+                    csr = csr[np.flatnonzero(valid)]
+            else:
+                lengths = np.full(num_sequences, max_length, dtype=np.int64)
+
+            ends = np.cumsum(lengths)
+            return [csr[end - length:end]
+                    for end, length in zip(ends, lengths)]
 
         else:
             # Checking for mask without retrieving
@@ -364,7 +402,7 @@ class Value(cntk_py.Value):
         return sample
 
     @staticmethod
-    @typemap
+    @typemap(returns=cntk_py.Value)
     def create(var, data, seq_starts=None, device=None, read_only=False):
         '''
         Creates a :class:`~cntk.core.Value` object.
@@ -467,11 +505,149 @@ class Value(cntk_py.Value):
 
         return value
 
+    @staticmethod
+    @typemap(returns=cntk_py.Value)
+    def from_packed(var, data, offsets, seq_starts=None, device=None,
+                    read_only=False):
+        '''
+        Creates a :class:`~cntk.core.Value` object from a batch of sequences
+        that are packed back to back into one array. In contrast to
+        :meth:`create`, no NDArrayView is created per sequence; the data is
+        padded with NumPy and the masked Value is created in one native call.
+
+        Example:
+            >>> x = C.sequence.input_variable(2)
+            >>> data = np.arange(10, dtype=np.float32).reshape(5, 2)
+            >>> value = C.Value.from_packed(x, data, [0, 3, 5])
+            >>> value.shape
+            (2, 3, 2)
+            >>> [seq.shape for seq in value.as_sequences(x)]
+            [(3, 2), (2, 2)]
+
+        Args:
+            var (:class:`~cntk.variables.Variable`): variable into which
+             ``data`` is passed
+            data (NumPy array or SciPy sparse CSR matrix): the steps of all
+             sequences of shape ``(total_steps,) + var.shape``. For sparse
+             data, the rows are the flattened leading axes, i.e. the shape is
+             ``(total_steps * prod(var.shape[:-1]), var.shape[-1])``.
+            offsets (list or NumPy array of integers): start offset of every
+             sequence in ``data`` followed by ``total_steps``
+            seq_starts (list of `bool`\\ s or None): if None, every sequence is
+             treated as a new sequence. Otherwise, it is interpreted as a list of
+             Booleans that tell whether a sequence is a new sequence (`True`) or a
+             continuation of the sequence in the same slot of the previous
+             minibatch (`False`)
+            device (:class:`~cntk.device.DeviceDescriptor`, default None): device
+             this value should be put on
+            read_only (bool, default False): whether the data is read only
+
+        Returns:
+            :class:`~cntk.core.Value` object.
+        '''
+        if not isinstance(var, cntk_py.Variable):
+            raise TypeError('Variable expected, but got "%s"' % type(var))
+
+        if device is None:
+            device = use_default_device()
+
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if offsets.ndim != 1 or len(offsets) < 2:
+            raise ValueError('offsets must be a flat list of at least two '
+                             'entries')
+        lengths = np.diff(offsets)
+        if offsets[0] != 0 or (lengths < 1).any():
+            raise ValueError('offsets must start at 0 and every sequence '
+                             'needs at least one step')
+
+        if seq_starts is not None and len(seq_starts) != len(lengths):
+            raise ValueError('got %d sequence start flags for %d sequences'
+                             % (len(seq_starts), len(lengths)))
+
+        sample_shape = tuple(var.shape)
+        num_sequences = len(lengths)
+        max_length = int(lengths.max())
+        num_steps = int(offsets[-1])
+
+        padded_steps = Value._padded_steps(offsets, lengths, max_length)
+
+        padded_shape = (num_sequences, max_length) + sample_shape
+
+        if sparse.issparse(data):
+            if not sparse.isspmatrix_csr(data):
+                raise TypeError("only CSR is supported as of now. Please "
+                                "convert your data using 'tocsr()'")
+            data = Value._as_best_data_type(var, data)
+            rows_per_step = int(np.prod(sample_shape[:-1]))
+            if data.shape[0] != num_steps * rows_per_step:
+                raise ValueError('data has %d rows, but the offsets describe '
+                                 '%d steps of %d rows each'
+                                 % (data.shape[0], num_steps, rows_per_step))
+
+            indptr = data.indptr
+            if padded_steps is not None:
+                indptr = Value._pad_csr_indptr(indptr, padded_steps,
+                                               rows_per_step,
+                                               num_sequences * max_length)
+
+            ndav = cntk_py.NDArrayView(padded_shape, data.data,
+                    indptr.astype(np.int32), data.indices.astype(np.int32),
+                    device, read_only, False)
+
+        else:
+            data = Value._as_best_data_type(var, np.asarray(data))
+            if data.shape != (num_steps,) + sample_shape:
+                raise ValueError('data of shape %s does not match the %d steps '
+                                 'of shape %s described by the offsets'
+                                 % (str(data.shape), num_steps,
+                                    str(sample_shape)))
+
+            if padded_steps is not None:
+                padded = np.zeros((num_sequences * max_length,) + sample_shape,
+                                  dtype=data.dtype)
+                padded[padded_steps] = data
+                data = padded
+
+            data = np.ascontiguousarray(data).reshape(padded_shape)
+            ndav = NDArrayView.from_dense(data, device, read_only)
+
+        return cntk_py.Value.create_from_padded(ndav, lengths.tolist(),
+                                                list(seq_starts or []))
+
+    @staticmethod
+    def _padded_steps(offsets, lengths, max_length):
+        '''
+        Position of every step of the packed sequences in the padded
+        ``(num_sequences, max_length)`` layout, or None if no padding is
+        needed.
+        '''
+        if (lengths == max_length).all():
+            return None
+        return np.arange(offsets[-1]) + \
+            np.repeat(np.arange(len(lengths)) * max_length - offsets[:-1],
+                      lengths)
+
+    @staticmethod
+    def _pad_csr_indptr(indptr, padded_steps, rows_per_step, num_padded_steps):
+        '''
+        Row pointers of a CSR matrix of packed steps with ``rows_per_step``
+        rows each, after moving the steps to ``padded_steps`` and inserting
+        empty rows for the padding.
+        '''
+        padded_rows = (padded_steps[:, None] * rows_per_step +
+                       np.arange(rows_per_step)).reshape(-1)
+        row_nnz = np.zeros(num_padded_steps * rows_per_step, dtype=np.int64)
+        row_nnz[padded_rows] = np.diff(indptr)
+        padded_indptr = np.zeros(len(row_nnz) + 1, dtype=np.int64)
+        np.cumsum(row_nnz, out=padded_indptr[1:])
+        return padded_indptr
+
     ONE_HOT_SKIP = cntk_py.Value.one_hot_skip
 
     @staticmethod
-    @typemap
-    def one_hot(batch, num_classes, dtype=None, device=None):
+    @typemap(returns=cntk_py.Value)
+    def one_hot(batch, num_classes, dtype=None, device=None,
+                sequence_lengths=None, offsets=None):
         '''
         Converts ``batch`` into a :class:`~cntk.core.Value` object of ``dtype``
         such that the integer data in ``batch`` is interpreted as the indices
@@ -512,14 +688,35 @@ class Value(cntk_py.Value):
                    [ 0.,  0.,  0.,  0.,  0.,  1.],
                    [ 0.,  0.,  0.,  1.,  0.,  0.],
                    [ 0.,  0.,  1.,  0.,  0.,  0.]], dtype=float32)
+            >>> # packed indices of all sequences plus their lengths:
+            >>> num_classes = 6
+            >>> sparse_indices = np.asarray([1,5,3,2], dtype=np.int32)
+            >>> i0 = C.sequence.input_variable(shape=num_classes, is_sparse=True)
+            >>> z = C.times(i0, np.eye(num_classes))
+            >>> value = C.Value.one_hot(sparse_indices, num_classes, sequence_lengths=[3,1])
+            >>> z.eval({i0: value})
+            [array([[ 0.,  1.,  0.,  0.,  0.,  0.],
+                   [ 0.,  0.,  0.,  0.,  0.,  1.],
+                   [ 0.,  0.,  0.,  1.,  0.,  0.]], dtype=float32), array([[ 0.,  0.,  1.,  0.,  0.,  0.]], dtype=float32)]
 
         Args:
-            batch (list of lists of integers): batch input data of indices
+            batch (list of lists of integers or NumPy array): batch input data
+             of indices. A flat integer NumPy array is converted without
+             creating Python objects per element. Together with
+             ``sequence_lengths`` or ``offsets`` it holds the packed indices
+             of all sequences, otherwise every entry is its own sample.
+             Only ``np.uint64`` arrays can hold ``Value.ONE_HOT_SKIP``.
             sample_shape (int or tuple): number of classes or shape of each
              sample whose trailing axis is one_hot
             dtype (`np.float32`, `np.float64`, `np.float16`, default None): data type
             device (:class:`~cntk.device.DeviceDescriptor`, default None): device
              this value should be put on
+            sequence_lengths (list or NumPy array of integers, default None):
+             number of samples of each sequence in the flat ``batch``
+            offsets (list or NumPy array of integers, default None): start
+             offsets (in samples) of the sequences in the flat ``batch``
+             followed by the total number of samples. Cannot be combined
+             with ``sequence_lengths``.
 
         Returns:
             ``batch`` converted into a :class:`~Value` object that can be passed to
@@ -533,6 +730,15 @@ class Value(cntk_py.Value):
         else:
             sample_shape = num_classes
 
+        if sequence_lengths is not None or offsets is not None:
+            return Value._one_hot_from_packed(batch, sample_shape,
+                    sequence_lengths, offsets, dtype, device)
+
+        if isinstance(batch, np.ndarray) and batch.ndim == 1 and \
+                np.issubdtype(batch.dtype, np.integer):
+            return Value._one_hot_from_packed(batch, sample_shape,
+                    None, None, dtype, device)
+
         if isinstance(batch, np.ndarray):
             batch = batch.tolist()
         elif not isinstance(batch, list): # TODO: allow general iterables
@@ -569,6 +775,92 @@ class Value(cntk_py.Value):
             value = Value(data)
         return value
 
+    @staticmethod
+    def _one_hot_to_csr_buffers(indices, sample_shape, dtype):
+        '''
+        Builds the CSR buffers ``(data, indices, indptr)`` with one row per
+        one-hot vector from the flat integer array ``indices``. Entries equal
+        to ONE_HOT_SKIP yield empty rows.
+        '''
+        indices = np.asarray(indices)
+        if indices.ndim != 1 or not np.issubdtype(indices.dtype, np.integer):
+            raise ValueError('packed one-hot indices must be a flat array of '
+                             'integers, but got dtype "%s" and shape %s'
+                             % (indices.dtype, str(indices.shape)))
+
+        num_classes = sample_shape[-1]
+        valid = indices != Value.ONE_HOT_SKIP
+        columns = indices[valid]
+        if len(columns) and (columns.min() < 0 or columns.max() >= num_classes):
+            raise ValueError('one-hot indices must be in the range [0, %d)'
+                             % num_classes)
+
+        indptr = np.zeros(len(indices) + 1, dtype=np.int32)
+        np.cumsum(valid, out=indptr[1:])
+
+        return np.ones(len(columns), dtype=dtype), columns.astype(np.int32), indptr
+
+    @staticmethod
+    def _one_hot_from_packed(batch, sample_shape, sequence_lengths, offsets,
+                             dtype, device):
+        if dtype is None:
+            dtype = np.float32
+        if dtype not in (np.float32, np.float64, np.float16):
+            raise ValueError('one_hot() only supports float32, float64 and '
+                             'float16, but got "%s"' % dtype)
+
+        if sequence_lengths is not None and offsets is not None:
+            raise ValueError('specify either sequence_lengths or offsets, '
+                             'but not both')
+
+        sample_shape = tuple(sample_shape)
+        # Number of one-hot vectors per sample, e.g. 2 for shape (2, classes)
+        vectors_per_sample = int(np.prod(sample_shape[:-1]))
+
+        data, columns, indptr = Value._one_hot_to_csr_buffers(
+                batch, sample_shape, dtype)
+        num_vectors = len(indptr) - 1
+        if num_vectors % vectors_per_sample:
+            raise ValueError('number of indices (%d) is not a multiple of the '
+                             'number of one-hot vectors per sample (%d)'
+                             % (num_vectors, vectors_per_sample))
+        num_samples = num_vectors // vectors_per_sample
+
+        if sequence_lengths is None and offsets is None:
+            # No sequence axis: every sample is one batch entry
+            ndav = cntk_py.NDArrayView((num_samples,) + sample_shape, data,
+                                       indptr, columns, device, False, False)
+            return Value(ndav)
+
+        if offsets is None:
+            sequence_lengths = np.asarray(sequence_lengths, dtype=np.int64)
+            offsets = np.zeros(len(sequence_lengths) + 1, dtype=np.int64)
+            np.cumsum(sequence_lengths, out=offsets[1:])
+        else:
+            offsets = np.asarray(offsets, dtype=np.int64)
+            sequence_lengths = np.diff(offsets)
+
+        if len(sequence_lengths) == 0 or (sequence_lengths < 1).any():
+            raise ValueError('every sequence needs at least one sample')
+        if offsets[0] != 0 or offsets[-1] != num_samples:
+            raise ValueError('sequences cover %d samples, but %d samples were '
+                             'given' % (offsets[-1] - offsets[0], num_samples))
+
+        # One CSR NDArrayView over all padded sequences, masked natively
+        num_sequences = len(sequence_lengths)
+        max_length = int(sequence_lengths.max())
+        padded_steps = Value._padded_steps(offsets, sequence_lengths,
+                                           max_length)
+        if padded_steps is not None:
+            indptr = Value._pad_csr_indptr(indptr, padded_steps,
+                                           vectors_per_sample,
+                                           num_sequences * max_length)
+        ndav = cntk_py.NDArrayView((num_sequences, max_length) + sample_shape,
+                                   data, indptr.astype(np.int32, copy=False),
+                                   columns, device, False, False)
+        return cntk_py.Value.create_from_padded(
+            ndav, sequence_lengths.tolist(), [])
+
     @property
     def shape(self):
         '''
@@ -599,7 +891,7 @@ class Value(cntk_py.Value):
         return super(Value, self).mask().asarray()
 
     @property
-    @typemap
+    @typemap(returns=cntk_py.NDArrayView)
     def data(self):
         '''
         Retrieves the underlying :class:`NDArrayView` instance.
@@ -613,7 +905,7 @@ class Value(cntk_py.Value):
         return self.shape[0]
 
     @property
-    @typemap
+    @typemap(returns=cntk_py.DeviceDescriptor)
     def device(self):
         '''
         Retrieves the :class:`~cntk.device.DeviceDescriptor` instance.
@@ -649,6 +941,131 @@ class Value(cntk_py.Value):
         return data_type_to_dtype(self.get_data_type())
 
 
+class _StagingBuffer(object):
+    '''
+    A host NumPy array together with the CNTK Value that is bound to it. On
+    CPU, the Value borrows the array's memory. On other devices, it owns
+    device memory and ``host_view`` is used to copy between the two.
+    '''
+
+    def __init__(self, shape, dtype, device):
+        self.array = np.zeros(shape, dtype=dtype)
+        self.host_view = NDArrayView.from_dense(self.array, cpu(), borrow=True)
+        if device.type() == DeviceKind.CPU:
+            self.view = self.host_view
+        else:
+            self.view = NDArrayView(shape, dtype, device)
+        self.value = cntk_py.Value(self.view)
+        self.on_host = self.view is self.host_view
+
+    def upload(self):
+        if not self.on_host:
+            self.view.copy_from(self.host_view)
+
+    def download(self):
+        if not self.on_host:
+            self.host_view.copy_from(self.view)
+
+
+class StagingBufferPool(object):
+    '''
+    Pool of preallocated :class:`Value` objects for dense minibatches.
+
+    Converting a NumPy minibatch to a :class:`Value` allocates new storage
+    for every call. When passed to
+    :meth:`~cntk.train.trainer.Trainer.train_minibatch`, the pool instead
+    copies every dense NumPy minibatch into a staging buffer of the same
+    shape, data type and device that was allocated by an earlier call. The
+    buffers are handed out by :meth:`value` and returned to the pool by
+    :meth:`release` once the Values have been consumed.
+
+    Minibatches that are given as lists of sequences, as sparse matrices,
+    with sequence start information or in a data type other than the one
+    of their variable are converted as usual.
+
+    Example:
+        >>> pool = C.StagingBufferPool()
+        >>> x = C.input_variable(2)
+        >>> for i in range(3):
+        ...     value = pool.value(x, np.ones((4, 2), dtype=np.float32))
+        ...     pool.release()
+        >>> pool.allocations, pool.reuses
+        (1, 2)
+
+    Args:
+        max_shapes (int, default 16): number of distinct (shape, data type,
+         device) combinations whose buffers are kept. The least recently
+         used buffers are dropped beyond that.
+    '''
+
+    def __init__(self, max_shapes=16):
+        if max_shapes < 1:
+            raise ValueError('max_shapes must be at least 1')
+        self.max_shapes = max_shapes
+        self.allocations = 0
+        self.reuses = 0
+        # (shape, dtype, device kind, device id) -> free buffers
+        self._free = collections.OrderedDict()
+        self._in_use = []
+
+    def value(self, var, data, device=None):
+        '''
+        Copies ``data`` into a staging buffer and returns its Value.
+
+        Args:
+            var (:class:`~cntk.variables.Variable`): variable into which
+             ``data`` is passed
+            data (numpy.ndarray): the dense minibatch
+            device (:class:`~cntk.device.DeviceDescriptor`, default None):
+             device the value should be put on
+
+        Returns:
+            :class:`Value` that is valid until the next :meth:`release`, or
+            None if ``data`` cannot be staged
+        '''
+        if not isinstance(data, np.ndarray) or not var.dynamic_axes or \
+                var.is_sparse or data.dtype != var.dtype:
+            return None
+
+        if device is None:
+            device = use_default_device()
+        key = (data.shape, data.dtype.str, device.type(), device.id())
+
+        free = self._free.pop(key, [])
+        if free:
+            buf = free.pop()
+            self.reuses += 1
+        else:
+            buf = _StagingBuffer(data.shape, data.dtype, device)
+            self.allocations += 1
+        self._free[key] = free
+        while len(self._free) > self.max_shapes:
+            self._free.popitem(last=False)
+
+        np.copyto(buf.array, data)
+        buf.upload()
+        self._in_use.append((key, buf))
+        return buf.value
+
+    def release(self):
+        '''
+        Returns all buffers handed out by :meth:`value` to the pool. Their
+        Values must not be used afterwards.
+        '''
+        for key, buf in self._in_use:
+            if key in self._free:
+                self._free[key].append(buf)
+        self._in_use = []
+
+    def clear(self):
+        '''
+        Drops all free buffers and resets the statistics.
+        '''
+        self._free.clear()
+        self.allocations = 0
+        self.reuses = 0
+
+
 def user_function(user_func):
     '''
     Wraps the passed Function to create a composite representing the
@@ -9,4 +9,7 @@ Utilities for model evaluation.
 """
 
 
-from .evaluator import *
\ No newline at end of file
+from .evaluator import *
+from .inference import InferenceSession
+from .batching import DynamicBatcher
+from .pool import InferencePool
\ No newline at end of file
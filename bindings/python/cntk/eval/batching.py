@@ -0,0 +1,250 @@
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+
+import time
+import threading
+import numpy as np
+try:
+    import queue
+except ImportError:
+    import Queue as queue # Python 2.7
+try:
+    from concurrent.futures import Future
+except ImportError: # Python 2.7 without the 'futures' backport
+    Future = None
+
+from .inference import InferenceSession
+
+__doc__ = '''\
+Dynamic micro-batching of single-sample evaluation requests.
+'''
+
+# Clock for the latency budget: monotonic where available (Python 3.3+)
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class _Result(object):
+    '''
+    Minimal stand-in for :class:`concurrent.futures.Future` on Python 2.7
+    installations without the ``futures`` backport.
+    '''
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._exception = None
+
+    def set_result(self, result):
+        self._result = result
+        self._done.set()
+
+    def set_exception(self, exception):
+        self._exception = exception
+        self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def set_running_or_notify_cancel(self):
+        return True
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise RuntimeError('timed out waiting for the result')
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class _Request(object):
+    __slots__ = ['samples', 'future', 'arrival']
+
+    def __init__(self, samples, future, arrival):
+        self.samples = samples
+        self.future = future
+        self.arrival = arrival
+
+
+_STOP = object()
+
+
+class DynamicBatcher(object):
+    '''
+    Coalesces concurrent single-sample evaluation requests into batched
+    evaluations of ``model``.
+
+    Requests are queued by :meth:`submit` or :meth:`evaluate`, which can be
+    called from any number of threads. A background thread takes the oldest
+    request and keeps collecting requests until either ``max_batch_size``
+    requests are gathered or ``max_latency`` seconds have passed since the
+    oldest one arrived. It then evaluates them as one batch with an
+    :class:`~cntk.eval.inference.InferenceSession` and hands every caller its
+    own slice of the results. Batches are padded with zeros to the next power
+    of two (at most ``max_batch_size``), so that the session only ever sees a
+    few batch sizes and keeps reusing their buffers.
+
+    From asyncio code, wrap the returned future with
+    ``asyncio.wrap_future(batcher.submit(...))``.
+
+    Example:
+        >>> x = C.input_variable(2)
+        >>> z = C.times(x, np.asarray([[1, 2], [3, 4]], dtype=np.float32))
+        >>> with C.eval.DynamicBatcher(z, max_batch_size=8) as batcher:
+        ...     batcher.evaluate(np.asarray([1, 1], dtype=np.float32))
+        array([ 4.,  6.], dtype=float32)
+
+    Args:
+        model (:class:`~cntk.ops.functions.Function`): the model to evaluate.
+         All arguments and outputs must be dense and have the batch axis
+         as their only dynamic axis.
+        max_batch_size (int): maximum number of requests per evaluation
+        max_latency (float): time in seconds that the oldest request of a
+         batch waits for further requests
+        arguments (list, optional): the model's arguments in the order in
+         which requests pass their samples. Defaults to ``model.arguments``.
+        outputs (list, optional): the outputs to compute. Defaults to
+         ``model.outputs``.
+        device (:class:`~cntk.device.DeviceDescriptor`, optional): device
+         to evaluate on. Defaults to the default device.
+    '''
+
+    def __init__(self, model, max_batch_size=32, max_latency=0.002,
+                 arguments=None, outputs=None, device=None):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be at least 1')
+        if max_latency < 0:
+            raise ValueError('max_latency must not be negative')
+
+        self._session = InferenceSession(model, arguments, outputs, device)
+        for var in self._session.arguments + self._session.outputs:
+            if len(var.dynamic_axes) != 1:
+                raise ValueError('DynamicBatcher requires all arguments and '
+                                 'outputs to have a batch axis, but "%s" '
+                                 'does not' % (var.name or var.uid))
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+
+        # batch sizes evaluated: powers of two below max_batch_size, and
+        # max_batch_size itself
+        self._bucket_sizes = [1 << i for i in range(max_batch_size.bit_length())
+                              if 1 << i < max_batch_size] + [max_batch_size]
+        self._session._max_cached_shapes = max(
+            self._session._max_cached_shapes, len(self._bucket_sizes))
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, *samples):
+        '''
+        Queues one request without waiting for its result.
+
+        Args:
+            samples: one sample (without batch axis) per argument
+
+        Returns:
+            a future whose ``result()`` is the output sample if the model has
+            one output, otherwise a tuple of output samples.
+        '''
+        future = Future() if Future is not None else _Result()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('the batcher has been closed')
+            self._queue.put(_Request(samples, future, _clock()))
+        return future
+
+    def evaluate(self, *samples):
+        '''
+        Evaluates one request and waits for its result. See :meth:`submit`.
+        '''
+        return self.submit(*samples).result()
+
+    def close(self):
+        '''
+        Evaluates the pending requests and stops the background thread.
+        '''
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = first.arrival + self.max_latency
+        while len(batch) < self.max_batch_size:
+            try:
+                # drain what is already queued, then wait for the rest of the budget
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - _clock()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if request is _STOP:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stop = self._collect(first)
+            self._evaluate(batch)
+
+    def _evaluate(self, batch):
+        shapes = [tuple(a.shape) for a in self._session.arguments]
+        requests = []
+        for request in batch:
+            if not request.future.set_running_or_notify_cancel():
+                continue # cancelled by the caller
+            if tuple(np.shape(s) for s in request.samples) != tuple(shapes):
+                request.future.set_exception(ValueError(
+                    'expected samples of shapes %s, but got %s' % (str(shapes),
+                    str([np.shape(s) for s in request.samples]))))
+                continue
+            requests.append(request)
+        if not requests:
+            return
+
+        bucket_size = next(size for size in self._bucket_sizes
+                           if size >= len(requests))
+        try:
+            inputs = []
+            for i, (shape, dtype) in enumerate(zip(shapes,
+                                                   self._session._arg_dtypes)):
+                array = np.zeros((bucket_size,) + shape, dtype=dtype)
+                for j, request in enumerate(requests):
+                    array[j] = request.samples[i]
+                inputs.append(array)
+            results = self._session.run(*inputs)
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+
+        single_output = not isinstance(results, tuple)
+        for i, request in enumerate(requests):
+            # copy, since the session reuses its output buffers
+            if single_output:
+                request.future.set_result(results[i].copy())
+            else:
+                request.future.set_result(tuple(r[i].copy() for r in results))
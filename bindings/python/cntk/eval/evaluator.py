@@ -6,6 +6,7 @@
 from .. import cntk_py 
 from ..device import use_default_device
 from cntk.internal import sanitize_var_map, sanitize_function, typemap
+from cntk.internal.sanitize import _ArgumentIndex
 from ..io import MinibatchData
 
 __doc__= '''\
@@ -74,7 +75,12 @@ class Evaluator(cntk_py.Evaluator):
         if not device:
             device = use_default_device()
 
-        arguments = sanitize_var_map(tuple(self.evaluation_function.arguments), arguments)
+        index = self.__dict__.get('_cached_argument_index')
+        if index is None:
+            # the arguments of the evaluation function do not change
+            index = _ArgumentIndex(self.evaluation_function.arguments)
+            self.__dict__['_cached_argument_index'] = index
+        arguments = sanitize_var_map(index, arguments)
         return super(Evaluator, self).test_minibatch(arguments, device, distributed)
         
     @property
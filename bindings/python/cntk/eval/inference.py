@@ -0,0 +1,249 @@
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+
+import collections
+import numpy as np
+
+from .. import cntk_py
+from ..core import NDArrayView, _StagingBuffer
+from ..device import use_default_device
+from cntk.internal import sanitize_function, sanitize_dtype_numpy, \
+    sanitize_variables_or_functions
+
+__doc__ = '''\
+An inference session evaluates a model repeatedly with a fixed set of
+arguments, outputs and device, avoiding the per-call overhead of
+:meth:`~cntk.ops.functions.Function.eval`.
+'''
+
+# Number of distinct input shapes (usually batch sizes) whose buffers are kept
+_MAX_CACHED_SHAPES = 8
+
+
+class InferenceSession(object):
+    '''
+    Binds a :class:`~cntk.ops.functions.Function` to a fixed argument order,
+    fixed outputs and a fixed device for repeated evaluation.
+
+    The inputs are sanitized once at construction time. Every :meth:`run`
+    copies the input arrays into Values that are reused across calls of the
+    same batch size and lets CNTK write the results into preallocated output
+    Values. Only dense arguments and outputs that have at most the batch axis
+    as dynamic axis are supported; use
+    :meth:`~cntk.ops.functions.Function.eval` for sequences and sparse data.
+
+    A session is not thread-safe; create one session per thread.
+
+    Example:
+        >>> x = C.input_variable(2)
+        >>> z = C.times(x, np.asarray([[1, 2], [3, 4]], dtype=np.float32))
+        >>> session = C.eval.InferenceSession(z)
+        >>> session.run(np.asarray([[1, 1]], dtype=np.float32))
+        array([[ 4.,  6.]], dtype=float32)
+
+    Args:
+        model (:class:`~cntk.ops.functions.Function`): the model to evaluate
+        arguments (list, optional): the model's arguments (variables or
+         names) in the order in which :meth:`run` takes the input arrays.
+         Defaults to ``model.arguments``.
+        outputs (list, optional): the outputs to compute. Defaults to
+         ``model.outputs``.
+        device (:class:`~cntk.device.DeviceDescriptor`, optional): device
+         to evaluate on. Defaults to the default device.
+    '''
+
+    def __init__(self, model, arguments=None, outputs=None, device=None):
+        model = sanitize_function(model)
+        if device is None:
+            device = use_default_device()
+
+        if arguments is None:
+            arguments = model.arguments
+        else:
+            arguments = [InferenceSession._find_argument(model, a)
+                         for a in arguments]
+            uids = [a.uid for a in arguments]
+            if len(set(uids)) != len(uids) or \
+                    set(uids) != set(a.uid for a in model.arguments):
+                raise ValueError('arguments must list every argument of '
+                                 'the model exactly once')
+
+        if outputs is None:
+            outputs = model.outputs
+        else:
+            outputs = [o.output if isinstance(o, cntk_py.Function) else o
+                       for o in sanitize_variables_or_functions(outputs)]
+
+        for var in list(arguments) + list(outputs):
+            if len(var.dynamic_axes) > 1 or var.is_sparse:
+                raise ValueError('InferenceSession only supports dense '
+                                 'variables without sequence axis, but "%s" '
+                                 'is not. Please use Function.eval() instead.'
+                                 % (var.name or var.uid))
+
+        for var in arguments:
+            if any(dim < 0 for dim in var.shape):
+                raise ValueError('the shape %s of argument "%s" is not fully '
+                                 'known' % (str(var.shape), var.name or var.uid))
+
+        self.model = model
+        self.arguments = tuple(arguments)
+        self.outputs = tuple(outputs)
+        self.device = device
+
+        self._arg_dtypes = [sanitize_dtype_numpy(a.dtype) for a in arguments]
+        self._arg_shapes = [tuple(a.shape) for a in arguments]
+        self._arg_batched = [len(a.dynamic_axes) == 1 for a in arguments]
+        self._out_batched = [len(o.dynamic_axes) == 1 for o in outputs]
+        self._out_known = [all(dim >= 0 for dim in o.shape) for o in outputs]
+        self._no_retain = set()
+
+        # [input shapes] -> (input buffers, output buffers)
+        self._buffers = collections.OrderedDict()
+        self._max_cached_shapes = _MAX_CACHED_SHAPES
+
+    @staticmethod
+    def _find_argument(model, arg):
+        if isinstance(arg, cntk_py.Variable):
+            return arg
+        matches = [a for a in model.arguments if a.name == arg]
+        if len(matches) != 1:
+            raise ValueError('model has %d arguments named "%s"'
+                             % (len(matches), arg))
+        return matches[0]
+
+    @staticmethod
+    def _can_bind(target, buf):
+        return buf is not None and buf.on_host and \
+            isinstance(target, np.ndarray) and \
+            target.shape == buf.array.shape and \
+            target.dtype == buf.array.dtype and \
+            target.flags.c_contiguous and target.flags.writeable
+
+    def _get_buffers(self, shapes, batch_size):
+        try:
+            buffers = self._buffers.pop(shapes)
+        except KeyError:
+            if len(self._buffers) >= self._max_cached_shapes:
+                self._buffers.popitem(last=False)
+            inputs = [_StagingBuffer(shape, dtype, self.device)
+                      for shape, dtype in zip(shapes, self._arg_dtypes)]
+            outputs = []
+            for var, batched, known in zip(self.outputs, self._out_batched,
+                                           self._out_known):
+                if not known:
+                    outputs.append(None)
+                    continue
+                shape = tuple(var.shape)
+                if batched:
+                    shape = (batch_size,) + shape
+                outputs.append(_StagingBuffer(
+                    shape, sanitize_dtype_numpy(var.dtype), self.device))
+            buffers = (inputs, outputs)
+        self._buffers[shapes] = buffers
+        return buffers
+
+    def run(self, *arrays, **kwargs):
+        '''
+        run(*arrays, out=None)
+
+        Evaluates the model on one batch.
+
+        Args:
+            arrays: one NumPy array per argument in the order of
+             ``arguments``. Batched arguments have the batch axis first.
+            out (NumPy array or list of arrays, optional): arrays to write
+             the outputs into, one per output. On CPU, a C-contiguous array
+             of the output's shape and data type is written to directly,
+             otherwise the result is copied into it.
+
+        Returns:
+            the output array if the session has one output, otherwise a
+            tuple of arrays in the order of ``outputs``. Unless ``out`` is
+            given, the arrays are owned by the session and are overwritten by
+            the next call to :meth:`run` with the same input shapes.
+        '''
+        out = kwargs.pop('out', None)
+        if kwargs:
+            raise TypeError('unexpected keyword arguments: %s'
+                            % ', '.join(kwargs))
+
+        if len(arrays) != len(self.arguments):
+            raise ValueError('expected %d input arrays, but got %d'
+                             % (len(self.arguments), len(arrays)))
+
+        batch_size = None
+        shapes = []
+        for array, var, shape, batched in zip(arrays, self.arguments,
+                                              self._arg_shapes,
+                                              self._arg_batched):
+            array_shape = np.shape(array)
+            if batched:
+                if array_shape[1:] != shape:
+                    raise ValueError('expected input of shape (N,) + %s for '
+                                     'argument "%s", but got %s'
+                                     % (str(shape), var.name or var.uid,
+                                        str(array_shape)))
+                if batch_size is not None and array_shape[0] != batch_size:
+                    raise ValueError('input arrays must have the same batch '
+                                     'size, but got %d and %d'
+                                     % (batch_size, array_shape[0]))
+                batch_size = array_shape[0]
+            elif array_shape != shape:
+                raise ValueError('expected input of shape %s for argument '
+                                 '"%s", but got %s' % (str(shape),
+                                     var.name or var.uid, str(array_shape)))
+            shapes.append(array_shape)
+
+        if out is not None:
+            if len(self.outputs) == 1 and isinstance(out, np.ndarray):
+                out = [out]
+            if len(out) != len(self.outputs):
+                raise ValueError('expected %d output arrays, but got %d'
+                                 % (len(self.outputs), len(out)))
+
+        inputs, outputs = self._get_buffers(
+            tuple(shapes), 1 if batch_size is None else batch_size)
+
+        for array, buf in zip(arrays, inputs):
+            np.copyto(buf.array, array, casting='same_kind')
+            buf.upload()
+
+        in_var_map = dict((var, buf.value)
+                          for var, buf in zip(self.arguments, inputs))
+        out_var_map = {}
+        bound = []
+        for i, (var, buf) in enumerate(zip(self.outputs, outputs)):
+            if out is not None and InferenceSession._can_bind(out[i], buf):
+                # let CNTK write into the caller's array
+                out_var_map[var] = cntk_py.Value(NDArrayView.from_dense(
+                    out[i], self.device, borrow=True))
+                bound.append(True)
+            else:
+                out_var_map[var] = buf.value if buf is not None else None
+                bound.append(False)
+
+        cntk_py.Function._forward(self.model, in_var_map, out_var_map,
+                                  self.device, self._no_retain)
+
+        results = []
+        for var, buf, is_bound in zip(self.outputs, outputs, bound):
+            if is_bound:
+                results.append(None)
+            elif buf is None:
+                results.append(out_var_map[var].data().to_ndarray())
+            else:
+                buf.download()
+                results.append(buf.array)
+
+        if out is not None:
+            for target, result in zip(out, results):
+                if result is not None:
+                    np.copyto(target, result)
+            results = out
+
+        if len(results) == 1:
+            return results[0]
+        return tuple(results)
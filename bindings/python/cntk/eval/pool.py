@@ -0,0 +1,173 @@
+# Copyright (c) Microsoft. All rights reserved.
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+
+import multiprocessing
+import threading
+try:
+    import queue
+except ImportError:
+    import Queue as queue # Python 2.7
+
+from ..ops import combine
+from ..ops.functions import CloneMethod
+from .inference import InferenceSession
+from .batching import Future, _Result
+
+__doc__ = '''\
+Concurrent evaluation of a model on several CPU cores.
+'''
+
+_STOP = object()
+
+
+class InferencePool(object):
+    '''
+    Evaluates batches concurrently on ``num_instances`` instances of a model.
+
+    Every instance is a clone of ``model`` made with
+    ``clone(CloneMethod.share)``, so all instances share the memory of the
+    parameters, and is driven by its own worker thread through an
+    :class:`~cntk.eval.inference.InferenceSession`. The forward pass releases
+    the GIL, so on many-core machines the instances run in parallel. To avoid
+    oversubscribing the cores, limit the number of threads that every
+    instance uses for a single operation, e.g. with
+    ``cntk.cntk_py.set_max_num_cpu_threads(1)``.
+
+    Example:
+        >>> x = C.input_variable(2)
+        >>> z = C.times(x, np.asarray([[1, 2], [3, 4]], dtype=np.float32))
+        >>> batches = [np.asarray([[1, 1]], dtype=np.float32),
+        ...            np.asarray([[1, 0], [0, 1]], dtype=np.float32)]
+        >>> with C.eval.InferencePool(z, num_instances=2) as pool:
+        ...     pool.map(batches)
+        [array([[ 4.,  6.]], dtype=float32), array([[ 1.,  2.],
+               [ 3.,  4.]], dtype=float32)]
+
+    Args:
+        model (:class:`~cntk.ops.functions.Function`): the model to evaluate.
+         The same restrictions as for
+         :class:`~cntk.eval.inference.InferenceSession` apply.
+        num_instances (int, optional): number of model instances and worker
+         threads. Defaults to the number of CPUs.
+        arguments (list, optional): the model's arguments in the order in
+         which batches pass their arrays. Defaults to ``model.arguments``.
+        outputs (list, optional): the outputs to compute. Defaults to
+         ``model.outputs``.
+        device (:class:`~cntk.device.DeviceDescriptor`, optional): device
+         to evaluate on. Defaults to the default device.
+    '''
+
+    def __init__(self, model, num_instances=None, arguments=None,
+                 outputs=None, device=None):
+        if num_instances is None:
+            num_instances = multiprocessing.cpu_count()
+        if num_instances < 1:
+            raise ValueError('num_instances must be at least 1')
+
+        # resolve arguments and outputs once on the original model, then
+        # locate them in the clones by position
+        session = InferenceSession(model, arguments, outputs, device)
+        root = combine(list(session.outputs))
+        uids = [a.uid for a in root.arguments]
+        positions = [uids.index(a.uid) for a in session.arguments]
+
+        self.arguments = session.arguments
+        self.outputs = session.outputs
+        self.device = session.device
+        self.num_instances = num_instances
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._threads = []
+        self._sessions = []
+        for _ in range(num_instances):
+            # every instance is a clone, so that no worker evaluates the
+            # caller's graph while the caller might be using it
+            instance = root.clone(CloneMethod.share)
+            session = InferenceSession(
+                instance, [instance.arguments[p] for p in positions],
+                device=self.device)
+            self._sessions.append(session)
+            thread = threading.Thread(target=self._run, args=(session,))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, *arrays):
+        '''
+        Queues the evaluation of one batch without waiting for its result.
+
+        Args:
+            arrays: one NumPy array per argument in the order of
+             ``arguments``. Batched arguments have the batch axis first.
+
+        Returns:
+            a future whose ``result()`` is the output array if the model has
+            one output, otherwise a tuple of output arrays.
+        '''
+        future = Future() if Future is not None else _Result()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('the pool has been closed')
+            self._queue.put((arrays, future))
+        return future
+
+    def map(self, batches):
+        '''
+        Evaluates the batches concurrently.
+
+        Args:
+            batches (iterable): the batches to evaluate. If the model has one
+             argument, a batch is a NumPy array, otherwise it is a tuple with
+             one array per argument.
+
+        Returns:
+            list of the results of :meth:`submit` in the order of ``batches``
+        '''
+        if len(self.arguments) == 1:
+            futures = [self.submit(batch) for batch in batches]
+        else:
+            futures = [self.submit(*batch) for batch in batches]
+        return [future.result() for future in futures]
+
+    def close(self):
+        '''
+        Evaluates the pending batches and stops the worker threads.
+        '''
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            for _ in self._threads:
+                self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _run(self, session):
+        while True:
+            task = self._queue.get()
+            if task is _STOP:
+                break
+            arrays, future = task
+            if not future.set_running_or_notify_cancel():
+                continue # cancelled by the caller
+            try:
+                # copy, since the session reuses its output buffers
+                result = session.run(*arrays)
+                if isinstance(result, tuple):
+                    result = tuple(r.copy() for r in result)
+                else:
+                    result = result.copy()
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
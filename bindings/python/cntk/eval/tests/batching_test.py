@@ -0,0 +1,48 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+
+import threading
+import numpy as np
+import pytest
+import cntk as C
+from cntk.ops.tests.ops_test_utils import cntk_device
+
+
+def test_dynamic_batcher(device_id):
+    dev = cntk_device(device_id)
+    x = C.input_variable(3)
+    w = np.arange(6, dtype=np.float32).reshape(3, 2)
+    z = C.times(x, w)
+
+    samples = np.random.rand(64, 3).astype(np.float32)
+    expected = z.eval({x: samples}, device=dev)
+    results = [None] * len(samples)
+
+    with C.eval.DynamicBatcher(z, max_batch_size=8, max_latency=0.01, device=dev) as batcher:
+        def client(i):
+            results[i] = batcher.evaluate(samples[i])
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(len(samples))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for result, e in zip(results, expected):
+            assert result.shape == (2,)
+            assert np.allclose(result, e)
+
+        # batches are padded to a few sizes, whose buffers are all cached
+        batch_sizes = [shapes[0][0] for shapes in batcher._session._buffers]
+        assert set(batch_sizes) <= set([1, 2, 4, 8])
+
+        # a malformed request fails on its own
+        with pytest.raises(ValueError):
+            batcher.submit(np.zeros(4, dtype=np.float32)).result()
+        assert np.allclose(batcher.evaluate(samples[0]), expected[0])
+
+    with pytest.raises(RuntimeError):
+        batcher.submit(samples[0])
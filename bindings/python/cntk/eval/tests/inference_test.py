@@ -0,0 +1,65 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+
+import numpy as np
+import pytest
+import cntk as C
+from cntk.ops.tests.ops_test_utils import cntk_device
+
+
+def test_inference_session(device_id):
+    dev = cntk_device(device_id)
+    x = C.input_variable(3, name='x')
+    y = C.input_variable(2, name='y')
+    w = np.arange(6, dtype=np.float32).reshape(3, 2)
+    z = C.times(x, w) + y
+    h = C.sigmoid(z)
+    model = C.combine([z, h])
+
+    session = C.eval.InferenceSession(model, arguments=['y', 'x'], device=dev)
+
+    for batch_size in [4, 1, 4]:
+        x_data = np.random.rand(batch_size, 3).astype(np.float32)
+        y_data = np.random.rand(batch_size, 2).astype(np.float32)
+        expected = model.eval({x: x_data, y: y_data}, device=dev)
+
+        z_result, h_result = session.run(y_data, x_data)
+        assert np.allclose(z_result, expected[z.output])
+        assert np.allclose(h_result, expected[h.output])
+
+    z_out = np.empty((4, 2), dtype=np.float32)
+    h_out = np.empty((4, 2), dtype=np.float32)
+    result = session.run(y_data, x_data, out=[z_out, h_out])
+    assert result[0] is z_out and result[1] is h_out
+    assert np.allclose(z_out, expected[z.output])
+    assert np.allclose(h_out, expected[h.output])
+
+    # a non-contiguous target is filled by copying
+    h_out_t = np.empty((2, 4), dtype=np.float32).T
+    session.run(y_data, x_data, out=[z_out, h_out_t])
+    assert np.allclose(h_out_t, expected[h.output])
+
+    with pytest.raises(ValueError):
+        session.run(y_data[:2], x_data)
+
+    single = C.eval.InferenceSession(model, arguments=[x, y], outputs=[z], device=dev)
+    assert np.allclose(single.run(x_data, y_data), expected[z.output])
+
+    with pytest.raises(ValueError):
+        session.run(x_data, y_data)
+
+    with pytest.raises(ValueError):
+        C.eval.InferenceSession(model, arguments=['x'])
+
+    with pytest.raises(ValueError):
+        C.eval.InferenceSession(model, arguments=[x, y, x])
+
+    with pytest.raises(ValueError):
+        C.eval.InferenceSession(C.sigmoid(x), arguments=[x, x])
+
+    s = C.sequence.input_variable(3)
+    with pytest.raises(ValueError):
+        C.eval.InferenceSession(C.sequence.reduce_sum(s))
@@ -0,0 +1,50 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+# Licensed under the MIT license. See LICENSE.md file in the project root
+# for full license information.
+# ==============================================================================
+
+import numpy as np
+import pytest
+import cntk as C
+from cntk.ops.tests.ops_test_utils import cntk_device
+
+
+def test_inference_pool(device_id):
+    dev = cntk_device(device_id)
+    x = C.input_variable(3, name='x')
+    y = C.input_variable(2, name='y')
+    w = C.parameter(init=np.arange(6, dtype=np.float32).reshape(3, 2), device=dev)
+    z = C.times(x, w) + y
+
+    batches = [(np.random.rand(n, 3).astype(np.float32),
+                np.random.rand(n, 2).astype(np.float32))
+               for n in [1, 4, 2, 4, 3, 1, 5, 4]]
+
+    with C.eval.InferencePool(z, num_instances=3, device=dev) as pool:
+        assert pool.num_instances == 3
+        # no instance evaluates the caller's graph
+        model_uids = set(a.uid for a in z.arguments)
+        for session in pool._sessions:
+            assert not model_uids & set(a.uid for a in session.arguments)
+        results = pool.map(batches)
+        assert len(results) == len(batches)
+        for result, (x_data, y_data) in zip(results, batches):
+            assert np.allclose(result, z.eval({x: x_data, y: y_data}, device=dev))
+
+        # the instances share the parameters of the model
+        w.value = np.ones((3, 2), dtype=np.float32)
+        for result, (x_data, y_data) in zip(pool.map(batches), batches):
+            assert np.allclose(result, x_data.sum(axis=1, keepdims=True) + y_data)
+
+        with pytest.raises(ValueError):
+            pool.submit(batches[0][1], batches[0][0]).result()
+
+    with pytest.raises(RuntimeError):
+        pool.submit(*batches[0])
+
+    with C.eval.InferencePool(z, num_instances=2, arguments=['y', 'x'],
+                              device=dev) as pool:
+        x_data, y_data = batches[1]
+        assert np.allclose(pool.map([(y_data, x_data)])[0],
+                           x_data.sum(axis=1, keepdims=True) + y_data)
@@ -16,13 +16,13 @@ def _value_as_sequence(val, var):
     map_if_possible(val)
     return val.as_sequences(var)
 
-def _value_as_sequence_or_array(val, var):
+def _value_as_sequence_or_array(val, var, view=False):
     has_seq_axis = len(var.dynamic_axes) > 1
     if has_seq_axis:
         return _value_as_sequence(val, var)
     else:
         map_if_possible(val)
-        return val.asarray()
+        return val.asarray(view=view)
 
 _serialization_version = 1
 
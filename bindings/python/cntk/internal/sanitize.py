@@ -5,6 +5,7 @@
 
 import numbers
 import collections
+import threading
 import numpy as np
 import cntk as C
 
@@ -164,7 +165,8 @@ def sanitize_range(x):
     raise ValueError('Input argument must be a number or a tuple of two numbers such as the first number is smaller than or equal to the second number.')
 
 @typemap
-def sanitize_batch(var, batch, seq_starts=None, device=None):
+def sanitize_batch(var, batch, seq_starts=None, device=None,
+                   staging_pool=None):
     '''
     Convert to :class:`~cntk.core.Value`.
 
@@ -183,6 +185,9 @@ def sanitize_batch(var, batch, seq_starts=None, device=None):
          in the same slot of the previous minibatch (`False`)
         device (:class:`~cntk.device.DeviceDescriptor`, default None): device
          this value should be put on
+        staging_pool (:class:`~cntk.core.StagingBufferPool`, default None):
+         if given, dense NumPy batches are copied into its preallocated
+         buffers instead of new storage
 
     Returns:
         batch converted to a :class:`~cntk.core.Value` instance that can be
@@ -202,6 +207,11 @@ def sanitize_batch(var, batch, seq_starts=None, device=None):
         from ..device import use_default_device
         device = use_default_device()
 
+    if staging_pool is not None and not seq_starts:
+        value = staging_pool.value(var, batch, device)
+        if value is not None:
+            return value
+
     from .. import Value
     return Value.create(var, batch, seq_starts, device)
 
@@ -294,8 +304,75 @@ def sanitize_variables_or_functions(arg):
         return [sanitize_variable_or_function(arg)]
 
 
+class _ArgumentIndex(object):
+    '''
+    The arguments of a Function together with a lookup of the arguments by
+    name, which is built on first use. Functions and trainers keep an
+    instance across calls of :func:`sanitize_var_map`, so that inputs keyed
+    by names are resolved without querying the names of all arguments on
+    every call.
+    '''
+
+    def __init__(self, arguments):
+        self.arguments = tuple(arguments)
+        self._name_counter = None
+        self._var_name_map = None
+
+    def __len__(self):
+        return len(self.arguments)
+
+    def __getitem__(self, index):
+        return self.arguments[index]
+
+    def __iter__(self):
+        return iter(self.arguments)
+
+    def find_by_name(self, name):
+        if self._var_name_map is None:
+            names = [var.name for var in self.arguments]
+            self._name_counter = collections.Counter(names)
+            self._var_name_map = dict(zip(names, self.arguments))
+
+        count = self._name_counter[name]
+        if count == 0:
+            raise ValueError('variable with name "%s" does not exist in the network. Available variable names: %s' % (
+                name, ", ".join(self._var_name_map)))
+        elif count > 1:
+            raise ValueError('node name "%s" is not unique' % name)
+
+        return self._var_name_map[name]
+
+
+def _split_seq_starts(batch, seq_starts):
+    '''
+    Splits a ``(batch, seq_starts)`` tuple given for an individual variable
+    and validates its sequence begin markers.
+    '''
+    if seq_starts is not None:
+        raise ValueError('you cannot provide sequence start '
+                         'information globally and for individual batches '
+                         'at the same time')
+
+    batch, seq_starts = batch
+
+    if seq_starts is not None:
+        if not isinstance(seq_starts, (tuple, list)):
+            raise ValueError(
+                'if you specify sequence begin markers, it needs to be a list')
+
+        sample_size = batch.shape[0] if hasattr(
+            batch, 'shape') else len(batch)
+
+        if len(seq_starts) != sample_size:
+            raise ValueError('you have %i sequences, but only %i '
+                             'sequence begin markers' % (sample_size, len(seq_starts)))
+
+    return batch, seq_starts
+
+
 def sanitize_var_map(op_arguments, arguments, precision=None,
-                     device=None, extract_values_from_minibatch_data=True):
+                     device=None, extract_values_from_minibatch_data=True,
+                     staging_pool=None):
     '''
     Sanitizes a dictionary of `Variable` s to input data such that it can be
     handed off to the evaluation methods
@@ -305,10 +382,12 @@ def sanitize_var_map(op_arguments, arguments, precision=None,
     :meth:`~cntk.train.trainer.Trainer.test_minibatch`).
 
     Args:
-        op_arguments (:class:`~cntk.ops.functions.Function`): arguments of the
+        op_arguments (list or `_ArgumentIndex`): arguments of the
          root function. In :meth:`~cntk.ops.functions.Function.forward` pass it
          is typically `op.arguments`, in
-         :meth:`~cntk.ops.functions.Function.backward` pass it is `op.outputs`
+         :meth:`~cntk.ops.functions.Function.backward` pass it is `op.outputs`.
+         Callers that sanitize inputs for the same arguments repeatedly pass
+         a cached `_ArgumentIndex` of them instead.
         arguments: maps variables to their input data. The interpretation
          depends on the input type:
 
@@ -350,12 +429,17 @@ def sanitize_var_map(op_arguments, arguments, precision=None,
          instances (default), or if they should remain intact, as they contain
          additional meta information required by the Trainer (specifically, by
          the :meth:`~cntk.train.trainer.Trainer.train_minibatch` method).
+        staging_pool (:class:`~cntk.core.StagingBufferPool`, default None):
+         passed on to :func:`sanitize_batch`
 
     Returns:
         `dict` that maps variables to sanitized batches
     '''
     from ..io import MinibatchData
 
+    if not isinstance(op_arguments, _ArgumentIndex):
+        op_arguments = _ArgumentIndex(op_arguments)
+
     if isinstance(arguments, tuple):
         arguments, seq_starts = arguments
     else:
@@ -374,15 +458,8 @@ def sanitize_var_map(op_arguments, arguments, precision=None,
 
         arguments = { op_arguments[0]: arguments }
 
-    if isinstance(arguments, dict):
-        arg_names = [var.name for var in op_arguments]
-        name_counter = collections.Counter(arg_names)
-
-        var_name_map = dict((var.name, var) for var in op_arguments)
-    else:
+    if not isinstance(arguments, dict):
         if len(op_arguments) == 1:
-            name_counter = collections.Counter([op_arguments[0].name])
-            var_name_map = dict([(op_arguments[0].name, op_arguments[0])])
             arguments = dict([(op_arguments[0], arguments)])
         else:
             raise ValueError(
@@ -394,47 +471,22 @@ def sanitize_var_map(op_arguments, arguments, precision=None,
     var_map = {}
     for var, batch in arguments.items():
         if is_string(var):
-            if name_counter[var] == 0:
-                raise ValueError('variable with name "%s" does not exist in the network. Available variable names: %s' % (
-                    var, ", ".join(var_name_map)))
-            elif name_counter[var] > 1:
-                raise ValueError('node name "%s" is not unique' % var)
-
-            try:
-                var = var_name_map[var]
-            except KeyError:
-                raise KeyError("no input with the name '%s' was found.  Available: %s" % (
-                    var, ", ".join(var_name_map.keys())))
+            var = op_arguments.find_by_name(var)
 
+        batch_seq_starts = seq_starts
         if isinstance(batch, tuple):
-            if seq_starts is not None:
-                raise ValueError('you cannot provide sequence start '
-                                 'information globally and for individual batches '
-                                 'at the same time')
-
-            batch, seq_starts = batch
-
-            if seq_starts is not None:
-                if not isinstance(seq_starts, (tuple, list)):
-                    raise ValueError(
-                        'if you specify sequence begin markers, it needs to be a list')
-
-                sample_size = batch.shape[0] if hasattr(
-                    batch, 'shape') else len(batch)
-
-                if len(seq_starts) != sample_size:
-                    raise ValueError('you have %i sequences, but only %i '
-                                     'sequence begin markers' % (sample_size, len(seq_starts)))
-
-        if seq_starts is not None and isinstance(batch, cntk_py.Value):
-            raise ValueError('for directly passed Value objects sequence '
-                             'starts cannot be used yet.')
-
-        if isinstance(batch, MinibatchData) and extract_values_from_minibatch_data:
-            batch = batch.data
-
-        if not (isinstance(batch, MinibatchData) or isinstance(batch, cntk_py.Value)):
-            batch = sanitize_batch(var, batch, seq_starts, device)
+            batch, batch_seq_starts = _split_seq_starts(batch, seq_starts)
+
+        if isinstance(batch, cntk_py.Value):
+            if batch_seq_starts is not None:
+                raise ValueError('for directly passed Value objects sequence '
+                                 'starts cannot be used yet.')
+        elif isinstance(batch, MinibatchData):
+            if extract_values_from_minibatch_data:
+                batch = batch.data
+        else:
+            batch = sanitize_batch(var, batch, batch_seq_starts, device,
+                                   staging_pool)
 
         var_map[var] = batch
 
@@ -648,20 +700,105 @@ def sanitize_random_args(shape, dtype):
     return shape, dtype
 
 
+CacheInfo = collections.namedtuple('CacheInfo',
+        ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+
+class _BoundedCache(object):
+    '''
+    Thread-safe least-recently-used cache around ``func``. See
+    :func:`bounded_cache`.
+    '''
+
+    def __init__(self, func, maxsize):
+        self.func = func
+        self._maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.RLock()
+        self._hits = self._misses = self._evictions = 0
+        self.__doc__ = func.__doc__
+        self.__name__ = getattr(func, '__name__', type(func).__name__)
+
+    def __call__(self, *args):
+        with self._lock:
+            try:
+                # re-insert to mark the entry as most recently used (Python
+                # 2.7's OrderedDict does not have move_to_end())
+                ret = self._entries.pop(args)
+                self._entries[args] = ret
+                self._hits += 1
+                return ret
+            except KeyError:
+                self._misses += 1
+
+        # Do not hold the lock while building the entry, which can be slow.
+        # If two threads miss on the same key, the second result wins.
+        ret = self.func(*args)
+
+        with self._lock:
+            self._entries.pop(args, None)
+            self._entries[args] = ret
+            self._evict()
+
+        return ret
+
+    def _evict(self):
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    @property
+    def maxsize(self):
+        '''
+        Maximum number of entries kept in the cache. Lowering it evicts the
+        least recently used entries right away.
+        '''
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, maxsize):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1, but got %d' % maxsize)
+        with self._lock:
+            self._maxsize = maxsize
+            self._evict()
+
+    def cache_info(self):
+        '''
+        Returns a :class:`CacheInfo` tuple with the hit, miss and eviction
+        counts as well as the maximum and current size of the cache.
+        '''
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             self._maxsize, len(self._entries))
+
+    def cache_clear(self):
+        '''
+        Removes all entries and resets the counters.
+        '''
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
 # Workaround for Python 2.7 not having functools.lru_cache
 def bounded_cache(maxsize):
+    '''
+    Decorator that memoizes the last ``maxsize`` distinct calls of a
+    function with hashable positional arguments. Once the cache is full, the
+    least recently used entry is dropped. The decorated function is
+    thread-safe and provides ``cache_info()``, ``cache_clear()`` and a
+    settable ``maxsize``, e.g. to tune the cache of internal helper networks
+    that are built on the fly.
+
+    Args:
+        maxsize (int): maximum number of cached entries
+    '''
+    if maxsize < 1:
+        raise ValueError('maxsize must be at least 1, but got %d' % maxsize)
+
     def memoize(func):
-        class memodict(dict):
-            def __init__(self, f):
-                self.f = f
-            def __call__(self, *args):
-                return self[args]
-            def __missing__(self, key):
-                if len(self) >= maxsize:
-                    self.clear()
-                self[key] = ret = self.f(*key)
-                return ret
-        return memodict(func)
+        return _BoundedCache(func, maxsize)
     return memoize
 
 
@@ -669,8 +806,8 @@ def bounded_cache(maxsize):
 # such as when a user wants to inspect sparse data coming from a reader
 # The conversion happens by calling forward on the network defined below.
 # We memoize the last maxsize networks, because network building is slow.
-# Adjust the maxsize below if you have more than maxsize many different
-# shapes of sparse inputs.
+# If you have more than maxsize many different shapes of sparse inputs, set
+# _sparse_to_dense_network_cache.maxsize accordingly.
 @bounded_cache(maxsize=32)
 def _sparse_to_dense_network_cache(input_shape, is_sequence, device):
     if is_sequence:
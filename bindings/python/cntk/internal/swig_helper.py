@@ -8,7 +8,7 @@ from .. import cntk_py
 _typemap = None
 
 
-def map_if_possible(obj):
+def _get_typemap():
     global _typemap
     if _typemap is None:
         # We can do this only if cntk_py and the cntk classes are already
@@ -43,10 +43,15 @@ def map_if_possible(obj):
                 cntk_py.Value: Value,
                 cntk_py.Variable: Variable,
                 }
+    return _typemap
+
+
+def map_if_possible(obj):
+    types = _get_typemap()
 
     # Some types like NumPy arrays don't let to set the __class__
-    if obj.__class__ in _typemap:
-        obj.__class__ = _typemap[obj.__class__]
+    if obj.__class__ in types:
+        obj.__class__ = types[obj.__class__]
     else:
         if isinstance(obj, (tuple, list, set)):
             for o in obj:
@@ -57,16 +62,107 @@ def map_if_possible(obj):
                 map_if_possible(v)
 
 
-def typemap(f):
+def _upcast(obj):
+    cls = _get_typemap().get(obj.__class__)
+    if cls is not None:
+        obj.__class__ = cls
+
+
+def _compile_schema(schema):
+    '''
+    Turns a return schema (see :func:`typemap`) into a function that upcasts
+    exactly the objects that the schema describes. Returns None if there is
+    nothing to upcast.
+    '''
+    if schema is None:
+        return None
+
+    if isinstance(schema, tuple):
+        mappers = [(i, _compile_schema(s)) for i, s in enumerate(schema)]
+        mappers = [(i, m) for i, m in mappers if m is not None]
+        if not mappers:
+            return None
+
+        def map_tuple(obj):
+            for i, m in mappers:
+                m(obj[i])
+        return map_tuple
+
+    if isinstance(schema, list):
+        if len(schema) != 1:
+            raise ValueError('a list schema must have exactly one element')
+        item = _compile_schema(schema[0])
+        if item is None:
+            return None
+
+        def map_items(obj):
+            for o in obj:
+                item(o)
+        return map_items
+
+    if isinstance(schema, dict):
+        if len(schema) != 1:
+            raise ValueError('a dict schema must have exactly one entry')
+        (key_schema, value_schema), = schema.items()
+        key, value = _compile_schema(key_schema), _compile_schema(value_schema)
+        if key is None and value is None:
+            return None
+
+        def map_dict(obj):
+            for k, v in obj.items():
+                if key is not None:
+                    key(k)
+                if value is not None:
+                    value(v)
+        return map_dict
+
+    # any other object, usually the returned Swig type, marks a single object
+    return _upcast
+
+
+def typemap(f=None, returns=None):
     '''
     Decorator that upcasts return types from Swig types to cntk types that
     inherit from Swig. It does so recursively, e.g. if the return type is a
     tuple containing a dictionary, it will try to upcast every element in the
     tuple and all the keys and values in the dictionary.
+
+    For functions on hot paths, ``returns`` declares the structure of the
+    result, so that exactly the described objects are upcast instead of
+    walking the whole result. The schema is built from
+
+     * a Swig type such as ``cntk_py.Value``: a single object to upcast
+     * ``None``: an object that is left as is
+     * a tuple of schemas: a tuple with one schema per element
+     * ``[schema]``: a sequence whose elements all follow ``schema``
+     * ``{key_schema: value_schema}``: a dictionary
+
+    For instance, ``Function.forward`` returns the backpropagation state
+    and a dictionary mapping variables to values, which is declared as
+    ``@typemap(returns=(None, {cntk_py.Variable: cntk_py.Value}))``.
+
+    Args:
+        f (callable): the function to decorate
+        returns (optional): the schema of the function's result. If not
+         given, the result is walked recursively.
     '''
+    if f is None:
+        return lambda f: typemap(f, returns)
+
+    if returns is None:
+        @wraps(f)
+        def wrapper(*args, **kwds):
+            result = f(*args, **kwds)
+            map_if_possible(result)
+            return result
+        return wrapper
+
+    mapper = _compile_schema(returns)
+
     @wraps(f)
     def wrapper(*args, **kwds):
         result = f(*args, **kwds)
-        map_if_possible(result)
+        if mapper is not None and result is not None:
+            mapper(result)
         return result
     return wrapper
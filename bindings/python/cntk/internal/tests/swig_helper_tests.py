@@ -69,3 +69,32 @@ def test_typemap():
 
     res = returnFunction()
     assert res.__class__ == functions.Function
+
+def test_typemap_with_schema():
+    @typemap(returns=(None, {cntk_py.Variable: cntk_py.Parameter}))
+    def returnTupleWithDict():
+        return _param(), { _param(): _param() }
+
+    res = returnTupleWithDict()
+    assert res[0].__class__ == cntk_py.Parameter
+    for k,v in res[1].items():
+        assert k.__class__ == variables.Parameter
+        assert v.__class__ == variables.Parameter
+
+    @typemap(returns=[cntk_py.Parameter])
+    def returnList():
+        return [_param(), 'some_string', [_param()]]
+
+    res = returnList()
+    assert res[0].__class__ == variables.Parameter
+    assert res[1].__class__ == str
+    assert res[2][0].__class__ == cntk_py.Parameter
+
+    @typemap(returns=cntk_py.Parameter)
+    def returnNone():
+        return None
+
+    assert returnNone() is None
+
+    with pytest.raises(ValueError):
+        typemap(returnNone, returns=[cntk_py.Parameter, cntk_py.Variable])
@@ -177,3 +177,29 @@ def test_sanitize_batch_contiguity():
     b = sanitize_batch(var, batch)
     assert b.shape == (2,1,2,2)
 
+
+def test_bounded_cache_lru():
+    from cntk.internal.sanitize import bounded_cache
+
+    calls = []
+    @bounded_cache(maxsize=2)
+    def double(x):
+        calls.append(x)
+        return 2 * x
+
+    assert [double(x) for x in [1, 2, 1, 3, 1, 2]] == [2, 4, 2, 6, 2, 4]
+    # 1 stays cached as the most recently used entry, 2 gets evicted by 3
+    assert calls == [1, 2, 3, 2]
+
+    info = double.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (2, 4, 2)
+    assert (info.maxsize, info.currsize) == (2, 2)
+
+    double.maxsize = 1
+    assert double.cache_info().currsize == 1
+
+    double.cache_clear()
+    assert double.cache_info() == (0, 0, 0, 1, 0)
+
+    with pytest.raises(ValueError):
+        bounded_cache(maxsize=0)
@@ -20,7 +20,13 @@ from cntk.internal.utils import _py_dict_to_cntk_dict
 import cntk.io.transforms
 
 import numpy as np
+import collections
+import threading
 import uuid
+try:
+    import queue
+except ImportError:
+    import Queue as queue # Python 2.7
 
 INFINITELY_REPEAT = cntk_py.MinibatchSource.infinitely_repeat
 '''int: constant used to specify a minibatch scheduling unit to equal the size of the full data sweep.'''
@@ -460,6 +466,10 @@ class UserMinibatchSource(cntk_py.SwigMinibatchSource):
 
         Returns:
             mapping of :class:`StreamInformation` to :class:`MinibatchData`
+
+        Batches of variable-length sequences are best wrapped with
+        :meth:`~cntk.core.Value.from_packed`, which takes all steps as one
+        array plus the sequence offsets instead of one array per sequence.
         '''
         raise NotImplementedError
 
@@ -528,8 +538,7 @@ class MinibatchSourceFromData(UserMinibatchSource):
     '''
     This wraps in-memory data as a CNTK MinibatchSource object (aka "reader"), used to feed the data into a TrainingSession.
 
-    Use this if your data is small enough to be loaded into RAM in its entirety, and
-    the data is already sufficiently randomized.
+    Use this if your data is small enough to be loaded into RAM in its entirety.
 
     While CNTK allows user code to iterate through minibatches by itself and feed data minibatch
     by minibatch through :func:`~cntk.train.trainer.Trainer.train_minibatch`, the standard way is to iterate
@@ -537,7 +546,9 @@ class MinibatchSourceFromData(UserMinibatchSource):
     interface, which manages a full training including checkpointing and cross validation, operates on this level.
 
     A MinibatchSource created as a `MinibatchSourceFromData` linearly iterates through the data provided by
-    the caller as numpy arrays or scipy.sparse.csr_matrix objects, without randomization.
+    the caller as numpy arrays or scipy.sparse.csr_matrix objects, without randomization, unless
+    `randomize=True` is passed. In that case, the items are visited in a different random order in every sweep,
+    and each minibatch is gathered from the original data, so there is no need to pre-shuffle the corpus.
     The data is not copied, so if you want to modify the data while being read through a `MinibatchSourceFromData`,
     please pass a copy.
 
@@ -615,11 +626,15 @@ class MinibatchSourceFromData(UserMinibatchSource):
           **Important:**
           Click :cntkwiki:`here <BrainScript-epochSize-and-Python-epoch_size-in-CNTK>`
           for a description of input and label samples.
+        randomize (`bool`, defaults to `False`): if `True`, the data is visited in a random order that changes
+          with every sweep. Not supported if the data is given as CNTK Value objects.
+        randomization_seed (`int`, defaults to 0): initial randomization seed value (incremented every sweep when
+          the input data is re-randomized).
 
     Returns:
      An implementation of a :class:`cntk.io.MinibatchSource` that will iterate through the data.
     '''
-    def __init__(self, data_streams, max_samples = INFINITELY_REPEAT):
+    def __init__(self, data_streams, max_samples = INFINITELY_REPEAT, randomize=False, randomization_seed=0):
         from cntk import Variable
         if not data_streams:
             raise(ValueError('at least one stream must be specified, in the form name=data or name=(data, type)'))
@@ -628,6 +643,8 @@ class MinibatchSourceFromData(UserMinibatchSource):
         self._is_sequence = dict()  # [name] -> bool
         self._vars = dict()         # [name] -> Variable
         self._max_samples = max_samples
+        self._randomize = randomize
+        self._randomization_seed = randomization_seed
 
         # get the data and types from the input, and form streams array
         self._num_samples = -1  # total number of samples --must be the same for all args
@@ -669,9 +686,20 @@ class MinibatchSourceFromData(UserMinibatchSource):
             self._data[name] = value
             self._types[name] = type
             self._is_sequence[name] = is_sequence
+            if randomize and isinstance(value, Value):
+                raise ValueError('randomization is not supported for data given as Value objects')
+
+        self._lengths = dict()  # [name] -> numpy.array of sequence lengths, or None if each item is one sample
+        for name, value in self._data.items():
+            if self._is_sequence[name]:
+                self._lengths[name] = np.fromiter((MinibatchSourceFromData._get_len(seq) for seq in value),
+                                                  dtype=np.int64, count=self._num_samples)
+            else:
+                self._lengths[name] = None
 
         self._cursor = 0            # current position
         self._total_num_samples = 0 # total count; once the limit is reached, we stop returning data
+        self._start_sweep(0)
 
         super(MinibatchSourceFromData, self).__init__()
 
@@ -682,6 +710,29 @@ class MinibatchSourceFromData(UserMinibatchSource):
         except:
             return value.shape[0] # if input is csr_matrix
 
+    def _start_sweep(self, sweep):
+        # sets up the item order of the given sweep, and the cumulative sample counts per stream in that order,
+        # so that minibatch boundaries can be found by binary search
+        self._sweep = sweep
+        if self._randomize:
+            self._permutation = np.random.RandomState(self._randomization_seed + sweep).permutation(self._num_samples)
+        else:
+            self._permutation = None # linear order
+        self._cum_lengths = dict()  # [name] -> numpy.array of size _num_samples+1, or None if each item is one sample
+        for name, lengths in self._lengths.items():
+            if lengths is None:
+                self._cum_lengths[name] = None
+            else:
+                if self._permutation is not None:
+                    lengths = lengths[self._permutation]
+                self._cum_lengths[name] = np.concatenate(([0], np.cumsum(lengths)))
+
+    def _num_samples_in_range(self, name, begin, end): # number of samples of stream 'name' in items [begin, end)
+        cum = self._cum_lengths[name]
+        if cum is None:
+            return end - begin
+        return int(cum[end] - cum[begin])
+
     def stream_infos(self):
         return [StreamInformation(name, i, ['dense', 'sparse'][getattr(self._types[name], 'is_sparse', False)], 
                                   self._types[name].dtype, self._types[name].shape)
@@ -691,20 +742,21 @@ class MinibatchSourceFromData(UserMinibatchSource):
         if self._total_num_samples >= self._max_samples:
             return {}
         # determine how many samples, starting from self._cursor, will fit into the requested minibatch size of num_samples
+        # also stop if we hit the maximum requested number of samples
         begin = self._cursor
-        end = self._cursor
         assert begin < self._num_samples
-        actual_num_samples = { name: 0 for name in self._data.keys() }
-        while end < self._num_samples: 
-            new_num_samples = { name: actual_num_samples[name] + (MinibatchSourceFromData._get_len(value[end]) if self._is_sequence[name] else 1)
-                                for name, value in self._data.items() }
-            # return up to requested number of samples. but at least one even if longer
-            # also stop if we hit the maximum requested number of samples
-            max_num_samples = max(new_num_samples.values())
-            if actual_num_samples and (max_num_samples > num_samples or self._total_num_samples + max_num_samples > self._max_samples):
-                break
-            actual_num_samples = new_num_samples
-            end += 1
+        limit = min(num_samples, self._max_samples - self._total_num_samples)
+        end = self._num_samples
+        for name in self._data.keys():
+            cum = self._cum_lengths[name]
+            if cum is None:
+                end = min(end, begin + limit)
+            else: # last sequence boundary at which this stream still fits into the limit
+                target = cum[begin] + min(limit, cum[-1] - cum[begin])
+                end = min(end, int(np.searchsorted(cum, target, side='right')) - 1)
+        # return up to requested number of samples. but at least one even if longer
+        end = max(end, begin + 1)
+        actual_num_samples = { name: self._num_samples_in_range(name, begin, end) for name in self._data.keys() }
 
         self._total_num_samples += max(actual_num_samples.values())
 
@@ -721,6 +773,13 @@ class MinibatchSourceFromData(UserMinibatchSource):
                 if number_of_workers != 1: # slice_view presently does not support strides
                     raise ValueError('distributed reading from Value objects is not supported')
                 mb_data = data.slice_view(start_offset, extent, data.is_read_only)
+            elif self._permutation is not None:
+                # gather this minibatch's items from the original data (also sub-sliced in case of distributed reading)
+                indices = self._permutation[begin+worker_rank:end+worker_rank:number_of_workers]
+                if isinstance(arg, list):
+                    mb_data = [arg[i] for i in indices]
+                else:
+                    mb_data = arg[indices]
             else:
                 # in case of distributed reading, we sub-slice the minibatch
                 #print('rank/worker', worker_rank, number_of_workers, 'reading', slice(begin+worker_rank, end+worker_rank, number_of_workers))
@@ -731,14 +790,26 @@ class MinibatchSourceFromData(UserMinibatchSource):
                 if si.name not in self._vars: # this case is more complex, we need a CNTK Variable
                     from cntk import input_variable, device
                     self._vars[si.name] = input_variable(**self._types[si.name])
-                value = Value.create(self._vars[si.name], mb_data)
+                # pack the sequences back to back, so that the Value is created in one go
+                from scipy import sparse
+                offsets = np.zeros(len(mb_data) + 1, dtype=np.int64)
+                np.cumsum([MinibatchSourceFromData._get_len(seq) for seq in mb_data], out=offsets[1:])
+                if sparse.issparse(mb_data[0]):
+                    packed = sparse.vstack(mb_data, format='csr')
+                else:
+                    packed = np.concatenate(mb_data)
+                value = Value.from_packed(self._vars[si.name], packed, offsets)
             else:
                 value = Value(mb_data)
             result[si] = MinibatchData(value, num_sequences=end - begin, num_samples=actual_num_samples[si.name],
                                        sweep_end=at_end or (self._total_num_samples >= self._max_samples))
 
         # wrap around the cursor
-        self._cursor = 0 if at_end else end
+        if at_end:
+            self._cursor = 0
+            self._start_sweep(self._sweep + 1)
+        else:
+            self._cursor = end
 
         return result
 
@@ -751,7 +822,8 @@ class MinibatchSourceFromData(UserMinibatchSource):
             A :class:`~cntk.cntk_py.Dictionary` that has the checkpoint state
             of the MinibatchSource
         '''
-        return dict(cursor=self._cursor, total_num_samples=self._total_num_samples)
+        return dict(cursor=self._cursor, total_num_samples=self._total_num_samples,
+                    sweep=self._sweep, randomization_seed=self._randomization_seed)
 
     def restore_from_checkpoint(self, checkpoint):
         '''
@@ -762,6 +834,175 @@ class MinibatchSourceFromData(UserMinibatchSource):
         '''
         self._cursor = checkpoint['cursor']
         self._total_num_samples = checkpoint['total_num_samples']
+        # checkpoints written before randomization was supported only have
+        # the cursor, and were taken in sweep 0 of the unshuffled data
+        self._randomization_seed = checkpoint.get('randomization_seed',
+                                                  self._randomization_seed)
+        self._start_sweep(checkpoint.get('sweep', 0))
+
+
+class _PrefetchJob(object):
+    '''
+    A minibatch requested from the wrapped source of a :class:`PrefetchingMinibatchSource`.
+    '''
+    def __init__(self, args):
+        self.args = args    # arguments to next_minibatch()
+        self.state = None   # checkpoint state of the source right before this minibatch was read
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def run(self, source):
+        try:
+            self.state = source.get_checkpoint_state()
+            self.result = source.next_minibatch(*self.args)
+        except Exception as e:
+            self.error = e
+        self.done.set()
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def _prefetch_worker(source, jobs):
+    # executes the jobs one after another, since reading from a source changes its state
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        job.run(source)
+
+
+class PrefetchingMinibatchSource(UserMinibatchSource):
+    '''
+    Wraps a :class:`UserMinibatchSource` and reads its next minibatches on a background thread,
+    while the trainer processes the current one. This hides the cost of parsing, augmenting and
+    creating Value objects in Python code, as long as the wrapped source releases the GIL
+    or spends enough time in native code.
+
+    The wrapped source is read ahead with the arguments of the last call to :meth:`next_minibatch`.
+    If a call uses different arguments (e.g. a different minibatch size or worker rank), the
+    minibatches read ahead are discarded, and the wrapped source is rewound to where the caller is.
+    Checkpoints reflect the minibatches returned to the caller, not the ones read ahead.
+
+    Since reading a minibatch changes the state of the wrapped source, the minibatches are read
+    one after another by a single thread. Call :meth:`close`, or use the wrapper as a context
+    manager, to stop the thread.
+
+    Example:
+     >>> X = np.arange(12).reshape(6,2).astype(np.float32)
+     >>> with C.io.PrefetchingMinibatchSource(C.io.MinibatchSourceFromData(dict(x=X), max_samples=len(X)), depth=2) as s:
+     ...     s.next_minibatch(4)[s.streams['x']].data.asarray()
+     array([[ 0.,  1.],
+            [ 2.,  3.],
+            [ 4.,  5.],
+            [ 6.,  7.]], dtype=float32)
+
+    Args:
+        source (:class:`UserMinibatchSource`): the minibatch source to read from
+        depth (`int`, defaults to 2): maximum number of minibatches that are read ahead
+        workers (`int`, defaults to 1): number of reading threads. Only 1 is supported, since
+         the wrapped source has to be read sequentially.
+    '''
+    def __init__(self, source, depth=2, workers=1):
+        if depth < 1:
+            raise ValueError('depth must be at least 1, got %s' % depth)
+        if workers != 1:
+            raise ValueError('the wrapped source is read sequentially, so workers must be 1, '
+                             'got %s' % workers)
+        self._source = source
+        self._depth = depth
+        self._pending = collections.deque() # jobs that were handed to the worker, but not returned yet
+        self._jobs = None # job queue of the worker thread, created with the first request
+        self._worker = None
+        super(PrefetchingMinibatchSource, self).__init__()
+
+    def stream_infos(self):
+        return self._source.stream_infos()
+
+    def is_infinite(self):
+        return self._source.is_infinite()
+
+    def _submit(self, args):
+        if self._jobs is None:
+            self._jobs = queue.Queue()
+            self._worker = threading.Thread(target=_prefetch_worker, args=(self._source, self._jobs))
+            self._worker.daemon = True
+            self._worker.start()
+        job = _PrefetchJob(args)
+        self._pending.append(job)
+        self._jobs.put(job)
+
+    def _discard_pending(self):
+        # wait for the read-ahead jobs, then rewind the source to before the first one of them
+        if not self._pending:
+            return
+        for job in self._pending:
+            job.done.wait()
+        state = self._pending[0].state
+        self._pending.clear()
+        if state is not None:
+            self._source.restore_from_checkpoint(state)
+
+    def next_minibatch(self, num_samples, number_of_workers=1, worker_rank=0, device=None):
+        args = (num_samples, number_of_workers, worker_rank, device)
+        if self._pending and self._pending[0].args != args:
+            self._discard_pending()
+        if not self._pending:
+            self._submit(args)
+        job = self._pending.popleft()
+        while len(self._pending) < self._depth:
+            self._submit(args)
+        return job.wait()
+
+    def get_checkpoint_state(self):
+        '''
+        Gets the checkpoint state of the wrapped source, as of before the first
+        minibatch that was read ahead but not yet returned.
+
+        Returns:
+            dict: the checkpoint state of the wrapped source
+        '''
+        if self._pending:
+            job = self._pending[0]
+            job.done.wait()
+            if job.state is None:
+                raise job.error
+            return job.state
+        return self._source.get_checkpoint_state()
+
+    def restore_from_checkpoint(self, checkpoint):
+        '''
+        Discards all minibatches read ahead and restores the wrapped source from the specified checkpoint.
+
+        Args:
+            checkpoint (dict): checkpoint to restore from
+        '''
+        self._discard_pending()
+        self._source.restore_from_checkpoint(checkpoint)
+
+    def close(self):
+        '''
+        Discards all minibatches read ahead, rewinding the wrapped source to after the last
+        minibatch that was returned, and stops the background thread. Reading another minibatch
+        starts a new thread.
+        '''
+        if self._jobs is None:
+            return
+        self._discard_pending()
+        self._jobs.put(None)
+        self._worker.join()
+        self._jobs = None
+        self._worker = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
 def HTKFeatureDeserializer(streams):
@@ -1068,7 +1309,7 @@ StreamDefs = Record
 
 
 def _dense_to_str(data):
-    return ' '.join(data.ravel(order='C').astype(np.str))
+    return ' '.join(data.ravel(order='C').astype(str))
 
 
 def _sparse_to_str(data):
@@ -1137,32 +1378,160 @@ def sequence_to_cntk_text_format(seq_idx, alias_tensor_map):
     if max_seq_length == 0:
         return ''
 
+    # determine the conversion once per alias, not per sequence element
+    converters = []
+    for alias, tensor in sorted(alias_tensor_map.items()):
+        if len(tensor) == 0:
+            continue
+
+        if _is_tensor(tensor):
+            if not isinstance(tensor, np.ndarray):
+                tensor = np.asarray(tensor)
+            to_str = _dense_to_str
+        elif isinstance(tensor, list) and isinstance(tensor[0], dict):
+            to_str = _sparse_to_str
+        else:
+            raise ValueError(
+                'expected a tensor (dense) or list of dicts (sparse), but '
+                'got "%s"' % type(tensor))
+        converters.append((alias, tensor, to_str))
+
     lines = []
     for elem_idx in range(0, max_seq_length):
         line = []
 
-        for alias, tensor in sorted(alias_tensor_map.items()):
+        for alias, tensor, to_str in converters:
             if elem_idx >= len(tensor):
                 # for this alias there no more sequence elements
                 continue
 
-            if _is_tensor(tensor):
-                if not isinstance(tensor, np.ndarray):
-                    tensor = np.asarray(tensor)
-                to_str = _dense_to_str
-            elif isinstance(tensor, list) and isinstance(tensor[0], dict):
-                to_str = _sparse_to_str
-            else:
-                raise ValueError(
-                    'expected a tensor (dense) or list of dicts (sparse), but '
-                    'got "%s"' % type(tensor))
-
             line.append('%s %s' % (alias, to_str(tensor[elem_idx])))
 
         lines.append('%i\t|' % seq_idx + ' |'.join(line))
 
     return '\n'.join(lines)
 
+
+def _value_format(dtype, float_format):
+    return float_format if np.issubdtype(dtype, np.floating) else '%d'
+
+
+def _dense_rows_to_str(rows, float_format):
+    # formats each row of a dense block with a single string formatting operation
+    rows = rows.reshape((rows.shape[0], -1))
+    row_format = ' '.join([_value_format(rows.dtype, float_format)] * rows.shape[1])
+    return [row_format % tuple(row) for row in rows.tolist()]
+
+
+def _sparse_rows_to_str(rows, float_format):
+    # formats each row of a csr_matrix block straight from its indptr/indices/data
+    if not rows.has_sorted_indices:
+        rows.sort_indices()
+    entry_format = '%d:' + _value_format(rows.dtype, float_format)
+    entries = [entry_format % entry for entry in zip(rows.indices.tolist(), rows.data.tolist())]
+    indptr = rows.indptr.tolist()
+    return [' '.join(entries[indptr[i]:indptr[i + 1]]) for i in range(rows.shape[0])]
+
+
+def write_cntk_text_format(f, alias_data_map, offsets=None, first_sequence_id=0,
+                           float_format='%.9g', sequences_per_block=4096):
+    '''
+    Writes whole corpora in a format that is readable by :class:`~cntk.io.CTFDeserializer`.
+    In contrast to :func:`sequence_to_cntk_text_format`, the data is passed as one array per
+    input, which is formatted in blocks of sequences and written with one call per block.
+
+    Example:
+     >>> import io, scipy.sparse
+     >>> f = io.StringIO()
+     >>> x = np.array([[1, 2], [3, 4], [5, 6]], np.float32)
+     >>> y = scipy.sparse.csr_matrix(np.array([[0, 1, 0], [1, 0, 0]], np.float32))
+     >>> C.io.write_cntk_text_format(f, dict(x=x, y=y), offsets=dict(x=[0, 2, 3], y=[0, 1, 2]))
+     >>> print(f.getvalue())
+     0	|x 1 2 |y 1:1
+     0	|x 3 4
+     1	|x 5 6 |y 0:1
+     <BLANKLINE>
+
+    Args:
+        f (str or file): name of the file to write to, or a text file object
+        alias_data_map (dict): maps alias (str) to a NumPy array or a scipy.sparse.csr_matrix
+          whose rows are the samples of all sequences, one after the other
+        offsets (array or dict, defaults to `None`): for each sequence, the index of its first row,
+          followed by the total number of rows. A dict maps aliases to their offsets, if their
+          sequences have different lengths. If `None`, each row is a sequence of its own.
+        first_sequence_id (int, defaults to 0): sequence id of the first sequence
+        float_format (str, defaults to '%.9g'): format of floating point values, the default
+          represents float32 values exactly
+        sequences_per_block (int, defaults to 4096): number of sequences formatted and written at once
+    '''
+    if not alias_data_map:
+        raise ValueError('at least one alias must be specified')
+
+    from scipy import sparse
+    aliases = sorted(alias_data_map.keys())
+    num_rows = {}
+    for alias in aliases:
+        data = alias_data_map[alias]
+        if not isinstance(data, (np.ndarray, sparse.csr_matrix)):
+            raise ValueError('expected a NumPy array or a scipy.sparse.csr_matrix for '
+                             'alias "%s", but got "%s"' % (alias, type(data)))
+        num_rows[alias] = data.shape[0]
+
+    alias_offsets = {}
+    for alias in aliases:
+        o = offsets.get(alias) if isinstance(offsets, dict) else offsets
+        if o is None:
+            o = np.arange(num_rows[alias] + 1)
+        o = np.asarray(o, dtype=np.int64)
+        if o[0] != 0 or o[-1] != num_rows[alias] or np.any(np.diff(o) < 0):
+            raise ValueError('offsets of alias "%s" must increase from 0 to the number '
+                             'of rows (%d)' % (alias, num_rows[alias]))
+        alias_offsets[alias] = o
+
+    num_sequences = set(len(o) - 1 for o in alias_offsets.values())
+    if len(num_sequences) != 1:
+        raise ValueError('all aliases must have the same number of sequences')
+    num_sequences = num_sequences.pop()
+
+    # if all aliases share the sequence lengths, a sequence element is one line with all aliases
+    first = alias_offsets[aliases[0]]
+    same_lengths = all(np.array_equal(first, o) for o in alias_offsets.values())
+
+    def write(out):
+        for begin in range(0, num_sequences, sequences_per_block):
+            end = min(begin + sequences_per_block, num_sequences)
+            rows = {}
+            for alias in aliases:
+                data = alias_data_map[alias]
+                block = data[alias_offsets[alias][begin]:alias_offsets[alias][end]]
+                to_str = _sparse_rows_to_str if sparse.issparse(block) else _dense_rows_to_str
+                rows[alias] = to_str(block, float_format)
+
+            if same_lengths:
+                lengths = np.diff(first[begin:end + 1])
+                seq_ids = np.repeat(np.arange(first_sequence_id + begin, first_sequence_id + end), lengths).tolist()
+                line_format = '%d\t|' + ' |'.join('%s %%s' % alias for alias in aliases)
+                lines = [line_format % line for line in zip(seq_ids, *(rows[alias] for alias in aliases))]
+            else:
+                lines = []
+                starts = {alias: alias_offsets[alias][begin] for alias in aliases}
+                for seq in range(begin, end):
+                    lengths = [(alias, alias_offsets[alias][seq] - starts[alias],
+                                alias_offsets[alias][seq + 1] - alias_offsets[alias][seq]) for alias in aliases]
+                    for elem_idx in range(max(length for _, _, length in lengths)):
+                        line = ['%s %s' % (alias, rows[alias][row + elem_idx])
+                                for alias, row, length in lengths if elem_idx < length]
+                        lines.append('%i\t|' % (first_sequence_id + seq) + ' |'.join(line))
+
+            if lines:
+                out.write('\n'.join(lines) + '\n')
+
+    if is_string(f):
+        with open(f, 'w') as out:
+            write(out)
+    else:
+        write(f)
+
 class UserDeserializer(cntk_py.SwigDataDeserializer):
     '''
     User deserializer is a base class for all user defined deserializers.
@@ -1246,3 +1615,69 @@ class UserDeserializer(cntk_py.SwigDataDeserializer):
         # take place.
         self._last_chunk = self.get_chunk(chunk_id=chunk_id)
         return self._last_chunk;
+
+
+class NpyDeserializer(UserDeserializer):
+    '''
+    Reads samples from NumPy ``.npy`` files, one file per stream, without loading them into memory.
+
+    The files are memory-mapped, and exposed to the MinibatchSource as chunks of consecutive rows,
+    so that the chunk-based randomization of CNTK pages in only the chunks currently needed.
+    The data is not copied before it is handed over to the reader, unless it has to be converted to
+    float32 or to C order. All files must have the same number of rows, each row is one sample.
+
+    Example:
+     >>> import os, tempfile
+     >>> path = os.path.join(tempfile.mkdtemp(), 'x.npy')
+     >>> np.save(path, np.arange(12, dtype=np.float32).reshape(6,2))
+     >>> d = C.io.NpyDeserializer(dict(x=path), samples_per_chunk=4)
+     >>> d.num_chunks()
+     2
+     >>> s = C.io.MinibatchSource(d, randomize=False)
+     >>> s.next_minibatch(3)[s.streams['x']].shape
+     (3, 1, 2)
+
+    Args:
+        streams (dict): maps stream names to the paths of ``.npy`` files
+        samples_per_chunk (`int`, defaults to `None`): number of rows per chunk. If `None`, chunks
+          hold about 32 MB of data of the widest stream.
+    '''
+    _DEFAULT_CHUNK_SIZE_IN_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, streams, samples_per_chunk=None):
+        if not streams:
+            raise ValueError('at least one stream must be specified, in the form name=filename')
+        self._arrays = dict() # [name] -> numpy.memmap
+        num_samples = None
+        for name, filename in streams.items():
+            array = np.load(filename, mmap_mode='r')
+            if array.ndim == 1:
+                array = array.reshape((array.shape[0], 1))
+            if num_samples is None:
+                num_samples = array.shape[0]
+            elif array.shape[0] != num_samples:
+                raise ValueError('all files must have the same number of rows, '
+                                 'but "%s" has %d rather than %d' % (filename, array.shape[0], num_samples))
+            self._arrays[name] = array
+        if num_samples == 0:
+            raise ValueError('data is empty')
+        if samples_per_chunk is None:
+            max_sample_size = max(a[0].nbytes for a in self._arrays.values())
+            samples_per_chunk = max(1, NpyDeserializer._DEFAULT_CHUNK_SIZE_IN_BYTES // max_sample_size)
+        self._num_samples = num_samples
+        self._samples_per_chunk = samples_per_chunk
+        super(NpyDeserializer, self).__init__()
+
+    def stream_infos(self):
+        return [StreamInformation(name, i, 'dense', np.float32, array.shape[1:])
+                for i, (name, array) in enumerate(sorted(self._arrays.items()))]
+
+    def num_chunks(self):
+        return (self._num_samples + self._samples_per_chunk - 1) // self._samples_per_chunk
+
+    def get_chunk(self, chunk_id):
+        begin = chunk_id * self._samples_per_chunk
+        end = min(begin + self._samples_per_chunk, self._num_samples)
+        # a row range of a C-ordered float32 file is handed over as a view into the mapping
+        return {name: np.ascontiguousarray(array[begin:end], dtype=np.float32)
+                for name, array in self._arrays.items()}
@@ -65,6 +65,16 @@ MBDATA_SPARSE2 = r'''0	|y 1 0 0 0 0
 1	|y 0 1 0 0 0
 '''
 
+# several non-zeros per sample, with indices that need multi-byte varints
+MBDATA_SPARSE_MULTI = r'''0	|x 3:1 560:1 999:1	|y 1 0 0 0 0
+0	|x 0:1 1:1
+0	|x 2:1 129:1 130:1 700:1
+1	|x 560:1	|y 0 1 0 0 0
+1	|x 5:1 424:1
+2	|x 1:1 128:1 255:1 256:1 16383:1	|y 0 0 1 0 0
+2	|x 16384:1
+'''
+
 def create_temp_file(tmpdir):
     tmpfile = str(tmpdir/'mbtest.txt')
     with open(tmpfile, 'w') as f:
@@ -1133,9 +1143,9 @@ def test_prefetch_with_unpacking(tmpdir):
         else:
             empty = True
 
-def get_cbf_header(streams):
+def get_cbf_header(streams, sparse_type='sparse'):
     get_header_line = lambda x,y: \
-        [x, y.stream_alias, 'sparse' if y.is_sparse else 'dense', str(y.dim)]
+        [x, y.stream_alias, sparse_type if y.is_sparse else 'dense', str(y.dim)]
     return [' '.join(get_header_line(k,v)) for k,v in streams.items()]
 
 input_files =  [
@@ -1143,7 +1153,8 @@ input_files =  [
         MBDATA_DENSE_2, 
         MBDATA_SPARSE, 
         MBDATA_SPARSE1, 
-        MBDATA_SPARSE2
+        MBDATA_SPARSE2,
+        MBDATA_SPARSE_MULTI
     ]
 stream_defs = [
         StreamDefs(
@@ -1164,10 +1175,15 @@ stream_defs = [
         StreamDefs(
             labels=StreamDef(field='y', shape=5, is_sparse=False)
         ),
+        StreamDefs(
+            features=StreamDef(field='x', shape=20000, is_sparse=True),
+            labels=StreamDef(field='y', shape=5, is_sparse=False)
+        ),
     ]
 
-@pytest.mark.parametrize("input_pair", zip(input_files, stream_defs))
-def test_compare_cbf_and_ctf(input_pair, device_id, tmpdir):
+@pytest.mark.parametrize("sparse_type", ['sparse', 'compressed_sparse', 'one_hot'])
+@pytest.mark.parametrize("input_pair", list(zip(input_files, stream_defs)))
+def test_compare_cbf_and_ctf(input_pair, sparse_type, device_id, tmpdir):
     try:
         import ctf2bin
     except ImportError:
@@ -1178,7 +1194,7 @@ def test_compare_cbf_and_ctf(input_pair, device_id, tmpdir):
     tmpfile = _write_data(tmpdir, input_pair[0])
     streams = input_pair[1]
 
-    ctf2bin.process(tmpfile, tmpfile+'.bin', get_cbf_header(streams), ctf2bin.ElementType.FLOAT)
+    ctf2bin.process(tmpfile, tmpfile+'.bin', get_cbf_header(streams, sparse_type), ctf2bin.ElementType.FLOAT)
 
     def compare_cbf_and_ctf(num_mbs, mb_size, randomize):
         ctf = MinibatchSource(CTFDeserializer(tmpfile, streams), randomize=randomize)
@@ -1227,6 +1243,19 @@ def test_compare_cbf_and_ctf(input_pair, device_id, tmpdir):
             compare_cbf_and_ctf(num_mbs, mb_size, randomize)
 
 
+def test_ctf2bin_rejects_negative_sparse_index(tmpdir):
+    try:
+        import ctf2bin
+    except ImportError:
+        pytest.skip("ctf2bin not found")
+
+    tmpfile = _write_data(tmpdir, '0\t|x 3:1 -2:1\n')
+    for sparse_type in ['sparse', 'compressed_sparse', 'one_hot']:
+        with pytest.raises(ValueError):
+            ctf2bin.process(tmpfile, tmpfile+'.bin',
+                            ['features x %s 1000' % sparse_type], ctf2bin.ElementType.FLOAT)
+
+
 class SimpleDeserailizer(UserDeserializer):
     def __init__(self, stream_infos, chunk_data):
         super(SimpleDeserailizer, self).__init__()
@@ -1576,3 +1605,173 @@ def test_composite_source_synced_transforms(tmpdir):
     for i in range(30):
         data=reader.next_minibatch(minibatch_size, input_map=input_map)
         assert np.allclose(loss.eval(data), np.zeros(minibatch_size))
+
+
+def test_minibatch_source_from_data_sequence_boundaries():
+    from cntk.io import MinibatchSourceFromData
+    from cntk.layers.typing import Sequence, tensor
+    lengths = [3, 1, 4, 1, 5, 9, 2, 6]
+    XX = [np.full((n, 2), i, np.float32) for i, n in enumerate(lengths)]
+    YY = [np.full((1, 1), i, np.float32) for i in range(len(lengths))]
+    s = MinibatchSourceFromData(dict(xx=(XX, Sequence[tensor]), yy=(YY, Sequence[tensor])),
+                                max_samples=2 * sum(lengths))
+    seen = []
+    while True:
+        mb = s.next_minibatch(6)
+        if not mb:
+            break
+        xx = mb[s.streams['xx']]
+        assert xx.num_samples <= 6 or xx.num_sequences == 1
+        seen.append(xx.num_sequences)
+    # sequences longer than the minibatch size are returned on their own
+    assert seen[:6] == [2, 2, 1, 1, 1, 1]
+    assert sum(seen) == 2 * len(lengths)
+
+
+def test_minibatch_source_from_data_randomized():
+    import scipy.sparse
+    from cntk.io import MinibatchSourceFromData
+    N = 20
+    X = np.arange(2*N).reshape(N, 2).astype(np.float32)
+    Y = scipy.sparse.csr_matrix((np.ones(N, np.float32), (range(N), [i % 3 for i in range(N)])), shape=(N, 3))
+
+    def read(s, num_mbs):
+        xs, ys = [], []
+        for _ in range(num_mbs):
+            mb = s.next_minibatch(7)
+            xs.append(mb[s.streams['x']].data.asarray())
+            ys.append(mb[s.streams['y']].data.asarray().todense())
+        return np.concatenate(xs), np.concatenate(ys)
+
+    s = MinibatchSourceFromData(dict(x=X, y=Y), randomize=True, randomization_seed=3)
+    x, y = read(s, 3) # one full sweep: 7 + 7 + 6
+    assert x.shape == (N, 2)
+    # every item is visited once per sweep, and streams stay aligned
+    assert sorted(x[:, 0].tolist()) == X[:, 0].tolist()
+    assert not np.array_equal(x, X)
+    assert np.array_equal(np.asarray(y), np.asarray(Y.todense())[(x[:, 0] / 2).astype(int)])
+
+    # restoring from a checkpoint reproduces the same order, also across sweeps
+    state = s.get_checkpoint_state()
+    x1, _ = read(s, 5)
+    s.restore_from_checkpoint(state)
+    x2, _ = read(s, 5)
+    assert np.array_equal(x1, x2)
+    assert not np.array_equal(x1[:N], x)
+
+
+def test_minibatch_source_from_data_old_checkpoint():
+    from cntk.io import MinibatchSourceFromData
+    N = 10
+    X = np.arange(N).reshape(N, 1).astype(np.float32)
+    s = MinibatchSourceFromData(dict(x=X))
+    s.next_minibatch(3)
+
+    # checkpoints without sweep and seed, as written by earlier versions
+    state = s.get_checkpoint_state()
+    s.restore_from_checkpoint(dict(cursor=state['cursor'],
+                                   total_num_samples=state['total_num_samples']))
+    mb = s.next_minibatch(4)
+    assert np.array_equal(mb[s.streams['x']].data.asarray(), X[3:7])
+
+
+def test_prefetching_minibatch_source():
+    from cntk.io import MinibatchSourceFromData, PrefetchingMinibatchSource
+    N = 10
+    X = np.arange(N).reshape(N, 1).astype(np.float32)
+
+    def read(s, mb_sizes):
+        return [s.next_minibatch(n)[s.streams['x']].data.asarray().ravel().tolist() for n in mb_sizes]
+
+    expected = read(MinibatchSourceFromData(dict(x=X)), [3, 3, 2, 4, 4, 3])
+
+    s = PrefetchingMinibatchSource(MinibatchSourceFromData(dict(x=X)), depth=3)
+    # changing the minibatch size discards the minibatches read ahead
+    assert read(s, [3, 3, 2, 4]) == expected[:4]
+
+    # the checkpoint refers to what was returned, not to what was read ahead
+    state = s.get_checkpoint_state()
+    assert read(s, [4, 3]) == expected[4:]
+    s.restore_from_checkpoint(state)
+    assert read(s, [4, 3]) == expected[4:]
+
+    # closing stops the thread and rewinds the source to what was returned
+    s.restore_from_checkpoint(state)
+    assert read(s, [4]) == expected[4:5]
+    worker = s._worker
+    s.close()
+    assert not worker.is_alive()
+    assert read(s._source, [3]) == expected[5:]
+
+    with PrefetchingMinibatchSource(MinibatchSourceFromData(dict(x=X))) as s:
+        assert read(s, [3, 3]) == expected[:2]
+        worker = s._worker
+    assert not worker.is_alive()
+
+    with pytest.raises(ValueError):
+        PrefetchingMinibatchSource(MinibatchSourceFromData(dict(x=X)), depth=0)
+
+    with pytest.raises(ValueError):
+        PrefetchingMinibatchSource(MinibatchSourceFromData(dict(x=X)), workers=2)
+
+
+def test_npy_deserializer(tmpdir):
+    from cntk.io import NpyDeserializer
+    N = 10
+    X = np.arange(N * 3).reshape(N, 3).astype(np.float32)
+    Y = np.arange(N).astype(np.int64) # converted to float32 and reshaped to (N, 1)
+    x_file, y_file = str(tmpdir / 'x.npy'), str(tmpdir / 'y.npy')
+    np.save(x_file, X)
+    np.save(y_file, Y)
+
+    d = NpyDeserializer(dict(x=x_file, y=y_file), samples_per_chunk=4)
+    assert d.num_chunks() == 3
+    chunk = d.get_chunk(2)
+    assert np.array_equal(chunk['x'], X[8:])
+    assert chunk['y'].dtype == np.float32 and chunk['y'].shape == (2, 1)
+
+    mbs = MinibatchSource(d, randomize=True, max_sweeps=1)
+    seen = []
+    while True:
+        mb = mbs.next_minibatch(3)
+        if not mb:
+            break
+        x = mb[mbs.streams.x].asarray().reshape(-1, 3)
+        y = mb[mbs.streams.y].asarray().reshape(-1)
+        assert np.array_equal(x[:, 0], 3 * y)
+        seen.extend(y.tolist())
+    assert sorted(seen) == list(range(N))
+
+    short_file = str(tmpdir / 'short.npy')
+    np.save(short_file, Y[:5])
+    with pytest.raises(ValueError):
+        NpyDeserializer(dict(x=x_file, y=short_file))
+
+
+def test_write_cntk_text_format(tmpdir):
+    import scipy.sparse
+    from cntk.io import write_cntk_text_format
+    W = AA([[1, 0], [1, 0], [5, 6], [7, 8]])
+    L = AA([[2], [3]])
+    expected = '\n'.join([sequence_to_cntk_text_format(0, {'W': W[:2], 'L': L[:1]}),
+                          sequence_to_cntk_text_format(1, {'W': W[2:], 'L': L[1:]})]) + '\n'
+    tmpfile = str(tmpdir / 'bulk.ctf')
+    write_cntk_text_format(tmpfile, {'W': W, 'L': L}, offsets={'W': [0, 2, 4], 'L': [0, 1, 2]},
+                           sequences_per_block=1)
+    with open(tmpfile) as f:
+        assert f.read() == expected
+
+    # round trip through the CTFDeserializer, with one sequence per row
+    N = 7
+    X = np.random.rand(N, 3).astype(np.float32)
+    Y = scipy.sparse.csr_matrix((np.ones(N, np.float32), (range(N), [i % 5 for i in range(N)])), shape=(N, 5))
+    write_cntk_text_format(tmpfile, dict(x=X, y=Y), sequences_per_block=3)
+    mbs = MinibatchSource(CTFDeserializer(tmpfile, StreamDefs(
+        x=StreamDef(field='x', shape=3), y=StreamDef(field='y', shape=5, is_sparse=True))),
+        randomize=False, max_sweeps=1)
+    mb = mbs.next_minibatch(N)
+    assert np.array_equal(mb[mbs.streams.x].asarray().reshape(N, 3), X)
+    assert mb[mbs.streams.y].shape == (N, 1, 5)
+
+    with pytest.raises(ValueError):
+        write_cntk_text_format(tmpfile, dict(x=X), offsets=[0, 2, 3])
@@ -18,6 +18,7 @@ from cntk.internal import map_if_possible, typemap, sanitize_var_map,\
                           sanitize_Function_attributes,\
                           sanitize_variables_or_functions,\
                           _value_as_sequence_or_array
+from cntk.internal.sanitize import _ArgumentIndex
 from cntk.internal.utils import get_python_function_arguments, \
                                 map_function_arguments, _py_dict_to_cntk_dict, \
                                 _to_cntk_dict_value
@@ -531,7 +532,7 @@ class Function(cntk_py.Function):
         return self.output.type
 
     @property
-    @typemap
+    @typemap(returns=[cntk_py.Variable])
     def arguments(self):
         '''
         List of all input variables of the Function that are not of type Parameter or Constant.
@@ -560,6 +561,27 @@ class Function(cntk_py.Function):
         python_operand_order = get_global_option('python_operand_order', True)
         return super(Function, self).arguments(python_operand_order)
 
+    def _argument_index(self):
+        '''
+        The arguments of this Function as an index for
+        :func:`~cntk.internal.sanitize.sanitize_var_map`, cached across calls.
+        The cache is dropped by clone and replace_placeholder(s). Since
+        placeholders can also be replaced through another handle of the graph,
+        an index built while the graph still had placeholders is rebuilt on
+        every call, until the graph is complete and its arguments cannot
+        change.
+        '''
+        from ..default_options import get_global_option
+        python_operand_order = get_global_option('python_operand_order', True)
+        cached = self.__dict__.get('_cached_argument_index')
+        if cached is None or cached[0] != python_operand_order or \
+                not cached[1]:
+            complete = len(self.placeholders) == 0
+            cached = (python_operand_order, complete,
+                      _ArgumentIndex(self.arguments))
+            self.__dict__['_cached_argument_index'] = cached
+        return cached[2]
+
     @property
     @typemap
     def attributes(self):
@@ -628,7 +650,7 @@ class Function(cntk_py.Function):
         for key in values.keys():
             custom_attr[key] = values[key]
 
-    @typemap
+    @typemap(returns=cntk_py.Function)
     def clone(self, method, substitutions=None):
         '''
         Clones the function. The parameters of the Function are either cloned,
@@ -661,10 +683,11 @@ class Function(cntk_py.Function):
         for prev_node, new_node in substitutions.items():
             if not new_node or not prev_node:
                 raise AttributeError("Cannot replace node: " + str(prev_node) + " with node: " + str(new_node) + ". Neither node can be None.")
+        self.__dict__.pop('_cached_argument_index', None)
         return super(Function, self).clone(method, substitutions)
 
     @property
-    @typemap
+    @typemap(returns=[cntk_py.Constant])
     def constants(self):
         '''
         List of all `Constant` variables of this :class:`~cntk.ops.functions.Function`
@@ -713,11 +736,15 @@ class Function(cntk_py.Function):
             device (:class:`~cntk.device.DeviceDescriptor`): the device descriptor that
              contains the type and id of the device on which the computation is
              to be performed.
-            as_numpy (bool): whether to return the result as a NumPy array. Default True.
+            as_numpy (bool or 'view'): whether to return the result as a NumPy array. Default True.
              Specifying this as False returns a CNTK Value which avoids a
              costly conversion but returns a somewhat opaque object. Also, the Value objects
              are temporary and only guaranteed to be valid until the next forward/eval/backward/grad call.
              You must explicitly clone the temporay Value objects if they need to be accessed later.
+             Specifying 'view' returns dense outputs without sequence axis that live on the
+             CPU as read-only NumPy arrays that alias the output storage instead of copies.
+             Like the Value objects, their contents are only guaranteed until the next
+             forward/eval/backward/grad call; copy them if they need to be accessed later.
 
         Note:
              See :meth:`~cntk.ops.functions.Function.forward` for examples on
@@ -733,7 +760,7 @@ class Function(cntk_py.Function):
         _, output_map = self.forward(arguments, outputs, device=device, as_numpy=as_numpy)
         return sanitize_variable_value_dict(output_map)
 
-    @typemap
+    @typemap(returns=(None, {cntk_py.Variable: cntk_py.Value}))
     def forward(self, arguments, outputs=None, keep_for_backward=None, device=None, as_numpy=True):
         '''
         Computes the values of speficied variables in ``outputs``, using values
@@ -840,11 +867,15 @@ class Function(cntk_py.Function):
             device (:class:`~cntk.device.DeviceDescriptor`, default `None`): the device
              descriptor that contains the type and id of the device on which the
              computation is. If `None`, the default device is used.
-            as_numpy (bool): whether to return the result as a NumPy array. Default True.
+            as_numpy (bool or 'view'): whether to return the result as a NumPy array. Default True.
              Specifying this as False returns a CNTK Value which avoids a
              costly conversion but returns a somewhat opaque object. Also, the Value objects
              are temporary and only guaranteed to be valid until the next forward/eval/backward/grad call.
              You must explicitly clone the temporay Value objects if they need to be accessed later.
+             Specifying 'view' returns dense outputs without sequence axis that live on the
+             CPU as read-only NumPy arrays that alias the output storage instead of copies.
+             Like the Value objects, their contents are only guaranteed until the next
+             forward/eval/backward/grad call; copy them if they need to be accessed later.
 
         Returns:
              A tuple (BackPropState, map of outputs to NumPy arrays). The
@@ -853,7 +884,7 @@ class Function(cntk_py.Function):
         if device is None:
             device = DeviceDescriptor.use_default_device()
 
-        in_var_map = sanitize_var_map(self.arguments, arguments,
+        in_var_map = sanitize_var_map(self._argument_index(), arguments,
                                       None, device)
         if outputs is None:
             outputs = self.outputs
@@ -866,12 +897,13 @@ class Function(cntk_py.Function):
         state = super(Function, self)._forward(in_var_map, output_map, device,
                                                keep_for_backward)
         if as_numpy:
+            view = as_numpy == 'view'
             for k, v in output_map.items():
-                output_map[k] = _value_as_sequence_or_array(v, k)
+                output_map[k] = _value_as_sequence_or_array(v, k, view)
 
         return state, output_map
 
-    @typemap
+    @typemap(returns={cntk_py.Variable: cntk_py.Value})
     def backward(self, state, root_gradients, variables, as_numpy=True):
         '''
         Backpropagates supplied ``root_gradients`` for one or more of the output
@@ -978,7 +1010,7 @@ class Function(cntk_py.Function):
         if device is None:
             device = DeviceDescriptor.use_default_device()
 
-        in_var_map = sanitize_var_map(self.arguments, at, None, device)
+        in_var_map = sanitize_var_map(self._argument_index(), at, None, device)
 
         if outputs is None:
             outputs = []
@@ -1008,7 +1040,7 @@ class Function(cntk_py.Function):
             return sanitize_variable_value_dict(wrt_map), sanitize_variable_value_dict(output_map)
 
     @property
-    @typemap
+    @typemap(returns=[cntk_py.Variable])
     def inputs(self):
         '''
         List of variables that are inputs of this function.
@@ -1043,7 +1075,7 @@ class Function(cntk_py.Function):
         return super(Function, self).op_name()
 
     @property
-    @typemap
+    @typemap(returns=cntk_py.Variable)
     def output(self):
         '''
         The single output variable if there is only one, or raises an exception.
@@ -1051,7 +1083,7 @@ class Function(cntk_py.Function):
         return super(Function, self).output()
 
     @property
-    @typemap
+    @typemap(returns=[cntk_py.Variable])
     def outputs(self):
         '''
         List consisting of all output variables of this function.
@@ -1059,7 +1091,7 @@ class Function(cntk_py.Function):
         return super(Function, self).outputs()
 
     @property
-    @typemap
+    @typemap(returns=[cntk_py.Parameter])
     def parameters(self):
         '''
         List of all parameter variables of this function.
@@ -1067,7 +1099,7 @@ class Function(cntk_py.Function):
         return super(Function, self).parameters()
 
     @property
-    @typemap
+    @typemap(returns=[cntk_py.Variable])
     def placeholders(self):
         '''
         List of all placeholders variables of this function.
@@ -1075,7 +1107,7 @@ class Function(cntk_py.Function):
         return super(Function, self).placeholders()
 
     @property
-    @typemap
+    @typemap(returns=cntk_py.Function)
     def root_function(self):
         '''
         The primitive function at the root of the graph of functions underlying this function.
@@ -1110,7 +1142,7 @@ class Function(cntk_py.Function):
         return super(Function, self).is_block()
 
     @property
-    @typemap
+    @typemap(returns=cntk_py.Function)
     def block_root(self):
         '''
         Returns the root of the Function graph underlying this block Function.
@@ -1192,7 +1224,7 @@ class Function(cntk_py.Function):
 
 
 
-    @typemap
+    @typemap(returns=cntk_py.Function)
     def replace_placeholders(self, substitutions):
         '''
         In-place replace specified placeholders in the Function graph with the
@@ -1207,9 +1239,10 @@ class Function(cntk_py.Function):
         substitutions = substitutions or {}
         if not isinstance(substitutions, dict):
             raise TypeError("Variable substitution map must be a dictionary")
+        self.__dict__.pop('_cached_argument_index', None)
         return super(Function, self).replace_placeholders(substitutions)
 
-    @typemap
+    @typemap(returns=cntk_py.Function)
     def replace_placeholder(self, substitution):
         '''
         In-place replace the only placeholder in the function graph with the
@@ -1224,6 +1257,7 @@ class Function(cntk_py.Function):
 
         :raises Exception: when the function has multiple placeholders.
         '''
+        self.__dict__.pop('_cached_argument_index', None)
         return super(Function, self).replace_placeholder(substitution)
 
     @typemap
@@ -54,6 +54,69 @@ def test_replace_placeholders():
     assert res3.eval({i: [[3]]}) == [17]
 
 
+def test_argument_index_cache():
+    a = C.input_variable(shape=(1,), name='a')
+    p = C.placeholder(shape=(1,))
+    res = a + p
+
+    index = res._argument_index()
+    assert len(index) == 1
+    assert res._argument_index() is index
+
+    b = C.input_variable(shape=(1,), name='b')
+    res.replace_placeholders({p: b})
+    assert len(res._argument_index()) == 2
+
+    assert res.eval({'a': [[3]], 'b': [[4]]}) == [7]
+    assert res.eval({a: [[3]], 'b': [[5]]}) == [8]
+
+    with pytest.raises(ValueError):
+        res.eval({'a': [[3]], 'c': [[4]]})
+
+    c = C.input_variable(shape=(1,), name='a')
+    res2 = res + c
+    with pytest.raises(ValueError):
+        res2.eval({'a': [[3]], b: [[4]]})
+
+    # placeholders replaced through another handle of the graph
+    p2 = C.placeholder(shape=(1,))
+    inner = a + p2
+    outer = inner * 2
+    assert len(outer._argument_index()) == 1
+    d = C.input_variable(shape=(1,), name='d')
+    inner.replace_placeholders({p2: d})
+    assert len(outer._argument_index()) == 2
+    assert outer.eval({a: [[1]], d: [[2]]}) == [6]
+
+
+def test_argument_index_queries_arguments_once(monkeypatch):
+    a = C.input_variable(shape=(1,), name='a')
+    res = a * 2
+
+    queries = []
+    arguments = C.Function.arguments
+    def counting_arguments(self):
+        queries.append(self)
+        return arguments.fget(self)
+    monkeypatch.setattr(C.Function, 'arguments', property(counting_arguments))
+
+    for i in range(3):
+        assert res.eval({a: [[i]]}) == [2 * i]
+    assert len(queries) == 1
+
+
+def test_eval_with_sequence_starts_per_variable():
+    a = C.sequence.input_variable(shape=(1,))
+    b = C.sequence.input_variable(shape=(1,))
+    res = a + b
+    data = [np.asarray([[1], [2]], dtype=np.float32)]
+    result = res.eval({a: (data, [True]), b: (data, [True])})
+    assert np.array_equal(result[0], [[2], [4]])
+
+    with pytest.raises(ValueError):
+        res.eval(({a: (data, [True]), b: data}, [True]))
+
+
 def test_cloning():
     p = C.placeholder(shape=(1,), name='p')
     i = C.input_variable(shape=(1,),
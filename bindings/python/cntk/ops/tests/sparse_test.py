@@ -239,6 +239,58 @@ def test_2d_sequence_sparse_one_hot():
     assert np.array_equal(result_dense[1], np.eye(num_classes, dtype=np.float32)[indices[1]])
 
 
+@pytest.mark.parametrize("sample_shape", [(5,), (2, 5)])
+def test_value_one_hot_from_packed_indices(device_id, sample_shape):
+    dev = cntk_device(device_id)
+    sequences = [[1, 4, 0, 3], [2, 2], [C.Value.ONE_HOT_SKIP, 0, 4, 1, 3, 2]]
+    packed = np.asarray([i for seq in sequences for i in seq], dtype=np.uint64)
+    per_sample = int(np.prod(sample_shape[:-1]))
+    lengths = [len(seq) // per_sample for seq in sequences]
+
+    a = C.sequence.input_variable(shape=sample_shape, is_sparse=True)
+    w = np.eye(sample_shape[-1], dtype=np.float32)
+    a_dense = C.times(a, w)
+
+    expected = a_dense.eval({a : C.Value.one_hot(sequences, sample_shape, device=dev)}, device=dev)
+
+    from_lengths = C.Value.one_hot(packed, sample_shape, device=dev,
+                                   sequence_lengths=lengths)
+    from_offsets = C.Value.one_hot(packed, sample_shape, device=dev,
+                                   offsets=np.cumsum([0] + lengths))
+    for value in [from_lengths, from_offsets]:
+        result = a_dense.eval({a : value}, device=dev)
+        assert len(result) == len(expected)
+        for r, e in zip(result, expected):
+            assert np.array_equal(r, e)
+
+    with pytest.raises(ValueError):
+        C.Value.one_hot(packed, sample_shape, sequence_lengths=[1, 2])
+
+    with pytest.raises(ValueError):
+        C.Value.one_hot(packed + 5, sample_shape, sequence_lengths=lengths)
+
+    # only the exact ONE_HOT_SKIP marks a zero vector, not e.g. -1
+    with pytest.raises(ValueError):
+        C.Value.one_hot(packed.astype(np.int64), sample_shape,
+                        sequence_lengths=lengths)
+
+    # int32 indices without skipped entries
+    packed_int32 = np.asarray([i for seq in sequences[:2] for i in seq], dtype=np.int32)
+    from_int32 = C.Value.one_hot(packed_int32, sample_shape, device=dev,
+                                 sequence_lengths=lengths[:2])
+    result = a_dense.eval({a : from_int32}, device=dev)
+    for r, e in zip(result, expected[:2]):
+        assert np.array_equal(r, e)
+
+    # sequences of equal length need no padding
+    equal = C.Value.one_hot(np.tile(packed_int32[:2], 3), sample_shape, device=dev,
+                            offsets=[0, 2 // per_sample, 4 // per_sample, 6 // per_sample])
+    result = a_dense.eval({a : equal}, device=dev)
+    assert len(result) == 3
+    for r in result:
+        assert np.array_equal(r, np.eye(sample_shape[-1])[[1, 4]].reshape((-1,) + sample_shape))
+
+
 def test_gather_implementation_using_one_hot_and_times():
     num_classes = 4
 
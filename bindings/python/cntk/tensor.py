@@ -9,7 +9,6 @@ Tensor operations.
 
 
 import warnings
-from scipy import sparse
 
 class TensorOpsMixin(object):
     '''
@@ -173,10 +172,26 @@ def _add_tensor_ops(klass):
         setattr(klass, overload_name, TensorOpsMixin.__dict__[overload_name])
 
 
+def _is_cpu(ndav):
+    from cntk.device import DeviceKind
+    device = ndav.device
+    if callable(device):
+        device = device()
+    return device.type() == DeviceKind.CPU
+
+
 class ArrayMixin(object):
-    def asarray(self):
+    def asarray(self, view=False):
         '''
         Converts the instance's data to a NumPy array.
+
+        Args:
+            view (bool, default False): if True, dense data on the CPU is
+             returned as a read-only NumPy array that aliases the underlying
+             storage instead of a copy. The array keeps the storage alive,
+             but it reflects any later change to it, e.g. by the next
+             forward pass that reuses the buffer. In all other cases, a copy
+             is returned.
         '''
         import cntk
         result = None
@@ -225,30 +240,23 @@ class ArrayMixin(object):
                               'conversion.')
 
         if is_sparse:
-            from cntk.internal.sanitize import _sparse_to_dense_network_cache
+            from cntk.core import _sparse_to_csr
 
-            device = ndav.device
-            if callable(device):
-                device = device()
+            shape = ndav.shape
+            if callable(shape):
+                shape = shape().dimensions()
 
-            network = _sparse_to_dense_network_cache(ndav.shape[1:], False,
-                                                     device)
-            warnings.warn('converting Value object to CSR format might be slow')
+            result = _sparse_to_csr(ndav, shape)
 
-            dense_data = network.eval(self, device=device)
+            if len(shape) > 2:
+                warnings.warn('Cannot convert a sparse NDArrayView or Value object '
+                                 'with shape %s of rank > 2 to a scipy.csr matrix.'
+                                 ' Returning dense data.' % str(shape))
+                result = result.toarray().reshape(shape)
 
-            def to_csr(dense_data):
-                if len(dense_data.shape) > 2:
-                    warnings.warn('Cannot convert a sparse NDArrayView or Value object '
-                                     'with shape %s of rank > 2 to a scipy.csr matrix.'
-                                     ' Returning dense data.' % str(dense_data.shape))
-                    return dense_data
-                return sparse.csr_matrix(dense_data)
-
-            if isinstance(dense_data, list):
-                result = [to_csr(d) for d in dense_data]
-            else:
-                result = to_csr(dense_data)
+        elif view and isinstance(ndav, cntk.cntk_py.NDArrayView) and \
+                _is_cpu(ndav):
+            result = ndav.to_ndarray_view(ndav)
 
         else:
             result = ndav.to_ndarray()
@@ -236,6 +236,81 @@ def test_2d_sparse_sequences_value(device_id):
     sequence_value = C.Value.create(x, [ndarrayview1, ndarrayview2], device=dev)
     assert np.array_equal(_to_dense(sequence_value.data), [seq1_data, [seq2_data, [[0, 0, 0], [0, 0, 0]]]])
 
+def test_sparse_value_to_csr_direct(device_id):
+    dev = cntk_device(device_id)
+    x = C.sequence.input_variable((4,), is_sparse=True)
+    data = [csr([[1, 0, 2, 0], [0, 3, 0, 0], [0, 0, 0, 4]], dtype=np.float32),
+            csr([[0, 5, 0, 6]], dtype=np.float32),
+            csr([[0, 0, 0, 0], [7, 0, 0, 8]], dtype=np.float32)]
+    val = C.Value.create(x, data, device=dev)
+
+    sequences = val.as_sequences(x)
+    assert len(sequences) == len(data)
+    for seq, expected in zip(sequences, data):
+        assert sparse.isspmatrix_csr(seq)
+        assert seq.shape == expected.shape
+        assert np.array_equal(seq.toarray(), expected.toarray())
+
+    ndav = C.NDArrayView.from_csr(csr([[0, 1, 0], [2, 0, 3]], dtype=np.float32),
+                                  device=dev)
+    result = ndav.asarray()
+    assert sparse.isspmatrix_csr(result)
+    assert np.array_equal(result.toarray(), [[0, 1, 0], [2, 0, 3]])
+
+def test_value_from_packed(device_id):
+    dev = cntk_device(device_id)
+    x = C.sequence.input_variable((2,))
+    sequences = [AA([[1, 2], [3, 4], [5, 6]], dtype=np.float32),
+                 AA([[7, 8]], dtype=np.float32),
+                 AA([[9, 10], [11, 12]], dtype=np.float32)]
+    offsets = [0, 3, 4, 6]
+
+    val = C.Value.from_packed(x, np.concatenate(sequences), offsets, device=dev)
+    assert val.shape == (3, 3, 2)
+    assert np.array_equal(val.mask, [[2, 1, 1], [2, 0, 0], [2, 1, 0]])
+    for seq, expected in zip(val.as_sequences(x), sequences):
+        assert np.array_equal(seq, expected)
+
+    val = C.Value.from_packed(x, np.concatenate(sequences), offsets,
+                              seq_starts=[True, False, True], device=dev)
+    assert np.array_equal(val.mask, [[2, 1, 1], [1, 0, 0], [2, 1, 0]])
+
+    s = C.sequence.input_variable((3,), is_sparse=True)
+    csr_sequences = [csr([[1, 0, 2], [0, 3, 0]], dtype=np.float32),
+                     csr([[0, 0, 4]], dtype=np.float32)]
+    val = C.Value.from_packed(s, sparse.vstack(csr_sequences, format='csr'),
+                              [0, 2, 3], device=dev)
+    assert val.shape == (2, 2, 3)
+    for seq, expected in zip(val.as_sequences(s), csr_sequences):
+        assert np.array_equal(seq.toarray(), expected.toarray())
+
+    with pytest.raises(ValueError):
+        C.Value.from_packed(x, np.concatenate(sequences), [0, 3, 3, 6])
+
+    with pytest.raises(ValueError):
+        C.Value.from_packed(x, np.concatenate(sequences), [0, 3, 4, 7])
+
+def test_eval_as_numpy_view(device_id):
+    dev = cntk_device(device_id)
+    x = C.input_variable(3)
+    z = C.times(x, np.arange(6, dtype=np.float32).reshape(3, 2))
+    data = np.random.rand(4, 3).astype(np.float32)
+
+    expected = z.eval({x: data}, device=dev)
+    result = z.eval({x: data}, device=dev, as_numpy='view')
+    assert np.allclose(result, expected)
+
+    if dev.type() == C.device.DeviceKind.CPU:
+        assert not result.flags.writeable
+        assert result.base is not None
+    else:
+        assert result.flags.writeable
+
+    s = C.sequence.input_variable(3)
+    sequences = [np.ones((2, 3), dtype=np.float32), np.ones((1, 3), dtype=np.float32)]
+    result = (s * 2).eval({s: sequences}, device=dev, as_numpy='view')
+    assert [r.shape for r in result] == [(2, 3), (1, 3)]
+
 def test_as_shape_to_1d(device_id):
     dev = cntk_device(device_id)
     x = C.input_variable(1)
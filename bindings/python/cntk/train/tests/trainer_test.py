@@ -69,6 +69,45 @@ def test_output_to_retain():
     updated, var_map = trainer.train_minibatch(arguments, outputs=[z_output])
     assert np.allclose(var_map[z_output], np.asarray(in1_value)+20)
 
+def test_train_minibatch_with_staging_pool(device_id):
+    dev = cntk_device(device_id)
+
+    def create_trainer():
+        features = C.input_variable(3)
+        labels = C.input_variable(2)
+        z = C.layers.Dense(2, init=C.glorot_uniform(seed=1))(features)
+        ce = cross_entropy_with_softmax(z, labels)
+        lr = C.learning_parameter_schedule(0.1)
+        return C.Trainer(z, ce, [C.sgd(z.parameters, lr)]), features, labels
+
+    np.random.seed(0)
+    minibatches = [(np.random.rand(4, 3).astype(np.float32),
+                    np.eye(2, dtype=np.float32)[np.random.randint(2, size=4)])
+                   for _ in range(5)]
+
+    pool = C.StagingBufferPool()
+    results = []
+    for staging_pool in [None, pool]:
+        trainer, features, labels = create_trainer()
+        for f, l in minibatches:
+            trainer.train_minibatch({features: f, labels: l}, device=dev,
+                                    staging_pool=staging_pool)
+        results.append([p.value for p in trainer.model.parameters])
+
+    for expected, result in zip(*results):
+        assert np.allclose(expected, result)
+
+    # one buffer per argument; same-shaped minibatches reuse them
+    assert pool.allocations == 2
+    assert pool.reuses == 2 * (len(minibatches) - 1)
+
+    # non-contiguous minibatches are staged as well
+    trainer, features, labels = create_trainer()
+    f = np.asfortranarray(minibatches[0][0])
+    trainer.train_minibatch({features: f, labels: minibatches[0][1]}, device=dev,
+                            staging_pool=pool)
+    assert pool.allocations == 2
+
 def test_epochsize_wrn_for_momentum_time_constant():
     with warnings.catch_warnings(record=True) as w:
         warnings.simplefilter("always")
@@ -8,6 +8,7 @@ from .. import cntk_py
 from ..device import use_default_device
 from cntk.internal import sanitize_var_map, sanitize_function, typemap, \
                           _value_as_sequence_or_array
+from cntk.internal.sanitize import _ArgumentIndex
 from cntk.internal.utils import _py_dict_to_cntk_dict
 from ..io import MinibatchData
 
@@ -74,6 +75,24 @@ class Trainer(cntk_py.Trainer):
         # transplant into this class instance
         self.__dict__ = trainer.__dict__
 
+    def _argument_index(self):
+        '''
+        The union of the arguments of model, loss and evaluation function,
+        which do not change during training, as an index for
+        :func:`~cntk.internal.sanitize.sanitize_var_map`. It is computed on
+        the first call only.
+        '''
+        index = self.__dict__.get('_cached_argument_index')
+        if index is None:
+            all_args = set(self.loss_function.arguments)
+            if self.model:
+                all_args |= set(self.model.arguments)
+            if self.evaluation_function:
+                all_args |= set(self.evaluation_function.arguments)
+            index = _ArgumentIndex(all_args)
+            self.__dict__['_cached_argument_index'] = index
+        return index
+
     # TODO: bring this back once the design has been settled
     def _train_test_mb_map_args(self, *args, **kwargs):
         '''helper function for mimicking Python calling convention in train/test_minibatch()'''
@@ -93,7 +112,8 @@ class Trainer(cntk_py.Trainer):
                     raise ValueError("evaluation function must have the same signature and inputs as the loss function")
         return args
 
-    def train_minibatch(self, arguments, outputs=None, device=None, is_sweep_end=None):
+    def train_minibatch(self, arguments, outputs=None, device=None, is_sweep_end=None,
+                        staging_pool=None):
         '''
         Optimize model parameters using the specified 'arguments' minibatch of training samples.
 
@@ -123,6 +143,10 @@ class Trainer(cntk_py.Trainer):
             This is used in combination with `arguments` being fed with numpy arrays data; when the data is from
              :class:`~cntk.io.MinibatchData`, `is_sweep_end` is provided by :class:`~cntk.io.MinibatchData` so there is
              no need to specify it manually.
+            staging_pool (:class:`~cntk.core.StagingBufferPool`, optional): if given,
+             dense NumPy minibatches are copied into buffers of the pool that are
+             reused by later calls with minibatches of the same shape, instead of
+             allocating new storage for every call.
 
         Note:
              See :meth:`~cntk.ops.functions.Function.forward` for examples on
@@ -140,14 +164,17 @@ class Trainer(cntk_py.Trainer):
             device = use_default_device()
 
         if arguments: # arguments must feed all inputs (model, loss, eval)
-            all_args = set(self.loss_function.arguments)
-            if self.model:
-                all_args |= set(self.model.arguments)
-            if self.evaluation_function:
-                all_args |= set(self.evaluation_function.arguments)
-            arguments = sanitize_var_map(tuple(all_args), arguments,
-                extract_values_from_minibatch_data = False, device=device)
+            arguments = sanitize_var_map(self._argument_index(), arguments,
+                extract_values_from_minibatch_data = False, device=device,
+                staging_pool=staging_pool)
+
+        try:
+            return self._train_minibatch(arguments, outputs, device, is_sweep_end)
+        finally:
+            if staging_pool is not None:
+                staging_pool.release()
 
+    def _train_minibatch(self, arguments, outputs, device, is_sweep_end):
         contains_minibatch_data = False
         if (len(arguments) > 0):
             value = next(iter(arguments.values()))
@@ -224,12 +251,7 @@ class Trainer(cntk_py.Trainer):
             device = use_default_device()
 
         # pass all args of all parts (model, loss, eval)
-        all_args = set(self.loss_function.arguments)
-        if self.model:
-            all_args |= set(self.model.arguments)
-        if self.evaluation_function:
-            all_args |= set(self.evaluation_function.arguments)
-        arguments = sanitize_var_map(tuple(all_args), arguments)
+        arguments = sanitize_var_map(self._argument_index(), arguments)
 
         return super(Trainer, self).test_minibatch(arguments, device)
 